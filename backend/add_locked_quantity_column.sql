@@ -0,0 +1,21 @@
+-- Add locked_quantity column to holdings table if it doesn't exist
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'holdings' AND column_name = 'locked_quantity'
+    ) THEN
+        ALTER TABLE holdings ADD COLUMN locked_quantity NUMERIC(20, 2) NOT NULL DEFAULT 0;
+        RAISE NOTICE 'Added locked_quantity column to holdings table';
+    ELSE
+        RAISE NOTICE 'locked_quantity column already exists in holdings table';
+    END IF;
+END $$;
+
+-- Reserve the unfilled quantity of sell orders already resting in the book
+UPDATE holdings SET locked_quantity = (
+    SELECT COALESCE(SUM(orders.quantity - orders.filled_quantity), 0) FROM orders
+    WHERE orders.user_id = holdings.user_id AND orders.bond_id = holdings.bond_id
+    AND orders.side = 'sell' AND orders.status IN ('open', 'partial')
+);
+
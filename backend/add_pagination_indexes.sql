@@ -0,0 +1,5 @@
+-- Composite indexes behind keyset (cursor) pagination.
+-- Pages are read newest first by (created_at, id) or (executed_at, id).
+CREATE INDEX IF NOT EXISTS ix_orders_user_created ON orders (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_trades_executed ON trades (executed_at, id);
+CREATE INDEX IF NOT EXISTS ix_trades_bond_executed ON trades (bond_id, executed_at, id);
@@ -0,0 +1,13 @@
+-- Add stop_price column to orders table if it doesn't exist
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'orders' AND column_name = 'stop_price'
+    ) THEN
+        ALTER TABLE orders ADD COLUMN stop_price NUMERIC(20, 2);
+        RAISE NOTICE 'Added stop_price column to orders table';
+    ELSE
+        RAISE NOTICE 'stop_price column already exists in orders table';
+    END IF;
+END $$;
@@ -0,0 +1,26 @@
+-- Add time in force columns to orders table if they don't exist
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'orders' AND column_name = 'time_in_force'
+    ) THEN
+        ALTER TABLE orders ADD COLUMN time_in_force VARCHAR DEFAULT 'GTC';
+        RAISE NOTICE 'Added time_in_force column to orders table';
+    ELSE
+        RAISE NOTICE 'time_in_force column already exists in orders table';
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns 
+        WHERE table_name = 'orders' AND column_name = 'expires_at'
+    ) THEN
+        ALTER TABLE orders ADD COLUMN expires_at TIMESTAMP WITH TIME ZONE;
+        RAISE NOTICE 'Added expires_at column to orders table';
+    ELSE
+        RAISE NOTICE 'expires_at column already exists in orders table';
+    END IF;
+END $$;
+
+-- Market orders without a limit have no price
+ALTER TABLE orders ALTER COLUMN price DROP NOT NULL;
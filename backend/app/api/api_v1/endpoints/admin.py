@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from pydantic import BaseModel
 from decimal import Decimal
 from datetime import datetime, timedelta
 import uuid
 
 from app.db.database import get_db
-from app.models.models import User, Bond, Order, Trade, Holding
+from app.models.models import User, Bond, BondMarketSummary, Candle, Order, Trade, Holding
+from app.services import candles, market_summary
+from app.services.sequencer import matching_sequencer
 
 router = APIRouter()
 
@@ -253,6 +256,11 @@ async def seed_sample_data(db: Session = Depends(get_db)):
         )
         
         db.add_all([holding1, holding2, holding3])
+        db.flush()
+        
+        # Summaries and candles of the new bonds, built from the sample trades and holdings
+        market_summary.ensure_summaries(db, [bond1.id, bond2.id, bond3.id])
+        candles.apply_trades(db, bond1.id, [trade1, trade2])
         
         db.commit()
         
@@ -275,6 +283,8 @@ async def clear_all_data(db: Session = Depends(get_db)):
     try:
         # Delete in correct order due to foreign key constraints
         db.query(Trade).delete()
+        db.query(Candle).delete()
+        db.query(BondMarketSummary).delete()
         db.query(Holding).delete()
         db.query(Order).delete()
         db.query(Bond).delete()
@@ -282,8 +292,37 @@ async def clear_all_data(db: Session = Depends(get_db)):
         
         db.commit()
         
+        # Drop cached books and reservations for the deleted data
+        matching_sequencer.reset_state()
+        
         return {"message": "All data cleared successfully"}
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error clearing data: {str(e)}")
+
+class ShardRebalance(BaseModel):
+    bond_id: str
+    worker: int
+
+@router.get("/matching/shards")
+async def get_matching_shards():
+    """Show matching worker processes and bond assignment overrides"""
+    shard_router = matching_sequencer.router
+    if shard_router is None:
+        return {"sharded": False, "workers": []}
+    return {"sharded": True, **shard_router.status()}
+
+@router.post("/matching/rebalance")
+async def rebalance_matching_shard(rebalance: ShardRebalance):
+    """Move a bond's matching to another worker process without downtime"""
+    shard_router = matching_sequencer.router
+    if shard_router is None:
+        raise HTTPException(status_code=400, detail="Sharded matching is not enabled")
+    try:
+        bond_id = uuid.UUID(rebalance.bond_id)
+        await shard_router.rebalance(bond_id, rebalance.worker)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"message": f"Bond {bond_id} is now matched by worker {shard_router.owner(bond_id)}"}
@@ -1,14 +1,21 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import io
 import uuid
+import numpy as np
 
 from app.db.database import get_db
-from app.models.models import Bond, Order, Trade, Holding, User
+from app.models.models import Bond, BondMarketSummary, User
+from app.services import candles, market_summary
+from app.services import analytics as bond_math
+from app.services.analytics import BondAnalytics, bond_analytics
+from app.services.book_cache import book_cache, etag_matches, get_cached_orderbook
+from app.services.trade_stats import trade_stats
+from app.services.yield_curve import DEFAULT_TENORS, yield_curve
 
 router = APIRouter()
 
@@ -22,6 +29,16 @@ class BondCreate(BaseModel):
     min_unit: Decimal
     issuer_wallet_address: str
 
+class BondAnalyticsResponse(BaseModel):
+    # Prices per 100 of face value, at the last traded clean price or par
+    clean_price: float
+    accrued_interest: float
+    dirty_price: float
+    ytm: float
+    macaulay_duration: float
+    modified_duration: float
+    convexity: float
+
 class BondResponse(BaseModel):
     id: str
     name: str
@@ -37,6 +54,13 @@ class BondResponse(BaseModel):
     price_change_percentage: float
     market_cap: float
     total_supply: Optional[int]
+    analytics: Optional[BondAnalyticsResponse] = None
+
+class BondAnalyticsEntry(BondAnalyticsResponse):
+    bond_id: str
+    isin: str
+    name: str
+    maturity_date: datetime
 
 class OrderBookEntry(BaseModel):
     price: Decimal
@@ -52,7 +76,10 @@ class OrderBookResponse(BaseModel):
 
 class MarketStatsResponse(BaseModel):
     bond_id: str
+    window: str
     current_price: float
+    open_price: Optional[float]
+    vwap: Optional[float]
     volume_24h: float
     price_change_24h: float
     price_change_percentage: float
@@ -60,6 +87,115 @@ class MarketStatsResponse(BaseModel):
     low_24h: float
     trades_count_24h: int
 
+class CurvePointResponse(BaseModel):
+    bond_id: str
+    tenor: float  # Years to maturity
+    ytm: float
+    fitted_yield: float
+
+class TenorYield(BaseModel):
+    tenor: float
+    yield_: float = Field(alias="yield")
+
+class YieldCurveResponse(BaseModel):
+    model: str
+    beta0: float
+    beta1: float
+    beta2: float
+    tau: float
+    fitted_at: datetime
+    points: List[CurvePointResponse]
+    yields: List[TenorYield]
+
+class PriceScenariosRequest(BaseModel):
+    bond_ids: List[str] = Field(min_length=1, max_length=500)
+    # Key tenors in years, increasing; omit for parallel shocks
+    tenors: Optional[List[float]] = None
+    # Yield shocks in basis points, one row per scenario and one column per
+    # key tenor (a single column without tenors); bonds between key tenors
+    # get the linearly interpolated shock
+    shocks: List[List[float]] = Field(min_length=1, max_length=1000)
+
+    @model_validator(mode="after")
+    def check_shock_matrix(self):
+        columns = len(self.tenors) if self.tenors else 1
+        if self.tenors and any(b <= a for a, b in zip(self.tenors, self.tenors[1:])):
+            raise ValueError("tenors must be increasing")
+        if any(len(row) != columns for row in self.shocks):
+            raise ValueError(f"Every shock row needs {columns} values, one per key tenor")
+        return self
+
+class PriceScenariosResponse(BaseModel):
+    bond_ids: List[str]
+    maturities: List[float]  # Years to maturity of each bond
+    base_yields: List[float]
+    base_prices: List[float]
+    # Clean prices per 100 of face, one row per scenario and one column per bond
+    prices: List[List[float]]
+
+class CandleResponse(BaseModel):
+    time: datetime  # Start of the bar, UTC
+    open: Decimal
+    high: Decimal
+    low: Decimal
+    close: Decimal
+    volume: Decimal
+    notional: Decimal
+    trades_count: int
+
+def _market_data(bond: Bond, summary: Optional[BondMarketSummary]) -> dict:
+    """Market data of a bond from its summary, priced at face value until it trades"""
+    last_price = summary.last_price if summary else None
+    current_price = last_price if last_price is not None else bond.face_value
+    reference_price = summary.reference_price if summary else None
+    
+    if reference_price:
+        price_change_24h = current_price - reference_price
+        price_change_percentage = float((price_change_24h / reference_price) * 100)
+    else:
+        price_change_24h = Decimal('0')
+        price_change_percentage = 0.0
+    
+    return {
+        "current_price": current_price,
+        "volume_24h": summary.volume_24h if summary else Decimal('0'),
+        "price_change_24h": price_change_24h,
+        "price_change_percentage": price_change_percentage,
+        "outstanding_quantity": summary.outstanding_quantity if summary else Decimal('0')
+    }
+
+def _bond_response(bond: Bond, summary: Optional[BondMarketSummary],
+                   analytics: Optional[BondAnalytics] = None) -> BondResponse:
+    market = _market_data(bond, summary)
+    return BondResponse(
+        id=str(bond.id),
+        name=bond.name,
+        isin=bond.isin,
+        coupon_rate=bond.coupon_rate,
+        maturity_date=bond.maturity_date,
+        face_value=float(bond.face_value),
+        min_unit=float(bond.min_unit),
+        status=bond.status,
+        current_price=float(market["current_price"]),
+        total_volume_24h=float(market["volume_24h"]),
+        price_change_24h=float(market["price_change_24h"]),
+        price_change_percentage=market["price_change_percentage"],
+        # Market cap is the outstanding holdings at the current price
+        market_cap=float(market["outstanding_quantity"] * market["current_price"]),
+        total_supply=bond.total_token_supply,
+        analytics=BondAnalyticsResponse(**analytics._asdict()) if analytics else None
+    )
+
+def _analytics(rows) -> dict:
+    """Analytics of (bond, summary) rows, repriced together"""
+    return bond_analytics.get_many([(bond, summary.last_price if summary else None) for bond, summary in rows])
+
+def _bonds_with_summary(db: Session):
+    """Bonds joined with their market summary, read in a single query"""
+    return db.query(Bond, BondMarketSummary).outerjoin(
+        BondMarketSummary, BondMarketSummary.bond_id == Bond.id
+    )
+
 @router.get("/", response_model=List[BondResponse])
 async def get_bonds(
     status: Optional[str] = Query(None),
@@ -67,156 +203,102 @@ async def get_bonds(
     db: Session = Depends(get_db)
 ):
     """Get all bonds with market data"""
-    query = db.query(Bond)
+    query = _bonds_with_summary(db)
     
     if status:
         query = query.filter(Bond.status == status)
     
-    bonds = query.limit(limit).all()
-    result = []
-    
-    for bond in bonds:
-        # Calculate current market price (last trade price)
-        last_trade = db.query(Trade).filter(Trade.bond_id == bond.id).order_by(desc(Trade.executed_at)).first()
-        current_price = last_trade.price if last_trade else bond.face_value
-        
-        # Calculate 24h volume
-        twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-        volume_24h = db.query(func.sum(Trade.quantity * Trade.price)).filter(
-            and_(Trade.bond_id == bond.id, Trade.executed_at >= twenty_four_hours_ago)
-        ).scalar() or Decimal('0')
-        
-        # Calculate price change
-        price_24h_ago = db.query(Trade.price).filter(
-            and_(Trade.bond_id == bond.id, Trade.executed_at <= twenty_four_hours_ago)
-        ).order_by(desc(Trade.executed_at)).first()
-        
-        if price_24h_ago:
-            price_change_24h = current_price - price_24h_ago[0]
-            price_change_percentage = float((price_change_24h / price_24h_ago[0]) * 100)
-        else:
-            price_change_24h = Decimal('0')
-            price_change_percentage = 0.0
-        
-        # Calculate market cap (total holdings * current price)
-        total_holdings = db.query(func.sum(Holding.quantity)).filter(Holding.bond_id == bond.id).scalar() or Decimal('0')
-        market_cap = total_holdings * current_price
-        
-        result.append(BondResponse(
-            id=str(bond.id),
-            name=bond.name,
+    rows = query.limit(limit).all()
+    analytics = _analytics(rows)
+    return [_bond_response(bond, summary, analytics[bond.id]) for bond, summary in rows]
+
+@router.get("/analytics", response_model=List[BondAnalyticsEntry])
+async def get_bond_analytics(db: Session = Depends(get_db)):
+    """Get yield, duration, convexity and accrued interest of every active bond"""
+    rows = _bonds_with_summary(db).filter(Bond.status == "active").all()
+    analytics = _analytics(rows)
+    return [
+        BondAnalyticsEntry(
+            bond_id=str(bond.id),
             isin=bond.isin,
-            coupon_rate=bond.coupon_rate,
+            name=bond.name,
             maturity_date=bond.maturity_date,
-            face_value=float(bond.face_value),
-            min_unit=float(bond.min_unit),
-            status=bond.status,
-            current_price=float(current_price),
-            total_volume_24h=float(volume_24h),
-            price_change_24h=float(price_change_24h),
-            price_change_percentage=price_change_percentage,
-            market_cap=float(market_cap),
-            total_supply=bond.total_token_supply
-        ))
+            **analytics[bond.id]._asdict()
+        )
+        for bond, _ in rows
+        if analytics[bond.id] is not None
+    ]
+
+@router.get("/yield-curve", response_model=YieldCurveResponse, response_model_by_alias=True)
+async def get_yield_curve(
+    tenors: Optional[List[float]] = Query(None, description="Tenors in years, e.g. ?tenors=2&tenors=10"),
+    db: Session = Depends(get_db)
+):
+    """Get the Nelson-Siegel yield curve fitted to traded active bonds, evaluated at any tenors"""
+    curve = yield_curve.get(db)
+    if curve is None:
+        raise HTTPException(status_code=404, detail="No traded bonds to fit a yield curve to")
     
-    return result
+    tenors = [tenor for tenor in (tenors or DEFAULT_TENORS) if tenor > 0]
+    point_tenors = [point.tenor for point in curve.points]
+    fitted = curve.yields(point_tenors).tolist()
+    
+    return YieldCurveResponse(
+        model="nelson_siegel",
+        beta0=curve.beta0,
+        beta1=curve.beta1,
+        beta2=curve.beta2,
+        tau=curve.tau,
+        fitted_at=curve.fitted_at,
+        points=[
+            CurvePointResponse(bond_id=str(point.bond_id), tenor=point.tenor, ytm=point.ytm, fitted_yield=value)
+            for point, value in zip(curve.points, fitted)
+        ],
+        yields=[
+            TenorYield(tenor=tenor, **{"yield": value})
+            for tenor, value in zip(tenors, curve.yields(tenors).tolist())
+        ]
+    )
 
 @router.get("/{bond_id}", response_model=BondResponse)
 async def get_bond(bond_id: str, db: Session = Depends(get_db)):
     """Get specific bond with market data"""
-    bond = db.query(Bond).filter(Bond.id == bond_id).first()
-    if not bond:
+    row = _bonds_with_summary(db).filter(Bond.id == bond_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Bond not found")
     
-    # Same market data calculation as above
-    last_trade = db.query(Trade).filter(Trade.bond_id == bond.id).order_by(desc(Trade.executed_at)).first()
-    current_price = last_trade.price if last_trade else bond.face_value
-    
-    twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-    volume_24h = db.query(func.sum(Trade.quantity * Trade.price)).filter(
-        and_(Trade.bond_id == bond.id, Trade.executed_at >= twenty_four_hours_ago)
-    ).scalar() or Decimal('0')
-    
-    price_24h_ago = db.query(Trade.price).filter(
-        and_(Trade.bond_id == bond.id, Trade.executed_at <= twenty_four_hours_ago)
-    ).order_by(desc(Trade.executed_at)).first()
-    
-    if price_24h_ago:
-        price_change_24h = current_price - price_24h_ago[0]
-        price_change_percentage = float((price_change_24h / price_24h_ago[0]) * 100)
-    else:
-        price_change_24h = Decimal('0')
-        price_change_percentage = 0.0
-    
-    total_holdings = db.query(func.sum(Holding.quantity)).filter(Holding.bond_id == bond.id).scalar() or Decimal('0')
-    market_cap = total_holdings * current_price
-    
-    return BondResponse(
-        id=str(bond.id),
-        name=bond.name,
-        isin=bond.isin,
-        coupon_rate=bond.coupon_rate,
-        maturity_date=bond.maturity_date,
-        face_value=float(bond.face_value),
-        min_unit=float(bond.min_unit),
-        status=bond.status,
-        current_price=float(current_price),
-        total_volume_24h=float(volume_24h),
-        price_change_24h=float(price_change_24h),
-        price_change_percentage=price_change_percentage,
-        market_cap=float(market_cap),
-        total_supply=bond.total_token_supply
-    )
+    return _bond_response(*row, _analytics([row])[row[0].id])
 
 @router.get("/{bond_id}/orderbook", response_model=OrderBookResponse)
-async def get_order_book(bond_id: str, db: Session = Depends(get_db)):
-    """Get order book for a specific bond"""
-    bond = db.query(Bond).filter(Bond.id == bond_id).first()
-    if not bond:
+async def get_order_book(
+    bond_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Get order book for a specific bond (304 if the ETag is unchanged)"""
+    try:
+        bond_uuid = uuid.UUID(bond_id)
+    except ValueError:
         raise HTTPException(status_code=404, detail="Bond not found")
     
-    # Get buy orders (bids) grouped by price
-    bids_query = db.query(
-        Order.price,
-        func.sum(Order.quantity - Order.filled_quantity).label('total_quantity'),
-        func.count(Order.id).label('orders_count')
-    ).filter(
-        and_(
-            Order.bond_id == bond_id,
-            Order.side == 'buy',
-            Order.status == 'open'
-        )
-    ).group_by(Order.price).order_by(desc(Order.price)).limit(10)
+    # Aggregated price levels of open and partially filled orders
+    cached = await get_cached_orderbook(db, bond_uuid)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Bond not found")
+    
+    etag = book_cache.etag(cached)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     
     bids = [
-        OrderBookEntry(
-            price=row.price,
-            quantity=row.total_quantity,
-            orders_count=row.orders_count
-        )
-        for row in bids_query.all()
+        OrderBookEntry(price=level.price, quantity=level.quantity, orders_count=level.orders_count)
+        for level in cached.bids
     ]
-    
-    # Get sell orders (asks) grouped by price
-    asks_query = db.query(
-        Order.price,
-        func.sum(Order.quantity - Order.filled_quantity).label('total_quantity'),
-        func.count(Order.id).label('orders_count')
-    ).filter(
-        and_(
-            Order.bond_id == bond_id,
-            Order.side == 'sell',
-            Order.status == 'open'
-        )
-    ).group_by(Order.price).order_by(Order.price).limit(10)
-    
     asks = [
-        OrderBookEntry(
-            price=row.price,
-            quantity=row.total_quantity,
-            orders_count=row.orders_count
-        )
-        for row in asks_query.all()
+        OrderBookEntry(price=level.price, quantity=level.quantity, orders_count=level.orders_count)
+        for level in cached.asks
     ]
     
     # Calculate spread and mid price
@@ -234,57 +316,143 @@ async def get_order_book(bond_id: str, db: Session = Depends(get_db)):
     )
 
 @router.get("/{bond_id}/stats", response_model=MarketStatsResponse)
-async def get_market_stats(bond_id: str, db: Session = Depends(get_db)):
-    """Get detailed market statistics for a bond"""
-    bond = db.query(Bond).filter(Bond.id == bond_id).first()
-    if not bond:
+async def get_market_stats(
+    bond_id: str,
+    window: str = Query("24h", pattern="^(1h|24h|7d)$"),
+    db: Session = Depends(get_db)
+):
+    """Get detailed market statistics for a bond over a trailing 1h, 24h or 7d window"""
+    row = _bonds_with_summary(db).filter(Bond.id == bond_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Bond not found")
     
-    twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-    
-    # Current price (last trade)
-    last_trade = db.query(Trade).filter(Trade.bond_id == bond_id).order_by(desc(Trade.executed_at)).first()
-    current_price = last_trade.price if last_trade else bond.face_value
-    
-    # 24h volume
-    volume_24h = db.query(func.sum(Trade.quantity * Trade.price)).filter(
-        and_(Trade.bond_id == bond_id, Trade.executed_at >= twenty_four_hours_ago)
-    ).scalar() or Decimal('0')
+    bond, summary = row
+    stats = trade_stats.get(db, bond.id, window)
+    current_price = _market_data(bond, summary)["current_price"]
+    if stats.close is not None:
+        current_price = stats.close
     
-    # Price change
-    price_24h_ago = db.query(Trade.price).filter(
-        and_(Trade.bond_id == bond_id, Trade.executed_at <= twenty_four_hours_ago)
-    ).order_by(desc(Trade.executed_at)).first()
-    
-    if price_24h_ago:
-        price_change_24h = current_price - price_24h_ago[0]
-        price_change_percentage = float((price_change_24h / price_24h_ago[0]) * 100)
+    if stats.reference:
+        price_change = current_price - stats.reference
+        price_change_percentage = float((price_change / stats.reference) * 100)
     else:
-        price_change_24h = Decimal('0')
+        price_change = Decimal('0')
         price_change_percentage = 0.0
     
-    # High and low 24h
-    price_stats = db.query(
-        func.max(Trade.price).label('high_24h'),
-        func.min(Trade.price).label('low_24h'),
-        func.count(Trade.id).label('trades_count')
-    ).filter(
-        and_(Trade.bond_id == bond_id, Trade.executed_at >= twenty_four_hours_ago)
-    ).first()
-    
-    high_24h = price_stats.high_24h if price_stats.high_24h else current_price
-    low_24h = price_stats.low_24h if price_stats.low_24h else current_price
-    trades_count_24h = price_stats.trades_count if price_stats.trades_count else 0
+    # High and low fall back to the current price without trades in the window
+    high = stats.high if stats.high is not None else current_price
+    low = stats.low if stats.low is not None else current_price
     
+    # The *_24h fields cover the requested window
     return MarketStatsResponse(
         bond_id=bond_id,
+        window=window,
         current_price=float(current_price),
-        volume_24h=float(volume_24h),
-        price_change_24h=float(price_change_24h),
+        open_price=float(stats.open) if stats.open is not None else None,
+        vwap=float(stats.notional / stats.volume) if stats.volume else None,
+        volume_24h=float(stats.notional),
+        price_change_24h=float(price_change),
         price_change_percentage=price_change_percentage,
-        high_24h=float(high_24h),
-        low_24h=float(low_24h),
-        trades_count_24h=trades_count_24h
+        high_24h=float(high),
+        low_24h=float(low),
+        trades_count_24h=stats.trades_count
+    )
+
+@router.get("/{bond_id}/candles", response_model=List[CandleResponse])
+async def get_candles(
+    bond_id: str,
+    resolution: str = Query("1h", pattern="^(1m|5m|1h|1d)$"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(500, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Get OHLCV bars starting in [from, to), by default the latest `limit` bars"""
+    width = candles.RESOLUTIONS[resolution]
+    # Bars are stored with naive UTC starts, like trade times
+    if end is None:
+        end = datetime.utcnow()
+    elif end.tzinfo is not None:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    if start is None:
+        start = end - timedelta(seconds=width * limit)
+    elif start.tzinfo is not None:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+    
+    bars = candles.get_candles(db, bond_id, width, start, end, limit)
+    if not bars and not db.query(Bond.id).filter(Bond.id == bond_id).first():
+        raise HTTPException(status_code=404, detail="Bond not found")
+    
+    return [
+        CandleResponse(
+            time=bar.bucket_start,
+            open=bar.open,
+            high=bar.high,
+            low=bar.low,
+            close=bar.close,
+            volume=bar.volume,
+            notional=bar.notional,
+            trades_count=bar.trades_count
+        )
+        for bar in bars
+    ]
+
+@router.post("/price-scenarios", response_model=PriceScenariosResponse)
+async def price_scenarios(
+    request: PriceScenariosRequest,
+    output: str = Query("json", alias="format", pattern="^(json|npy)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Reprice bonds under a matrix of yield shocks in one array operation.
+    With format=npy the price grid is returned as a NumPy .npy float64
+    array of shape (scenarios, bonds), in the X-Bond-Ids column order.
+    """
+    try:
+        bond_ids = list(dict.fromkeys(uuid.UUID(bond_id) for bond_id in request.bond_ids))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid bond id")
+    
+    rows = _bonds_with_summary(db).filter(Bond.id.in_(bond_ids)).all()
+    found = {bond.id: (bond, summary) for bond, summary in rows}
+    missing = [str(bond_id) for bond_id in bond_ids if bond_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Bonds not found: {', '.join(missing)}")
+    rows = [found[bond_id] for bond_id in bond_ids]
+    
+    settlement = datetime.utcnow().date()
+    analytics = bond_analytics.get_many(
+        [(bond, summary.last_price if summary else None) for bond, summary in rows], settlement
+    )
+    unpriced = [str(bond.id) for bond, _ in rows if analytics[bond.id] is None]
+    if unpriced:
+        raise HTTPException(status_code=400, detail=f"Bonds without a yield (matured?): {', '.join(unpriced)}")
+    
+    bonds = [bond for bond, _ in rows]
+    flows = bond_math.bond_cash_flows(bonds, settlement)
+    maturities = bond_math.maturity_years(flows)
+    base_yields = np.array([analytics[bond.id].ytm for bond in bonds])
+    key_tenors = np.array(request.tenors or [0.0])
+    shifts = np.array(request.shocks, dtype=np.float64) / 10000.0 @ bond_math.tenor_weights(key_tenors, maturities).T
+    prices = bond_math.scenario_prices(flows, base_yields, shifts)
+    
+    if output == "npy":
+        buffer = io.BytesIO()
+        np.save(buffer, prices)
+        return Response(
+            content=buffer.getvalue(),
+            media_type="application/x-npy",
+            headers={"X-Bond-Ids": ",".join(str(bond.id) for bond in bonds)}
+        )
+    
+    return PriceScenariosResponse(
+        bond_ids=[str(bond.id) for bond in bonds],
+        maturities=maturities.tolist(),
+        base_yields=base_yields.tolist(),
+        base_prices=[analytics[bond.id].clean_price for bond in bonds],
+        prices=prices.tolist()
     )
 
 @router.post("/", response_model=BondResponse)
@@ -319,6 +487,8 @@ async def create_bond(bond_data: BondCreate, db: Session = Depends(get_db)):
         )
         
         db.add(new_bond)
+        db.flush()
+        market_summary.create_summary(db, new_bond.id)
         db.commit()
         db.refresh(new_bond)
         
@@ -1,21 +1,38 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Annotated, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timezone
+import asyncio
+import json
 import uuid
 import secrets
 
 from app.db.database import get_db
 from app.models.models import Order, Bond, User, Trade, Holding
-from app.services.matching_engine import MatchingEngine
-from app.core.websocket import manager
+from app.services import market_summary
+from app.services.auction import get_auction_interval
+from app.services.book_cache import book_cache, etag_matches, get_cached_orderbook
+from app.services.fixed_point import DECIMALS
+from app.services.matching_engine import RESTING_TIME_IN_FORCE
+from app.services.reservations import InsufficientHoldingsError
+from app.services.sequencer import EngineCall, matching_sequencer
+from app.services.stop_book import STOP_ORDER_TYPES
 from app.core.auth import get_current_active_user, require_kyc_verified
+from app.core.pagination import paginate, set_next_cursor
 
 router = APIRouter()
 
+# Resting orders read per sequencer call while streaming the full book
+FULL_BOOK_PAGE_SIZE = 500
+
+# A price or quantity at the scale of its Numeric(20, 2) column, which the
+# matching core works on as integer hundredths without rounding
+Amount = Annotated[Decimal, Field(gt=0, decimal_places=DECIMALS)]
+
 def generate_mock_tx_hash() -> str:
     """Generate a realistic-looking blockchain transaction hash"""
     return "0x" + secrets.token_hex(32)
@@ -44,7 +61,10 @@ def create_demo_holdings_for_new_user(db: Session, user: User):
                 )
                 db.add(holding)
             
+            db.flush()
+            market_summary.refresh_outstanding(db, [bond.id for bond in available_bonds])
             db.commit()
+            matching_sequencer.invalidate_holdings(user_id=user.id)
             print(f"Created demo holdings for new user {user.wallet_address}")
             return True
     
@@ -53,31 +73,90 @@ def create_demo_holdings_for_new_user(db: Session, user: User):
         db.rollback()
         return False
 
+def check_time_in_force(order_data):
+    """
+    Default and validate an order's time in force. Limit orders default to
+    GTC and need a price; market orders default to IOC, never rest and take
+    an optional price as their worst acceptable price. GTD orders need a
+    future expiry. Stop and stop-limit orders need a stop price and become
+    a market or limit order once triggered.
+    """
+    market = order_data.order_type in ("market", "stop")
+    if (order_data.order_type in STOP_ORDER_TYPES) != (order_data.stop_price is not None):
+        raise ValueError("stop_price is required for stop orders and only valid for them")
+    if order_data.time_in_force is None:
+        order_data.time_in_force = "IOC" if market else "GTC"
+    if not market and order_data.price is None:
+        raise ValueError("Limit and stop-limit orders require a price")
+    if market and order_data.time_in_force not in ("IOC", "FOK"):
+        raise ValueError("Market and stop orders must be IOC or FOK")
+    if order_data.time_in_force == "GTD":
+        if order_data.expires_at is None:
+            raise ValueError("GTD orders require expires_at")
+        if order_data.expires_at.tzinfo is None:
+            order_data.expires_at = order_data.expires_at.replace(tzinfo=timezone.utc)
+        if order_data.expires_at <= datetime.now(timezone.utc):
+            raise ValueError("expires_at must be in the future")
+    elif order_data.expires_at is not None:
+        raise ValueError("expires_at is only valid for GTD orders")
+    return order_data
+
+def auction_order_error(bond: Bond, time_in_force: str) -> Optional[str]:
+    """
+    Call-auction bonds only match at their periodic uncross, so orders that
+    cannot rest until then (market, stop, IOC and FOK) are refused rather
+    than cancelled unfilled
+    """
+    if get_auction_interval(bond) and time_in_force not in RESTING_TIME_IN_FORCE:
+        return "Call-auction bonds only accept GTC or GTD limit and stop-limit orders"
+    return None
+
 # Pydantic models for request/response
 class OrderCreate(BaseModel):
     bond_id: str
     side: str = Field(..., pattern="^(buy|sell)$")
-    order_type: str = Field(default="limit", pattern="^(limit|market)$")
-    price: Decimal = Field(..., gt=0)
-    quantity: Decimal = Field(..., gt=0)
+    order_type: str = Field(default="limit", pattern="^(limit|market|stop|stop_limit)$")
+    time_in_force: Optional[str] = Field(default=None, pattern="^(GTC|GTD|IOC|FOK)$")
+    price: Optional[Amount] = None
+    stop_price: Optional[Amount] = None
+    quantity: Amount
+    expires_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_time_in_force(self):
+        return check_time_in_force(self)
 
 class PublicOrderCreate(BaseModel):
     bond_id: str
     side: str = Field(..., pattern="^(buy|sell)$")
-    order_type: str = Field(default="limit", pattern="^(limit|market)$")
-    price: Decimal = Field(..., gt=0)
-    quantity: Decimal = Field(..., gt=0)
+    order_type: str = Field(default="limit", pattern="^(limit|market|stop|stop_limit)$")
+    time_in_force: Optional[str] = Field(default=None, pattern="^(GTC|GTD|IOC|FOK)$")
+    price: Optional[Amount] = None
+    stop_price: Optional[Amount] = None
+    quantity: Amount
+    expires_at: Optional[datetime] = None
     user_wallet_address: str = Field(..., min_length=1)
 
+    @model_validator(mode="after")
+    def check_time_in_force(self):
+        return check_time_in_force(self)
+
+class OrderAmend(BaseModel):
+    price: Optional[Amount] = None
+    quantity: Optional[Amount] = None
+
 class OrderResponse(BaseModel):
     id: str
     bond_id: str
     side: str
     order_type: str
-    price: Decimal
+    time_in_force: str
+    price: Optional[Decimal]
+    stop_price: Optional[Decimal] = None
     quantity: Decimal
     filled_quantity: Decimal
     status: str
+    expires_at: Optional[datetime] = None
     tx_hash: Optional[str]
     created_at: datetime
     updated_at: Optional[datetime]
@@ -92,6 +171,34 @@ class TradeResponse(BaseModel):
     buyer_order_id: str
     seller_order_id: str
 
+class BatchOrderCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=1000)
+
+class BatchOrderResult(BaseModel):
+    index: int
+    success: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+    trades_count: int = 0
+
+def _order_response(order: Order) -> OrderResponse:
+    return OrderResponse(
+        id=str(order.id),
+        bond_id=str(order.bond_id),
+        side=order.side,
+        order_type=order.type,
+        time_in_force=order.time_in_force,
+        price=order.price,
+        stop_price=order.stop_price,
+        quantity=order.quantity,
+        filled_quantity=order.filled_quantity,
+        status=order.status,
+        expires_at=order.expires_at,
+        tx_hash=order.tx_hash,
+        created_at=order.created_at,
+        updated_at=order.updated_at
+    )
+
 @router.post("/", response_model=OrderResponse)
 async def create_order(
     order_data: OrderCreate, 
@@ -104,21 +211,9 @@ async def create_order(
         bond = db.query(Bond).filter(Bond.id == order_data.bond_id).first()
         if not bond:
             raise HTTPException(status_code=404, detail="Bond not found")
-
-        # For sell orders, verify user has sufficient holdings
-        if order_data.side == "sell":
-            holding = db.query(Holding).filter(
-                and_(
-                    Holding.user_id == current_user.id,
-                    Holding.bond_id == bond.id
-                )
-            ).first()
-            
-            if not holding or holding.quantity < order_data.quantity:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Insufficient holdings for sell order"
-                )
+        auction_error = auction_order_error(bond, order_data.time_in_force)
+        if auction_error:
+            raise HTTPException(status_code=400, detail=auction_error)
 
         # Create order with transaction hash
         tx_hash = generate_mock_tx_hash()
@@ -128,41 +223,119 @@ async def create_order(
             bond_id=bond.id,
             side=order_data.side,
             type=order_data.order_type,
+            time_in_force=order_data.time_in_force,
             price=order_data.price,
+            stop_price=order_data.stop_price,
             quantity=order_data.quantity,
-            status="open",
+            expires_at=order_data.expires_at,
+            status="pending" if order_data.order_type in STOP_ORDER_TYPES else "open",
             tx_hash=tx_hash
         )
         
-        db.add(new_order)
-        db.commit()
-        db.refresh(new_order)
-
-        # Process order through matching engine
-        matching_engine = MatchingEngine(db, manager)
-        trades = matching_engine.process_order(new_order)
-        
-        # Refresh order to get updated status
-        db.refresh(new_order)
-
-        return OrderResponse(
-            id=str(new_order.id),
-            bond_id=str(new_order.bond_id),
-            side=new_order.side,
-            order_type=new_order.type,
-            price=new_order.price,
-            quantity=new_order.quantity,
-            filled_quantity=new_order.filled_quantity,
-            status=new_order.status,
-            tx_hash=new_order.tx_hash,
-            created_at=new_order.created_at,
-            updated_at=new_order.updated_at
+        # Insert and match the order in one transaction on the bond's sequencer,
+        # which also checks and reserves holdings for sell orders
+        trades = await matching_sequencer.submit(
+            bond.id, EngineCall("process_order", new_order)
         )
+        
+        # Load the persisted order with its final status
+        new_order = db.get(Order, new_order.id)
 
+        return _order_response(new_order)
+
+    except InsufficientHoldingsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating order: {str(e)}")
 
+@router.post("/batch", response_model=List[BatchOrderResult])
+async def create_orders_batch(
+    batch: BatchOrderCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_kyc_verified)
+):
+    """
+    Create many trading orders in one request
+    
+    Bonds are looked up once for the whole batch. Each bond's orders are
+    checked against the holdings ledger and matched in submission order
+    within a single transaction on that bond's sequencer; bonds are
+    processed concurrently.
+    """
+    results: List[Optional[BatchOrderResult]] = [None] * len(batch.orders)
+    
+    # One lookup for every bond referenced by the batch
+    bond_ids = set()
+    for index, order_data in enumerate(batch.orders):
+        try:
+            bond_ids.add(uuid.UUID(order_data.bond_id))
+        except ValueError:
+            results[index] = BatchOrderResult(index=index, success=False, error="Invalid bond id")
+    bonds = {bond.id: bond for bond in db.query(Bond).filter(Bond.id.in_(list(bond_ids))).all()}
+    
+    orders_by_bond: Dict[uuid.UUID, List[Tuple[int, Order]]] = {}
+    for index, order_data in enumerate(batch.orders):
+        if results[index] is not None:
+            continue
+        bond = bonds.get(uuid.UUID(order_data.bond_id))
+        if not bond:
+            results[index] = BatchOrderResult(index=index, success=False, error="Bond not found")
+            continue
+        auction_error = auction_order_error(bond, order_data.time_in_force)
+        if auction_error:
+            results[index] = BatchOrderResult(index=index, success=False, error=auction_error)
+            continue
+        
+        orders_by_bond.setdefault(bond.id, []).append((index, Order(
+            id=uuid.uuid4(),
+            user_id=current_user.id,
+            bond_id=bond.id,
+            side=order_data.side,
+            type=order_data.order_type,
+            time_in_force=order_data.time_in_force,
+            price=order_data.price,
+            stop_price=order_data.stop_price,
+            quantity=order_data.quantity,
+            expires_at=order_data.expires_at,
+            status="pending" if order_data.order_type in STOP_ORDER_TYPES else "open",
+            tx_hash=generate_mock_tx_hash()
+        )))
+    
+    async def submit_bond_orders(bond_id: uuid.UUID, entries: List[Tuple[int, Order]]):
+        orders = [order for _, order in entries]
+        try:
+            trades_per_order = await matching_sequencer.submit(
+                bond_id, EngineCall("process_orders", orders)
+            )
+        except Exception as e:
+            for index, _ in entries:
+                results[index] = BatchOrderResult(index=index, success=False, error=f"Error creating order: {str(e)}")
+            return
+        for (index, _), trades in zip(entries, trades_per_order):
+            results[index] = BatchOrderResult(index=index, success=True, trades_count=len(trades))
+    
+    await asyncio.gather(*[
+        submit_bond_orders(bond_id, entries) for bond_id, entries in orders_by_bond.items()
+    ])
+    
+    # Load every persisted order with its final status in one query. Sells
+    # rejected by the holdings check were never persisted.
+    created_ids = [order.id for entries in orders_by_bond.values() for _, order in entries]
+    created = {order.id: order for order in db.query(Order).filter(Order.id.in_(created_ids)).all()}
+    
+    for entries in orders_by_bond.values():
+        for index, order in entries:
+            new_order = created.get(order.id)
+            if results[index].success and not new_order:
+                results[index] = BatchOrderResult(index=index, success=False, error="Insufficient holdings for sell order")
+            elif results[index].success:
+                results[index].order = _order_response(new_order)
+    
+    return results
+
 @router.post("/public/create", response_model=OrderResponse)
 async def create_public_order(
     order_data: PublicOrderCreate,
@@ -174,6 +347,9 @@ async def create_public_order(
         bond = db.query(Bond).filter(Bond.id == order_data.bond_id).first()
         if not bond:
             raise HTTPException(status_code=404, detail="Bond not found")
+        auction_error = auction_order_error(bond, order_data.time_in_force)
+        if auction_error:
+            raise HTTPException(status_code=400, detail=auction_error)
 
         # Get or create user by wallet address
         user = db.query(User).filter(User.wallet_address == order_data.user_wallet_address).first()
@@ -192,21 +368,6 @@ async def create_public_order(
             # Give new user demo holdings so they can start trading
             create_demo_holdings_for_new_user(db, user)
 
-        # For sell orders, verify user has sufficient holdings
-        if order_data.side == "sell":
-            holding = db.query(Holding).filter(
-                and_(
-                    Holding.user_id == user.id,
-                    Holding.bond_id == bond.id
-                )
-            ).first()
-            
-            if not holding or holding.quantity < order_data.quantity:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Insufficient holdings for sell order"
-                )
-
         # Create order with transaction hash
         tx_hash = generate_mock_tx_hash()
         new_order = Order(
@@ -215,51 +376,46 @@ async def create_public_order(
             bond_id=bond.id,
             side=order_data.side,
             type=order_data.order_type,
+            time_in_force=order_data.time_in_force,
             price=order_data.price,
+            stop_price=order_data.stop_price,
             quantity=order_data.quantity,
-            status="open",
+            expires_at=order_data.expires_at,
+            status="pending" if order_data.order_type in STOP_ORDER_TYPES else "open",
             tx_hash=tx_hash
         )
         
-        db.add(new_order)
-        db.commit()
-        db.refresh(new_order)
-
-        # Process order through matching engine
-        matching_engine = MatchingEngine(db, manager)
-        trades = matching_engine.process_order(new_order)
-        
-        # Refresh order to get updated status
-        db.refresh(new_order)
-
-        return OrderResponse(
-            id=str(new_order.id),
-            bond_id=str(new_order.bond_id),
-            side=new_order.side,
-            order_type=new_order.type,
-            price=new_order.price,
-            quantity=new_order.quantity,
-            filled_quantity=new_order.filled_quantity,
-            status=new_order.status,
-            tx_hash=new_order.tx_hash,
-            created_at=new_order.created_at,
-            updated_at=new_order.updated_at
+        # Insert and match the order in one transaction on the bond's sequencer,
+        # which also checks and reserves holdings for sell orders
+        trades = await matching_sequencer.submit(
+            bond.id, EngineCall("process_order", new_order)
         )
+        
+        # Load the persisted order with its final status
+        new_order = db.get(Order, new_order.id)
 
+        return _order_response(new_order)
+
+    except InsufficientHoldingsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating order: {str(e)}")
 
 @router.get("/", response_model=List[OrderResponse])
 async def get_orders(
+    response: Response,
     bond_id: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     side: Optional[str] = Query(None),
     limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get current user's orders with optional filtering"""
+    """Get current user's orders with optional filtering, newest first, a page at a time"""
     query = db.query(Order).filter(Order.user_id == current_user.id)
     
     if bond_id:
@@ -269,24 +425,10 @@ async def get_orders(
     if side:
         query = query.filter(Order.side == side)
     
-    orders = query.order_by(desc(Order.created_at)).limit(limit).all()
+    orders = paginate(query, Order.created_at, Order.id, cursor, limit).all()
+    set_next_cursor(response, orders, "created_at", limit)
     
-    return [
-        OrderResponse(
-            id=str(order.id),
-            bond_id=str(order.bond_id),
-            side=order.side,
-            order_type=order.type,
-            price=order.price,
-            quantity=order.quantity,
-            filled_quantity=order.filled_quantity,
-            status=order.status,
-            tx_hash=order.tx_hash,
-            created_at=order.created_at,
-            updated_at=order.updated_at
-        )
-        for order in orders
-    ]
+    return [_order_response(order) for order in orders]
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
@@ -302,18 +444,87 @@ async def get_order(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    return OrderResponse(
-        id=str(order.id),
-        bond_id=str(order.bond_id),
-        side=order.side,
-        order_type=order.type,
-        price=order.price,
-        quantity=order.quantity,
-        filled_quantity=order.filled_quantity,
-        status=order.status,
-        created_at=order.created_at,
-        updated_at=order.updated_at
+    return _order_response(order)
+
+@router.delete("/")
+async def cancel_orders(
+    bond_id: Optional[str] = Query(None),
+    side: Optional[str] = Query(None, pattern="^(buy|sell)$"),
+    min_price: Optional[Decimal] = Query(None, gt=0),
+    max_price: Optional[Decimal] = Query(None, gt=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Cancel all of the current user's open and pending orders, optionally by bond, side and price range"""
+    query = db.query(Order.bond_id).filter(
+        and_(
+            Order.user_id == current_user.id,
+            Order.status.in_(["open", "partial", "pending"])
+        )
     )
+    if bond_id:
+        query = query.filter(Order.bond_id == bond_id)
+    if side:
+        query = query.filter(Order.side == side)
+    if min_price is not None:
+        query = query.filter(Order.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Order.price <= max_price)
+    
+    bond_ids = [row.bond_id for row in query.distinct().all()]
+    user_id = current_user.id
+    
+    # One set-based cancel per affected bond, run on each bond's sequencer
+    cancelled = await asyncio.gather(*[
+        matching_sequencer.submit(
+            affected_bond_id,
+            EngineCall("cancel_orders", user_id, affected_bond_id, side, min_price, max_price)
+        )
+        for affected_bond_id in bond_ids
+    ])
+    
+    order_ids = [str(order_id) for ids in cancelled for order_id in ids]
+    return {
+        "message": f"Cancelled {len(order_ids)} orders",
+        "cancelled_count": len(order_ids),
+        "order_ids": order_ids
+    }
+
+@router.patch("/{order_id}", response_model=OrderResponse)
+async def amend_order(
+    order_id: str,
+    amendment: OrderAmend,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Amend the price and/or quantity of an open order (a quantity decrease keeps queue priority)"""
+    if amendment.price is None and amendment.quantity is None:
+        raise HTTPException(status_code=400, detail="Nothing to amend")
+    
+    order = db.query(Order).filter(
+        and_(Order.id == order_id, Order.user_id == current_user.id)
+    ).first()
+    
+    amended = None
+    if order:
+        order_uuid, user_id = order.id, current_user.id
+        try:
+            amended = await matching_sequencer.submit(
+                order.bond_id,
+                EngineCall("amend_order", order_uuid, user_id, amendment.price, amendment.quantity)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if not amended:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot amend order (not found or not amendable)"
+        )
+    
+    db.refresh(order)
+    
+    return _order_response(order)
 
 @router.delete("/{order_id}")
 async def cancel_order(
@@ -322,8 +533,16 @@ async def cancel_order(
     current_user: User = Depends(get_current_active_user)
 ):
     """Cancel an open order"""
-    matching_engine = MatchingEngine(db, manager)
-    success = matching_engine.cancel_order(uuid.UUID(order_id), current_user.id)
+    order = db.query(Order).filter(
+        and_(Order.id == order_id, Order.user_id == current_user.id)
+    ).first()
+    
+    success = False
+    if order:
+        order_uuid, user_id = order.id, current_user.id
+        success = await matching_sequencer.submit(
+            order.bond_id, EngineCall("cancel_order", order_uuid, user_id)
+        )
     
     if not success:
         raise HTTPException(
@@ -335,12 +554,14 @@ async def cancel_order(
 
 @router.get("/trades/", response_model=List[TradeResponse])
 async def get_trades(
+    response: Response,
     bond_id: Optional[str] = Query(None),
     limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get current user's trade history"""
+    """Get current user's trade history, newest first, a page at a time"""
     # Get user's order IDs
     user_order_ids = db.query(Order.id).filter(Order.user_id == current_user.id).subquery()
     
@@ -355,7 +576,8 @@ async def get_trades(
     if bond_id:
         query = query.filter(Trade.bond_id == bond_id)
     
-    trades = query.order_by(desc(Trade.executed_at)).limit(limit).all()
+    trades = paginate(query, Trade.executed_at, Trade.id, cursor, limit).all()
+    set_next_cursor(response, trades, "executed_at", limit)
     
     return [
         TradeResponse(
@@ -371,22 +593,115 @@ async def get_trades(
     ]
 
 @router.get("/{bond_id}/orderbook")
-async def get_orderbook(bond_id: str, db: Session = Depends(get_db)):
-    """Get orderbook for a specific bond"""
-    matching_engine = MatchingEngine(db, manager)
-    orderbook = matching_engine.get_orderbook(uuid.UUID(bond_id))
-    return orderbook
+async def get_orderbook(
+    bond_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Get the aggregated top price levels of a bond's orderbook (304 if the ETag is unchanged)"""
+    try:
+        bond_uuid = uuid.UUID(bond_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid bond id")
+    
+    cached = await get_cached_orderbook(db, bond_uuid)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Bond not found")
+    
+    etag = book_cache.etag(cached)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    
+    def render(levels):
+        return [
+            {
+                "price": float(level.price),
+                "quantity": float(level.quantity),
+                "total": float(level.price * level.quantity),
+                "orders_count": level.orders_count
+            }
+            for level in levels
+        ]
+    
+    return {
+        "bids": render(cached.bids),
+        "asks": render(cached.asks),
+        "bond_id": bond_id
+    }
+
+@router.get("/{bond_id}/orderbook/full")
+async def stream_full_orderbook(
+    bond_id: str,
+    side: Optional[str] = Query(None, pattern="^(buy|sell)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream every resting order of a bond as NDJSON, bids then asks, best price first
+    
+    Each price level is a "level" line followed by one "order" line per
+    resting order, in queue order. The resident book is read a page of whole
+    levels at a time on the bond's sequencer, so the full book is never held
+    in one response. Level lines carry the book feed sequence number they
+    were read at, to line them up with book_delta messages.
+    """
+    try:
+        bond_uuid = uuid.UUID(bond_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid bond id")
+    if not db.get(Bond, bond_uuid):
+        raise HTTPException(status_code=404, detail="Bond not found")
+    
+    sides = [side] if side else ["buy", "sell"]
+    
+    async def lines():
+        for book_side in sides:
+            after = None
+            while True:
+                page = await matching_sequencer.submit(
+                    bond_uuid, EngineCall("book_page", bond_uuid, book_side, after, FULL_BOOK_PAGE_SIZE)
+                )
+                chunk = []
+                for level in page.levels:
+                    chunk.append(json.dumps({
+                        "type": "level",
+                        "side": book_side,
+                        "price": float(level.price),
+                        "quantity": float(level.quantity),
+                        "orders_count": len(level.orders),
+                        "seq": page.seq
+                    }))
+                    for position, (order_id, remaining, created_at) in enumerate(level.orders, start=1):
+                        chunk.append(json.dumps({
+                            "type": "order",
+                            "side": book_side,
+                            "price": float(level.price),
+                            "queue_position": position,
+                            "order_id": str(order_id),
+                            "remaining": float(remaining),
+                            "created_at": created_at.isoformat() if created_at else None
+                        }))
+                if chunk:
+                    yield "\n".join(chunk) + "\n"
+                if page.next_price is None:
+                    break
+                after = page.next_price
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 @router.get("/public/by-wallet", response_model=List[OrderResponse])
 async def get_orders_by_wallet(
+    response: Response,
     wallet_address: str = Query(..., description="Wallet address to filter orders"),
     bond_id: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     side: Optional[str] = Query(None),
     limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
-    """Get orders by wallet address (public endpoint, no authentication required)"""
+    """Get orders by wallet address, newest first, a page at a time (public endpoint, no authentication required)"""
     # First find the user by wallet address
     user = db.query(User).filter(User.wallet_address == wallet_address).first()
     if not user:
@@ -403,21 +718,7 @@ async def get_orders_by_wallet(
     if side:
         query = query.filter(Order.side == side)
     
-    orders = query.order_by(desc(Order.created_at)).limit(limit).all()
+    orders = paginate(query, Order.created_at, Order.id, cursor, limit).all()
+    set_next_cursor(response, orders, "created_at", limit)
     
-    return [
-        OrderResponse(
-            id=str(order.id),
-            bond_id=str(order.bond_id),
-            side=order.side,
-            order_type=order.type,
-            price=order.price,
-            quantity=order.quantity,
-            filled_quantity=order.filled_quantity,
-            status=order.status,
-            tx_hash=order.tx_hash,
-            created_at=order.created_at,
-            updated_at=order.updated_at
-        )
-        for order in orders
-    ]
+    return [_order_response(order) for order in orders]
@@ -1,14 +1,17 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from decimal import Decimal
 from datetime import datetime
 import uuid
 
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
 from app.db.database import get_db
+from app.services import market_summary
 from app.services.portfolio import PortfolioService
 from app.models.models import User, Bond, Holding
+from app.services.sequencer import matching_sequencer
 
 router = APIRouter()
 
@@ -43,7 +46,10 @@ def create_demo_holdings_for_new_user(db: Session, user: User):
                 holdings_created += 1
                 print(f"  ➕ Created holding: {bond.name} - {demo_quantity} units")
             
+            db.flush()
+            market_summary.refresh_outstanding(db, [bond.id for bond in available_bonds])
             db.commit()
+            matching_sequencer.invalidate_holdings(user_id=user.id)
             print(f"✅ Successfully created {holdings_created} demo holdings for user {user.wallet_address}")
             return True
         else:
@@ -176,12 +182,19 @@ async def get_portfolio(wallet_address: str, db: Session = Depends(get_db)):
 @router.get("/{wallet_address}/trades", response_model=List[TradeHistoryItem])
 async def get_trade_history(
     wallet_address: str, 
+    response: Response,
     limit: int = Query(100, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     db: Session = Depends(get_db)
 ):
-    """Get user's trade history"""
+    """Get user's trade history, newest first, a page at a time"""
     portfolio_service = PortfolioService(db)
-    trades = portfolio_service.get_user_trade_history(wallet_address, limit)
+    trades = portfolio_service.get_user_trade_history(wallet_address, limit, cursor)
+    if len(trades) == limit:
+        last = trades[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            datetime.fromisoformat(last["executed_at"]), uuid.UUID(last["trade_id"])
+        )
     
     return [TradeHistoryItem(**trade) for trade in trades]
 
@@ -220,8 +233,11 @@ async def create_demo_holdings(wallet_address: str, db: Session = Depends(get_db
             db.refresh(user)
         
         # Clear existing holdings first
+        cleared_bond_ids = [row.bond_id for row in db.query(Holding.bond_id).filter(Holding.user_id == user.id).all()]
         db.query(Holding).filter(Holding.user_id == user.id).delete()
+        market_summary.refresh_outstanding(db, cleared_bond_ids)
         db.commit()
+        matching_sequencer.invalidate_holdings(user_id=user.id)
         
         # Create new demo holdings
         success = create_demo_holdings_for_new_user(db, user)
@@ -1,15 +1,37 @@
 import json
+import uuid
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Query
 from app.core.websocket import manager
 from app.core.auth import verify_token
 from app.db.database import get_db
 from app.models.models import User
+from app.services.sequencer import EngineCall, matching_sequencer
 from sqlalchemy.orm import Session
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+BOND_ROOM_PREFIX = "bond_"
+
+async def send_book_snapshot(connection_id: str, bond_id: str):
+    """
+    Send a bond's full-depth L2 book to one connection. It is taken on the
+    bond's sequencer, so every book_delta after its sequence number applies
+    on top of it.
+    """
+    try:
+        bond_uuid = uuid.UUID(str(bond_id))
+    except ValueError:
+        await manager.send_personal_message({
+            "type": "error",
+            "message": "Invalid bond id"
+        }, connection_id)
+        return
+    
+    snapshot = await matching_sequencer.submit(bond_uuid, EngineCall("book_snapshot", bond_uuid))
+    await manager.send_personal_message(snapshot, connection_id)
+
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
@@ -44,7 +66,19 @@ async def websocket_endpoint(
             
             try:
                 message_data = json.loads(data)
+                message_type = message_data.get("type")
+                
+                # Resync request after a gap in book_delta sequence numbers
+                if message_type == "book_snapshot":
+                    await send_book_snapshot(connection_id, message_data.get("bond_id"))
+                    continue
+                
                 await manager.handle_message(connection_id, message_data)
+                
+                # New subscribers to a bond room start from a snapshot
+                room = message_data.get("room")
+                if message_type == "join_room" and isinstance(room, str) and room.startswith(BOND_ROOM_PREFIX):
+                    await send_book_snapshot(connection_id, room[len(BOND_ROOM_PREFIX):])
             except json.JSONDecodeError:
                 await manager.send_personal_message({
                     "type": "error",
@@ -20,6 +20,23 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Matching
+    MATCHING_QUEUE_SIZE: int = 1000  # Pending actions per bond before submitters wait
+    MATCHING_BATCH_SIZE: int = 50  # Actions drained per sequencer batch
+    MATCHING_WORKERS: int = 0  # Worker processes to shard bonds across (0 to match in the API process)
+    # Order book journal and snapshots (empty to disable and recover books from the database)
+    ORDER_JOURNAL_DIR: str = ""
+    ORDER_SNAPSHOT_INTERVAL: int = 1000  # Journal events per bond between snapshots
+    ORDER_JOURNAL_FSYNC: bool = False
+    # Default uncross interval for bonds in call-auction mode
+    AUCTION_INTERVAL_SECONDS: int = 300
+    # WebSocket book messages per bond between full snapshots (deltas in between)
+    BOOK_SNAPSHOT_INTERVAL: int = 100
+    # How often bond market summaries are checked for trades leaving the 24h window
+    MARKET_SUMMARY_ROLL_SECONDS: int = 60
+    # Quiet period after a price change before the yield curve is refitted
+    YIELD_CURVE_DEBOUNCE_SECONDS: float = 2.0
+    
     # Security
     SECRET_KEY: str = "cygvhjfghjmjrtdtfghbjjiujhgbvcftuhygftrd"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
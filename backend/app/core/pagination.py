@@ -0,0 +1,49 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import desc, literal, tuple_
+from sqlalchemy.orm import Query
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(moment: datetime, row_id: uuid.UUID) -> str:
+    """Opaque cursor pointing just past a row, from its sort time and id"""
+    raw = json.dumps([moment.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        moment, row_id = json.loads(raw)
+        return datetime.fromisoformat(moment), uuid.UUID(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(query: Query, time_column, id_column, cursor: Optional[str], limit: int) -> Query:
+    """
+    Order a query newest first by (time, id) and start it after a cursor.
+
+    Seeking past the cursor's row instead of skipping an offset lets a
+    composite index on the same columns serve every page at the cost of
+    the first one.
+    """
+    if cursor:
+        moment, row_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(time_column, id_column) < tuple_(literal(moment, time_column.type), literal(row_id, id_column.type))
+        )
+    return query.order_by(desc(time_column), desc(id_column)).limit(limit)
+
+
+def set_next_cursor(response: Response, rows: List, time_attr: str, limit: int):
+    """Point the response at the next page when this one came back full"""
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, time_attr), last.id)
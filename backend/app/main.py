@@ -53,10 +53,76 @@ async def lifespan(app: FastAPI):
                         connection.execute(text("ALTER TABLE trades ADD COLUMN tx_hash VARCHAR"))
                         print("✅ Added tx_hash column to trades table")
                     
+                    # Check holdings reservation column
+                    print(f"Attempt {attempt + 1}: Checking holdings table schema...")
+                    result = connection.execute(text("""
+                        SELECT column_name FROM information_schema.columns 
+                        WHERE table_name = 'holdings' AND column_name = 'locked_quantity'
+                    """))
+                    
+                    if result.fetchone():
+                        print("✅ locked_quantity column exists in holdings table")
+                    else:
+                        print("❌ locked_quantity column missing in holdings table. Adding...")
+                        connection.execute(text("ALTER TABLE holdings ADD COLUMN locked_quantity NUMERIC(20, 2) NOT NULL DEFAULT 0"))
+                        # Reserve the unfilled quantity of sells already resting in the book
+                        connection.execute(text("""
+                            UPDATE holdings SET locked_quantity = (
+                                SELECT COALESCE(SUM(orders.quantity - orders.filled_quantity), 0) FROM orders
+                                WHERE orders.user_id = holdings.user_id AND orders.bond_id = holdings.bond_id
+                                AND orders.side = 'sell' AND orders.status IN ('open', 'partial')
+                            )
+                        """))
+                        connection.commit()
+                        print("✅ Added locked_quantity column to holdings table")
+                    
+                    # Check time in force columns
+                    print(f"Attempt {attempt + 1}: Checking orders time in force schema...")
+                    result = connection.execute(text("""
+                        SELECT column_name FROM information_schema.columns 
+                        WHERE table_name = 'orders' AND column_name = 'time_in_force'
+                    """))
+                    
+                    if result.fetchone():
+                        print("✅ time_in_force column exists in orders table")
+                    else:
+                        print("❌ time_in_force column missing in orders table. Adding...")
+                        connection.execute(text("ALTER TABLE orders ADD COLUMN time_in_force VARCHAR DEFAULT 'GTC'"))
+                        connection.execute(text("ALTER TABLE orders ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP WITH TIME ZONE"))
+                        # Market orders without a limit have no price
+                        connection.execute(text("ALTER TABLE orders ALTER COLUMN price DROP NOT NULL"))
+                        connection.commit()
+                        print("✅ Added time_in_force and expires_at columns to orders table")
+                    
+                    # Check stop order column
+                    print(f"Attempt {attempt + 1}: Checking orders stop price schema...")
+                    result = connection.execute(text("""
+                        SELECT column_name FROM information_schema.columns 
+                        WHERE table_name = 'orders' AND column_name = 'stop_price'
+                    """))
+                    
+                    if result.fetchone():
+                        print("✅ stop_price column exists in orders table")
+                    else:
+                        print("❌ stop_price column missing in orders table. Adding...")
+                        connection.execute(text("ALTER TABLE orders ADD COLUMN stop_price NUMERIC(20, 2)"))
+                        connection.commit()
+                        print("✅ Added stop_price column to orders table")
+                    
+                    # Indexes behind keyset pagination
+                    print(f"Attempt {attempt + 1}: Checking pagination indexes...")
+                    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_user_created ON orders (user_id, created_at, id)"))
+                    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trades_executed ON trades (executed_at, id)"))
+                    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_trades_bond_executed ON trades (bond_id, executed_at, id)"))
+                    connection.commit()
+                    print("✅ Pagination indexes exist")
+                    
                     # Test that we can actually query the new columns
                     print("🧪 Testing new schema...")
                     connection.execute(text("SELECT tx_hash FROM orders LIMIT 1"))
                     connection.execute(text("SELECT tx_hash FROM trades LIMIT 1"))
+                    connection.execute(text("SELECT locked_quantity FROM holdings LIMIT 1"))
+                    connection.execute(text("SELECT time_in_force, expires_at, stop_price FROM orders LIMIT 1"))
                     print("✅ Schema validation successful!")
                     break
                     
@@ -73,10 +139,74 @@ async def lifespan(app: FastAPI):
         print(f"⚠️ Database schema update failed: {e}")
         print("The application will continue but some features may not work correctly")
     
+    # Build market summaries for bonds that predate them
+    try:
+        from app.db.database import SessionLocal, engine
+        from app.models.models import BondMarketSummary, Candle
+        from app.services import market_summary
+        
+        BondMarketSummary.__table__.create(bind=engine, checkfirst=True)
+        Candle.__table__.create(bind=engine, checkfirst=True)
+        with SessionLocal() as db:
+            created = market_summary.ensure_summaries(db)
+            db.commit()
+        print(f"✅ Market summaries ready ({created} built)")
+    except Exception as e:
+        print(f"⚠️ Market summary backfill failed: {e}")
+    
+    # Load the last week of trades into the rolling trade statistics
+    try:
+        from app.db.database import SessionLocal
+        from app.services.trade_stats import trade_stats
+        
+        with SessionLocal() as db:
+            trade_stats.warm_start(db)
+        print("✅ Rolling trade statistics loaded")
+    except Exception as e:
+        print(f"⚠️ Loading rolling trade statistics failed: {e}")
+    
+    if settings.MATCHING_WORKERS > 0:
+        from app.services.sequencer import matching_sequencer
+        from app.services.sharding import ShardRouter
+        print(f"🔀 Sharding matching across {settings.MATCHING_WORKERS} worker processes...")
+        router = ShardRouter(settings.MATCHING_WORKERS)
+        router.start()
+        matching_sequencer.router = router
+    
+    # Load the books of call-auction bonds so their auction clocks run
+    # before the first new order arrives
+    try:
+        from app.db.database import SessionLocal
+        from app.models.models import Bond
+        from app.services.auction import get_auction_interval
+        from app.services.sequencer import EngineCall, matching_sequencer
+        
+        with SessionLocal() as db:
+            auction_bonds = [bond.id for bond in db.query(Bond).filter(Bond.status == "active").all()
+                             if get_auction_interval(bond)]
+        for bond_id in auction_bonds:
+            await matching_sequencer.submit(bond_id, EngineCall("load_book", bond_id))
+        print(f"✅ Auction clocks started ({len(auction_bonds)} call-auction bonds)")
+    except Exception as e:
+        print(f"⚠️ Starting auction clocks failed: {e}")
+    
+    from app.services.market_summary import market_summary_roller
+    market_summary_roller.start()
+    
     yield
     
     # Shutdown
     print("Shutting down FractionFi API...")
+    from app.services.auction import auction_scheduler
+    from app.services.expiry import order_expiry
+    from app.services.market_summary import market_summary_roller
+    from app.services.sequencer import matching_sequencer
+    from app.services.yield_curve import yield_curve
+    await auction_scheduler.shutdown()
+    await order_expiry.shutdown()
+    await market_summary_roller.shutdown()
+    await yield_curve.shutdown()
+    await matching_sequencer.shutdown()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Float, DateTime, Text, Boolean, ForeignKey, BigInteger, Numeric
+from sqlalchemy import Column, String, Float, DateTime, Text, Boolean, ForeignKey, BigInteger, Integer, Numeric, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import DeclarativeBase, relationship
 from sqlalchemy.sql import func
@@ -61,6 +61,41 @@ class Bond(Base):
     trades = relationship("Trade", back_populates="bond")
     holdings = relationship("Holding", back_populates="bond")
     transactions = relationship("Transaction", back_populates="bond")
+    market_summary = relationship("BondMarketSummary", back_populates="bond", uselist=False)
+
+class BondMarketSummary(Base):
+    """Market data projection per bond, kept up to date by the matching engine as trades are written"""
+    __tablename__ = "bond_market_summary"
+
+    bond_id = Column(UUID(as_uuid=True), ForeignKey("bonds.id"), primary_key=True)
+    last_price = Column(Numeric(precision=20, scale=2), nullable=True)
+    last_trade_at = Column(DateTime(timezone=True), nullable=True)
+    reference_price = Column(Numeric(precision=20, scale=2), nullable=True)  # Last price before the 24h window
+    volume_24h = Column(Numeric(precision=30, scale=4), nullable=False, default=0)  # Sum of price * quantity
+    high_24h = Column(Numeric(precision=20, scale=2), nullable=True)
+    low_24h = Column(Numeric(precision=20, scale=2), nullable=True)
+    trades_count_24h = Column(Integer, nullable=False, default=0)
+    outstanding_quantity = Column(Numeric(precision=20, scale=2), nullable=False, default=0)  # Sum of holdings
+    rolls_at = Column(DateTime(timezone=True), nullable=True, index=True)  # When the oldest trade leaves the window
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    bond = relationship("Bond", back_populates="market_summary")
+
+class Candle(Base):
+    """OHLCV bar of a bond's trades, keyed by resolution in seconds and bucket start"""
+    __tablename__ = "candles"
+
+    bond_id = Column(UUID(as_uuid=True), ForeignKey("bonds.id"), primary_key=True)
+    resolution = Column(Integer, primary_key=True)  # 60, 300, 3600 or 86400
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Numeric(precision=20, scale=2), nullable=False)
+    high = Column(Numeric(precision=20, scale=2), nullable=False)
+    low = Column(Numeric(precision=20, scale=2), nullable=False)
+    close = Column(Numeric(precision=20, scale=2), nullable=False)
+    volume = Column(Numeric(precision=20, scale=2), nullable=False)  # Quantity traded
+    notional = Column(Numeric(precision=30, scale=4), nullable=False)  # Sum of price * quantity
+    trades_count = Column(Integer, nullable=False)
 
 class Order(Base):
     __tablename__ = "orders"
@@ -69,11 +104,14 @@ class Order(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     bond_id = Column(UUID(as_uuid=True), ForeignKey("bonds.id"), nullable=False)
     side = Column(String, nullable=False)  # buy, sell
-    type = Column(String, default="limit")  # limit, market
-    price = Column(Numeric(precision=20, scale=2), nullable=False)
+    type = Column(String, default="limit")  # limit, market, stop, stop_limit
+    time_in_force = Column(String, default="GTC")  # GTC, GTD, IOC, FOK
+    price = Column(Numeric(precision=20, scale=2), nullable=True)  # None for market orders without a limit
     quantity = Column(Numeric(precision=20, scale=2), nullable=False)
     filled_quantity = Column(Numeric(precision=20, scale=2), default=0)
-    status = Column(String, default="open")  # open, filled, partial, cancelled
+    status = Column(String, default="open")  # pending, open, filled, partial, cancelled, expired
+    stop_price = Column(Numeric(precision=20, scale=2), nullable=True)  # Trigger price of stop orders
+    expires_at = Column(DateTime(timezone=True), nullable=True)  # GTD orders only
     tx_hash = Column(String, nullable=True)  # Blockchain transaction hash
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -84,6 +122,11 @@ class Order(Base):
     buy_trades = relationship("Trade", foreign_keys="[Trade.buy_order_id]", back_populates="buy_order")
     sell_trades = relationship("Trade", foreign_keys="[Trade.sell_order_id]", back_populates="sell_order")
 
+    __table_args__ = (
+        # Keyset pagination of a user's orders, newest first
+        Index("ix_orders_user_created", "user_id", "created_at", "id"),
+    )
+
 class Trade(Base):
     __tablename__ = "trades"
 
@@ -102,6 +145,12 @@ class Trade(Base):
     sell_order = relationship("Order", foreign_keys=[sell_order_id], back_populates="sell_trades")
     bond = relationship("Bond", back_populates="trades")
 
+    __table_args__ = (
+        # Keyset pagination of trades, newest first, across bonds and per bond
+        Index("ix_trades_executed", "executed_at", "id"),
+        Index("ix_trades_bond_executed", "bond_id", "executed_at", "id"),
+    )
+
 class Holding(Base):
     __tablename__ = "holdings"
 
@@ -109,6 +158,7 @@ class Holding(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     bond_id = Column(UUID(as_uuid=True), ForeignKey("bonds.id"), nullable=False)
     quantity = Column(Numeric(precision=20, scale=2), nullable=False)
+    locked_quantity = Column(Numeric(precision=20, scale=2), nullable=False, default=0, server_default="0")  # Reserved by open sell orders
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
@@ -0,0 +1,279 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from app.models.models import Bond
+from app.services.fixed_point import SCALE, to_units
+
+# Prices are quoted clean, per 100 of face value
+PAR = 100.0
+
+COUPON_FREQUENCIES = (1, 2, 4, 12)
+DEFAULT_COUPON_FREQUENCY = 2
+
+NEWTON_MAX_ITERATIONS = 50
+NEWTON_TOLERANCE = 1e-10  # Price per 100 of face
+
+
+class BondAnalytics(NamedTuple):
+    clean_price: float
+    accrued_interest: float
+    dirty_price: float
+    ytm: float  # Annual yield, compounded at the coupon frequency
+    macaulay_duration: float  # Years
+    modified_duration: float
+    convexity: float
+
+
+class CashFlows(NamedTuple):
+    """Remaining cash flows of a set of bonds, one row per bond, padded to the longest"""
+    times: np.ndarray  # Coupon periods from settlement to each flow
+    amounts: np.ndarray  # Per 100 of face; zero in padding
+    frequency: np.ndarray  # Coupons per year
+    coupon: np.ndarray  # Coupon per period, per 100 of face
+    accrued: np.ndarray  # Accrued interest per 100 of face
+
+
+def get_coupon_frequency(bond: Bond) -> int:
+    """
+    Coupons per year, configured through bond_metadata:
+        {"coupon_frequency": 2}
+    """
+    metadata = bond.bond_metadata or {}
+    frequency = metadata.get("coupon_frequency") or DEFAULT_COUPON_FREQUENCY
+    return int(frequency) if int(frequency) in COUPON_FREQUENCIES else DEFAULT_COUPON_FREQUENCY
+
+
+def _shift_months(months: np.ndarray, days: np.ndarray, shift: np.ndarray) -> np.ndarray:
+    """Dates `shift` months after (year, month, day), clamping the day to the month's end"""
+    month = months + shift.astype("timedelta64[M]")
+    last_day = (month + np.timedelta64(1, "M")).astype("datetime64[D]") - np.timedelta64(1, "D")
+    return np.minimum(month.astype("datetime64[D]") + (days - 1).astype("timedelta64[D]"), last_day)
+
+
+def coupon_schedule(maturities: np.ndarray, frequencies: np.ndarray, settlement: date) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Remaining coupon count and the fraction of a period to the next coupon
+    for bonds paying on their maturity day every 12 / frequency months.
+    Maturities are datetime64[D] strictly after settlement.
+    """
+    today = np.datetime64(settlement, "D")
+    period = (12 // frequencies).astype(np.int64)
+    months = maturities.astype("datetime64[M]")
+    days = (maturities - months.astype("datetime64[D]")).astype(np.int64) + 1
+
+    # Coupons k periods before maturity; find the last one after settlement
+    months_left = (months - today.astype("datetime64[M]")).astype(np.int64)
+    k_next = months_left // period
+    next_coupon = _shift_months(months, days, -k_next * period)
+    passed = next_coupon <= today
+    k_next = np.where(passed, k_next - 1, k_next)
+    next_coupon = _shift_months(months, days, -k_next * period)
+    previous_coupon = _shift_months(months, days, -(k_next + 1) * period)
+
+    fraction = (next_coupon - today).astype(np.float64) / (next_coupon - previous_coupon).astype(np.float64)
+    return k_next + 1, fraction
+
+
+def cash_flows(coupon_rates: np.ndarray, maturities: np.ndarray, frequencies: np.ndarray,
+               settlement: date) -> CashFlows:
+    """Lay out the remaining coupons and redemption of every bond as padded arrays"""
+    count, fraction = coupon_schedule(maturities, frequencies, settlement)
+    coupon = PAR * coupon_rates / 100.0 / frequencies
+
+    columns = np.arange(int(count.max()) if len(count) else 0)
+    live = columns[None, :] < count[:, None]
+    times = np.where(live, columns[None, :] + fraction[:, None], 0.0)
+    amounts = np.where(live, coupon[:, None], 0.0)
+    amounts[np.arange(len(count)), count - 1] += PAR
+    return CashFlows(times, amounts, frequencies.astype(np.float64), coupon, coupon * (1.0 - fraction))
+
+
+def _discount(times: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """base ** -times, taking one log per bond rather than a power per cash flow"""
+    return np.exp(-times * np.log(base)[..., None])
+
+
+def bond_cash_flows(bonds: Sequence[Bond], settlement: date) -> CashFlows:
+    """Cash flows of bonds that all mature after settlement"""
+    return cash_flows(
+        coupon_rates=np.array([bond.coupon_rate for bond in bonds], dtype=np.float64),
+        maturities=np.array([bond.maturity_date.date() for bond in bonds], dtype="datetime64[D]"),
+        frequencies=np.array([get_coupon_frequency(bond) for bond in bonds], dtype=np.int64),
+        settlement=settlement
+    )
+
+
+def price_from_yield(flows: CashFlows, yields: np.ndarray) -> np.ndarray:
+    """Dirty prices per 100 of face; `yields` is one per bond, or a matrix of scenarios by bond"""
+    base = 1.0 + yields / flows.frequency
+    return (flows.amounts * _discount(flows.times, base)).sum(axis=-1)
+
+
+def solve_ytm(flows: CashFlows, dirty_prices: np.ndarray, clean_prices: np.ndarray) -> np.ndarray:
+    """
+    Yields to maturity of all bonds at once, by Newton's method on the
+    price-yield function, iterating only the bonds that have not converged.
+    Bonds that do not converge get NaN.
+    """
+    frequency = flows.frequency
+    years = flows.times.max(axis=1) / frequency
+    # Start from the approximate yield: coupon plus pull to par, over average price
+    yields = (flows.coupon * frequency + (PAR - clean_prices) / np.maximum(years, 1e-6)) / ((PAR + clean_prices) / 2.0)
+    yields = np.maximum(yields, -0.99 * frequency)
+
+    active = np.ones(len(yields), dtype=bool)
+    converged = np.zeros(len(yields), dtype=bool)
+    for _ in range(NEWTON_MAX_ITERATIONS):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        times, amounts, f = flows.times[idx], flows.amounts[idx], frequency[idx]
+        base = 1.0 + yields[idx] / f
+        discounted = amounts * _discount(times, base)
+        error = discounted.sum(axis=1) - dirty_prices[idx]
+        slope = -(times * discounted).sum(axis=1) / (f * base)
+        step = error / slope
+        # Keep 1 + y / f positive
+        yields[idx] = np.maximum(yields[idx] - step, -0.99 * f)
+        done = np.abs(error) < NEWTON_TOLERANCE
+        converged[idx[done]] = True
+        active[idx[done]] = False
+
+    yields[~converged] = np.nan
+    return yields
+
+
+def maturity_years(flows: CashFlows) -> np.ndarray:
+    """Years from settlement to each bond's final cash flow"""
+    return flows.times.max(axis=1) / flows.frequency
+
+
+def tenor_weights(key_tenors: np.ndarray, tenors: np.ndarray) -> np.ndarray:
+    """
+    Linear interpolation weights, shaped (tenors, key tenors), that map
+    values at increasing key tenors to other tenors, flat beyond the ends
+    """
+    weights = np.zeros((len(tenors), len(key_tenors)))
+    if len(key_tenors) == 1:
+        weights[:, 0] = 1.0
+        return weights
+    clipped = np.clip(tenors, key_tenors[0], key_tenors[-1])
+    upper = np.clip(np.searchsorted(key_tenors, clipped, side="right"), 1, len(key_tenors) - 1)
+    lower = upper - 1
+    share = (clipped - key_tenors[lower]) / (key_tenors[upper] - key_tenors[lower])
+    rows = np.arange(len(tenors))
+    weights[rows, lower] = 1.0 - share
+    weights[rows, upper] += share
+    return weights
+
+
+def scenario_prices(flows: CashFlows, yields: np.ndarray, shifts: np.ndarray,
+                    max_elements: int = 4_000_000) -> np.ndarray:
+    """
+    Clean prices of every bond under every yield shift, shaped (scenarios,
+    bonds). `shifts` is (scenarios, bonds), added to the bonds' yields. The
+    grid is priced as one array operation, split into blocks of scenarios
+    only to bound the memory of the (scenarios, bonds, cash flows) array.
+    """
+    shocked = yields[None, :] + shifts
+    prices = np.empty(shocked.shape, dtype=np.float64)
+    block = max(1, max_elements // max(1, flows.times.size))
+    for start in range(0, len(shocked), block):
+        prices[start:start + block] = price_from_yield(flows, shocked[start:start + block])
+    return prices - flows.accrued[None, :]
+
+
+def risk_measures(flows: CashFlows, yields: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Macaulay duration in years, modified duration and convexity at given yields"""
+    f = flows.frequency
+    base = 1.0 + yields / f
+    discounted = flows.amounts * _discount(flows.times, base)
+    price = discounted.sum(axis=1)
+    macaulay = (flows.times * discounted).sum(axis=1) / price / f
+    modified = macaulay / base
+    convexity = (flows.times * (flows.times + 1.0) * discounted).sum(axis=1) / (price * (f * base) ** 2)
+    return macaulay, modified, convexity
+
+
+def analyze(coupon_rates: np.ndarray, maturities: np.ndarray, frequencies: np.ndarray,
+            clean_prices: np.ndarray, settlement: date) -> List[Optional[BondAnalytics]]:
+    """Analytics of many bonds in one vectorised pass"""
+    if not len(clean_prices):
+        return []
+    flows = cash_flows(coupon_rates, maturities, frequencies, settlement)
+    dirty = clean_prices + flows.accrued
+    yields = solve_ytm(flows, dirty, clean_prices)
+    macaulay, modified, convexity = risk_measures(flows, np.nan_to_num(yields))
+
+    results = []
+    for i in range(len(clean_prices)):
+        if np.isnan(yields[i]):
+            results.append(None)
+            continue
+        results.append(BondAnalytics(
+            clean_price=float(clean_prices[i]),
+            accrued_interest=float(flows.accrued[i]),
+            dirty_price=float(dirty[i]),
+            ytm=float(yields[i]),
+            macaulay_duration=float(macaulay[i]),
+            modified_duration=float(modified[i]),
+            convexity=float(convexity[i])
+        ))
+    return results
+
+
+class BondAnalyticsCache:
+    """
+    Analytics per bond, recomputed only when its price tick or the
+    settlement date changes. Each request reprices the bonds whose inputs
+    moved together in one vectorised pass.
+    """
+
+    def __init__(self):
+        # Bond id -> (inputs, analytics)
+        self._cache: Dict[uuid.UUID, Tuple[tuple, Optional[BondAnalytics]]] = {}
+
+    def get_many(self, bonds: Sequence[Tuple[Bond, Optional[Decimal]]],
+                 settlement: Optional[date] = None) -> Dict[uuid.UUID, Optional[BondAnalytics]]:
+        """
+        Analytics of bonds at their last clean prices, at par until they
+        trade. Bonds at or past maturity get None.
+        """
+        settlement = settlement or datetime.utcnow().date()
+        results: Dict[uuid.UUID, Optional[BondAnalytics]] = {}
+        stale = []
+        for bond, price in bonds:
+            maturity = bond.maturity_date.date()
+            if maturity <= settlement:
+                results[bond.id] = None
+                continue
+            price_units = to_units(price) if price is not None else to_units(Decimal(PAR))
+            frequency = get_coupon_frequency(bond)
+            inputs = (price_units, settlement, bond.coupon_rate, maturity, frequency)
+            cached = self._cache.get(bond.id)
+            if cached is not None and cached[0] == inputs:
+                results[bond.id] = cached[1]
+            else:
+                stale.append((bond.id, inputs))
+
+        if stale:
+            computed = analyze(
+                coupon_rates=np.array([inputs[2] for _, inputs in stale], dtype=np.float64),
+                maturities=np.array([inputs[3] for _, inputs in stale], dtype="datetime64[D]"),
+                frequencies=np.array([inputs[4] for _, inputs in stale], dtype=np.int64),
+                clean_prices=np.array([inputs[0] for _, inputs in stale], dtype=np.float64) / SCALE,
+                settlement=settlement
+            )
+            for (bond_id, inputs), analytics in zip(stale, computed):
+                self._cache[bond_id] = (inputs, analytics)
+                results[bond_id] = analytics
+        return results
+
+    def clear(self):
+        self._cache.clear()
+
+
+# Global bond analytics cache
+bond_analytics = BondAnalyticsCache()
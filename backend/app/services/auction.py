@@ -0,0 +1,177 @@
+import asyncio
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Bond
+from app.services.event_loop import call_soon
+from app.services.order_book import RestingOrder
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AuctionFill(NamedTuple):
+    buy: RestingOrder
+    sell: RestingOrder
+    quantity: int  # Lots
+
+
+class AuctionResult(NamedTuple):
+    price: int  # Ticks
+    volume: int  # Lots
+    fills: List[AuctionFill]
+
+
+def get_auction_interval(bond: Optional[Bond]) -> Optional[int]:
+    """
+    Auction interval in seconds if the bond uses periodic call-auction
+    matching, configured through bond_metadata:
+        {"matching_mode": "auction", "auction_interval_seconds": 60}
+    """
+    metadata = (bond.bond_metadata if bond else None) or {}
+    if metadata.get("matching_mode") != "auction":
+        return None
+    return int(metadata.get("auction_interval_seconds") or settings.AUCTION_INTERVAL_SECONDS)
+
+
+def _to_array(values: List[int]) -> np.ndarray:
+    return np.array(values, dtype=np.int64)
+
+
+def uncross(bids: List[RestingOrder], asks: List[RestingOrder]) -> Optional[AuctionResult]:
+    """
+    Compute a single-price auction over resting orders given in price-time priority.
+
+    The uncrossing price maximises executed volume; ties go to the smallest
+    imbalance between demand and supply, then to the middle of the remaining
+    candidates. Fills are allocated in priority order on both sides by
+    overlaying the cumulative bid and ask quantities, which pairs every
+    executed unit in one vectorised pass. Segments where buyer and seller
+    are the same user are left unfilled.
+    """
+    if not bids or not asks:
+        return None
+
+    bid_prices = _to_array([r.price for r in bids])
+    ask_prices = _to_array([r.price for r in asks])
+    bid_qty = _to_array([r.remaining for r in bids])
+    ask_qty = _to_array([r.remaining for r in asks])
+
+    # Demand at p is all bids priced >= p, supply is all asks priced <= p
+    candidates = np.unique(np.concatenate([bid_prices, ask_prices]))
+    bid_order = np.argsort(bid_prices, kind="stable")
+    ask_order = np.argsort(ask_prices, kind="stable")
+    bid_cum_by_price = np.concatenate([[0], np.cumsum(bid_qty[bid_order])])
+    ask_cum_by_price = np.concatenate([[0], np.cumsum(ask_qty[ask_order])])
+    demand = bid_cum_by_price[-1] - bid_cum_by_price[np.searchsorted(bid_prices[bid_order], candidates, side="left")]
+    supply = ask_cum_by_price[np.searchsorted(ask_prices[ask_order], candidates, side="right")]
+
+    executable = np.minimum(demand, supply)
+    volume = int(executable.max())
+    if volume <= 0:
+        return None
+
+    best = np.flatnonzero(executable == volume)
+    imbalance = np.abs(demand[best] - supply[best])
+    best = best[imbalance == imbalance.min()]
+    price = int(candidates[best[len(best) // 2]])
+
+    # Orders eligible at the uncrossing price keep their priority order
+    bid_idx = np.flatnonzero(bid_prices >= price)
+    ask_idx = np.flatnonzero(ask_prices <= price)
+    bid_cum = np.cumsum(bid_qty[bid_idx])
+    ask_cum = np.cumsum(ask_qty[ask_idx])
+
+    # Every boundary of either cumulative ladder up to the executed volume
+    # starts a segment filled by exactly one bid and one ask
+    breaks = np.unique(np.concatenate([[0], bid_cum[bid_cum < volume], ask_cum[ask_cum < volume], [volume]]))
+    starts, sizes = breaks[:-1], np.diff(breaks)
+    seg_bids = bid_idx[np.searchsorted(bid_cum, starts, side="right")]
+    seg_asks = ask_idx[np.searchsorted(ask_cum, starts, side="right")]
+
+    # Merge consecutive segments between the same pair of orders
+    fills: Dict[Tuple[int, int], int] = {}
+    for b, a, size in zip(seg_bids.tolist(), seg_asks.tolist(), sizes.tolist()):
+        if bids[b].user_id == asks[a].user_id:
+            continue
+        fills[(b, a)] = fills.get((b, a), 0) + size
+
+    if not fills:
+        return None
+
+    return AuctionResult(
+        price=price,
+        volume=sum(fills.values()),
+        fills=[AuctionFill(bids[b], asks[a], size) for (b, a), size in fills.items()]
+    )
+
+
+class AuctionScheduler:
+    """
+    Runs the periodic uncross for each call-auction bond on its sequencer.
+
+    A bond's clock starts in the process that matches it when its book is
+    loaded, so orders resting from before a restart are auctioned without
+    waiting for a new order. The API starts the books of every call-auction
+    bond at startup.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[uuid.UUID, asyncio.Task] = {}
+
+    def ensure(self, bond_id: uuid.UUID, interval: int):
+        """Start the auction clock for a bond if it is not already running"""
+        call_soon(self._ensure, bond_id, interval)
+
+    def _ensure(self, bond_id: uuid.UUID, interval: int):
+        task = self._tasks.get(bond_id)
+        if task is not None and not task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Started when the book is next used inside the event loop
+        self._tasks[bond_id] = asyncio.create_task(self._run(bond_id, interval), name=f"auction-{bond_id}")
+
+    def load(self, db: Session, bond_id: uuid.UUID):
+        """Start the auction clock of a bond whose book was just loaded, if it is a call-auction bond"""
+        interval = get_auction_interval(db.get(Bond, bond_id))
+        if interval:
+            self.ensure(bond_id, interval)
+
+    async def stop(self, bond_id: uuid.UUID):
+        """Stop a bond's auction clock"""
+        task = self._tasks.pop(bond_id, None)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self, bond_id: uuid.UUID, interval: int):
+        from app.services.sequencer import EngineCall, matching_sequencer
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                trades = await matching_sequencer.submit(bond_id, EngineCall("run_auction", bond_id))
+                if trades:
+                    logger.info(f"Auction for bond {bond_id} executed {len(trades)} trades")
+            except Exception as e:
+                logger.error(f"Auction for bond {bond_id} failed: {e}")
+
+    async def shutdown(self):
+        for task in self._tasks.values():
+            task.cancel()
+        for task in self._tasks.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
+
+
+# Global auction scheduler instance
+auction_scheduler = AuctionScheduler()
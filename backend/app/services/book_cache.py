@@ -0,0 +1,122 @@
+import secrets
+import uuid
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.models import Bond
+from app.services.fixed_point import from_units
+from app.services.order_book import OrderBook
+
+# Price levels per side served by the REST orderbook endpoints
+ORDERBOOK_DEPTH = 10
+
+
+class BookLevel(NamedTuple):
+    price: Decimal
+    quantity: Decimal
+    orders_count: int
+
+
+class CachedOrderBook(NamedTuple):
+    bond_id: uuid.UUID
+    version: int
+    bids: List[BookLevel]
+    asks: List[BookLevel]
+
+
+def top_levels(book: OrderBook, depth: int = ORDERBOOK_DEPTH) -> Tuple[List[BookLevel], List[BookLevel]]:
+    """Aggregated best `depth` levels of each side of a book, best first"""
+    return tuple(
+        [
+            BookLevel(from_units(level.price), from_units(level.quantity), len(level))
+            for level in islice(book_side.levels(), depth)
+        ]
+        for book_side in (book.bids, book.asks)
+    )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names the current ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class OrderBookCache:
+    """
+    Versioned top-of-book L2 snapshot per bond, read by both REST orderbook
+    endpoints instead of aggregating the orders table on every poll.
+
+    The matching engine pushes a bond's top levels after every committed
+    change to its book. A bond's version only moves when those levels
+    differ, so it doubles as the ETag of the endpoints. Inside a matching
+    worker process pushes are relayed to the API process, which holds the
+    cache and serves the reads.
+    """
+
+    def __init__(self, depth: int = ORDERBOOK_DEPTH):
+        self.depth = depth
+        self._books: Dict[uuid.UUID, CachedOrderBook] = {}
+        # Tells versions apart from those issued before a restart or clear
+        self._epoch = secrets.token_hex(4)
+        self._relay: Optional[Callable[[tuple], None]] = None
+
+    def set_relay(self, send: Callable[[tuple], None]):
+        """Forward pushes to another process instead of caching them here"""
+        self._relay = send
+
+    def publish(self, book: OrderBook):
+        """Push the current top of a resident book"""
+        bids, asks = top_levels(book, self.depth)
+        if self._relay is not None:
+            self._relay(("book_levels", book.bond_id, bids, asks))
+        else:
+            self.update(book.bond_id, bids, asks)
+
+    def update(self, bond_id: uuid.UUID, bids: List[BookLevel], asks: List[BookLevel]) -> CachedOrderBook:
+        cached = self._books.get(bond_id)
+        if cached is not None and cached.bids == bids and cached.asks == asks:
+            return cached
+        cached = CachedOrderBook(bond_id, cached.version + 1 if cached else 1, bids, asks)
+        self._books[bond_id] = cached
+        return cached
+
+    def get(self, bond_id: uuid.UUID) -> Optional[CachedOrderBook]:
+        return self._books.get(bond_id)
+
+    def etag(self, cached: CachedOrderBook) -> str:
+        return f'"{self._epoch}-{cached.version}"'
+
+    def clear(self):
+        self._books.clear()
+        self._epoch = secrets.token_hex(4)
+
+
+async def get_cached_orderbook(db: Session, bond_id: uuid.UUID) -> Optional[CachedOrderBook]:
+    """
+    A bond's cached top of book, or None if the bond does not exist. On a
+    miss the bond's sequencer publishes it from the resident book, in order
+    with the matching that follows.
+    """
+    from app.services.sequencer import EngineCall, matching_sequencer
+
+    cached = book_cache.get(bond_id)
+    if cached is None:
+        if db.get(Bond, bond_id) is None:
+            return None
+        await matching_sequencer.submit(bond_id, EngineCall("publish_book_levels", bond_id))
+        cached = book_cache.get(bond_id)
+    if cached is None:
+        raise RuntimeError(f"Order book for bond {bond_id} was not published")
+    return cached
+
+
+# Global order book snapshot cache
+book_cache = OrderBookCache()
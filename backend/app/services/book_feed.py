@@ -0,0 +1,133 @@
+import uuid
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.core.config import settings
+from app.services.fixed_point import from_units, to_units
+from app.services.order_book import OrderBook, PriceLevel
+
+
+class LevelOrders(NamedTuple):
+    """A price level with its resting orders in queue order, as (order id, remaining, created_at)"""
+    price: Decimal
+    quantity: Decimal
+    orders: List[tuple]
+
+
+class BookPage(NamedTuple):
+    seq: int  # Feed sequence number the levels were read at
+    levels: List[LevelOrders]
+    next_price: Optional[Decimal]  # Resume below this level, None when the side is exhausted
+
+
+def _level_to_dict(level: PriceLevel) -> dict:
+    return {"price": float(from_units(level.price)), "quantity": float(from_units(level.quantity))}
+
+
+class BookFeed:
+    """
+    Incremental L2 market data for the `bond_{id}` rooms.
+
+    After each committed unit of work the matching engine publishes the new
+    aggregate size of every price level it touched as one `book_delta`
+    message, instead of re-querying and rebroadcasting the top of the book.
+    A size of zero means the level is gone. Messages carry a monotonic
+    per-bond sequence number, and every `snapshot_interval` messages a full
+    depth `book_snapshot` is sent in place of a delta.
+
+    Clients apply deltas with a sequence number above their last one. A
+    snapshot always replaces the client's book and its sequence number,
+    which is how a client recovers from a gap, and from a restart or a bond
+    moving to another matching worker. Each bond's feed is only advanced
+    from that bond's sequencer.
+    """
+
+    def __init__(self, snapshot_interval: int = 100):
+        self.snapshot_interval = snapshot_interval
+        self._seqs: Dict[uuid.UUID, int] = {}
+        self._since_snapshot: Dict[uuid.UUID, int] = {}
+
+    def publish(self, book: OrderBook, touched: Iterable[Tuple[str, int]]) -> Optional[dict]:
+        """
+        Advance a bond's feed for the levels changed by a committed unit of
+        work, returning the message to broadcast or None if nothing changed
+        """
+        touched = set(touched)
+        if not touched:
+            return None
+        bond_id = book.bond_id
+
+        seq = self._seqs.get(bond_id, 0) + 1
+        self._seqs[bond_id] = seq
+        since_snapshot = self._since_snapshot.get(bond_id)
+        if since_snapshot is None or since_snapshot + 1 >= self.snapshot_interval:
+            self._since_snapshot[bond_id] = 0
+            return self._snapshot(book, seq)
+
+        self._since_snapshot[bond_id] = since_snapshot + 1
+        return {
+            "type": "book_delta",
+            "data": {
+                "bond_id": str(bond_id),
+                "seq": seq,
+                "changes": [
+                    {
+                        "side": side,
+                        "price": float(from_units(price)),
+                        "quantity": float(from_units(book.level_quantity(side, price)))
+                    }
+                    for side, price in sorted(touched)
+                ]
+            }
+        }
+
+    def snapshot(self, book: OrderBook) -> dict:
+        """Full-depth snapshot at the bond's current sequence number, e.g. for a client resync"""
+        return self._snapshot(book, self._seqs.get(book.bond_id, 0))
+
+    def page(self, book: OrderBook, side: str, after: Optional[Decimal] = None, limit: int = 1000) -> BookPage:
+        """
+        Read whole price levels of one side, best first and below `after`,
+        until at least `limit` orders are collected. Levels are never split,
+        so queue positions within a page are exact at its sequence number.
+        """
+        levels = []
+        count = 0
+        next_price = None
+        for level in book.levels(side, to_units(after) if after is not None else None):
+            if count >= limit:
+                next_price = levels[-1].price
+                break
+            levels.append(LevelOrders(from_units(level.price), from_units(level.quantity), [
+                (resting.order_id, from_units(resting.remaining), resting.created_at)
+                for resting in level.orders.values()
+            ]))
+            count += len(level)
+        return BookPage(self._seqs.get(book.bond_id, 0), levels, next_price)
+
+    def _snapshot(self, book: OrderBook, seq: int) -> dict:
+        return {
+            "type": "book_snapshot",
+            "data": {
+                "bond_id": str(book.bond_id),
+                "seq": seq,
+                "bids": [_level_to_dict(level) for level in book.bids.levels()],
+                "asks": [_level_to_dict(level) for level in book.asks.levels()]
+            }
+        }
+
+    def invalidate(self, bond_id: uuid.UUID):
+        """Send a snapshot next, e.g. after the book was rebuilt from the database"""
+        self._since_snapshot.pop(bond_id, None)
+
+    def forget(self, bond_id: uuid.UUID):
+        """Drop a bond's feed state once it is published by another process"""
+        self._seqs.pop(bond_id, None)
+        self._since_snapshot.pop(bond_id, None)
+
+    def clear(self):
+        self._seqs.clear()
+        self._since_snapshot.clear()
+
+
+# Global order book feed
+book_feed = BookFeed(snapshot_interval=settings.BOOK_SNAPSHOT_INTERVAL)
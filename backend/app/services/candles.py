@@ -0,0 +1,234 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, insert, literal, tuple_
+from app.models.models import Candle, Trade
+from app.services.fixed_point import DECIMALS, from_units, to_units
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resolution name -> bar width in seconds, lowest first; each width is a
+# multiple of the one before, so every bar rolls up from the bars below it
+RESOLUTIONS: Dict[str, int] = {
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+WIDTHS: List[int] = list(RESOLUTIONS.values())
+
+NOTIONAL_DECIMALS = 2 * DECIMALS
+
+
+class Bar:
+    """OHLCV bar in integer ticks and lots; a single trade is a bar starting at its own time"""
+    __slots__ = ("start", "open", "high", "low", "close", "volume", "notional", "count")
+
+    def __init__(self, start: int, open: int, high: int, low: int, close: int,
+                 volume: int, notional: int, count: int):
+        self.start = start  # Unix timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.notional = notional  # Sum of price * quantity, in ticks * lots
+        self.count = count
+
+    @classmethod
+    def from_trade(cls, executed_at: datetime, price: Decimal, quantity: Decimal) -> "Bar":
+        price, quantity = to_units(price), to_units(quantity)
+        return cls(int(_timestamp(executed_at)), price, price, price, price, quantity, price * quantity, 1)
+
+    @classmethod
+    def from_candle(cls, candle: Candle) -> "Bar":
+        return cls(
+            int(_timestamp(candle.bucket_start)), to_units(candle.open), to_units(candle.high),
+            to_units(candle.low), to_units(candle.close), to_units(candle.volume),
+            int(Decimal(candle.notional).scaleb(NOTIONAL_DECIMALS)), candle.trades_count
+        )
+
+    def merge(self, later: "Bar"):
+        """Fold in a bar that comes after this one"""
+        self.high = max(self.high, later.high)
+        self.low = min(self.low, later.low)
+        self.close = later.close
+        self.volume += later.volume
+        self.notional += later.notional
+        self.count += later.count
+
+    def values(self) -> dict:
+        return {
+            "open": from_units(self.open),
+            "high": from_units(self.high),
+            "low": from_units(self.low),
+            "close": from_units(self.close),
+            "volume": from_units(self.volume),
+            "notional": Decimal(self.notional).scaleb(-NOTIONAL_DECIMALS),
+            "trades_count": self.count
+        }
+
+
+def _timestamp(moment: datetime) -> float:
+    """Unix timestamp of a stored time; naive times are UTC, as written by the matching engine"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _bucket_start(start: int) -> datetime:
+    return datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None)
+
+
+def aggregate(bars: Iterable[Bar], width: int, carry: Optional[Bar] = None) -> Tuple[List[Bar], Optional[Bar]]:
+    """
+    Roll time-ordered bars up into bars `width` seconds wide. Returns the
+    completed bars and the last one, which later input may still extend;
+    pass it back as `carry` to continue from it.
+    """
+    completed = []
+    current = carry
+    for bar in bars:
+        start = bar.start - bar.start % width
+        if current is not None and current.start == start:
+            current.merge(bar)
+            continue
+        if current is not None:
+            completed.append(current)
+        current = Bar(start, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.notional, bar.count)
+    return completed, current
+
+
+def apply_trades(db: Session, bond_id: uuid.UUID, trades: List[Trade]):
+    """
+    Fold a unit of work's trades into the bond's candles, in the same
+    transaction. The trades become one-minute bars, and each resolution is
+    rolled up from the one below before being merged into its stored bars,
+    which are all loaded with a single query. Must run on the bond's
+    sequencer, the only writer of its candles.
+    """
+    if not trades:
+        return
+    bars = [Bar.from_trade(trade.executed_at, trade.price, trade.quantity) for trade in trades]
+    touched: List[Tuple[int, Bar]] = []
+    for width in WIDTHS:
+        completed, last = aggregate(bars, width)
+        bars = completed + [last]
+        touched.extend((width, bar) for bar in bars)
+
+    # The stored bars of every resolution in one primary key lookup, keyed
+    # on their start timestamp as the driver may return aware or naive times
+    existing = {
+        (candle.resolution, int(_timestamp(candle.bucket_start))): candle
+        for candle in db.query(Candle).filter(
+            Candle.bond_id == bond_id,
+            tuple_(Candle.resolution, Candle.bucket_start).in_(
+                [(width, _bucket_start(bar.start)) for width, bar in touched]
+            )
+        )
+    }
+    for width, bar in touched:
+        candle = existing.get((width, bar.start))
+        if candle is None:
+            db.add(Candle(bond_id=bond_id, resolution=width, bucket_start=_bucket_start(bar.start), **bar.values()))
+        else:
+            stored = Bar.from_candle(candle)
+            stored.merge(bar)
+            for key, value in stored.values().items():
+                setattr(candle, key, value)
+
+
+def get_candles(db: Session, bond_id: uuid.UUID, width: int, start: datetime, end: datetime,
+                limit: int) -> List[Candle]:
+    """Bars of one resolution starting in [start, end), read with one primary key range scan"""
+    return db.query(Candle).filter(
+        and_(
+            Candle.bond_id == bond_id,
+            Candle.resolution == width,
+            Candle.bucket_start >= start,
+            Candle.bucket_start < end
+        )
+    ).order_by(Candle.bucket_start.asc()).limit(limit).all()
+
+
+def backfill(db: Session, bond_ids: Optional[List[uuid.UUID]] = None, chunk_size: int = 10000) -> int:
+    """
+    Rebuild the candles of some or all bonds from their trades, returning
+    how many bars were written.
+
+    Trades are read in chunks of `chunk_size` in (bond, time) order and
+    rolled up a resolution at a time, keeping only each resolution's open
+    bar between chunks, so memory stays flat however long the history is.
+    Completed bars are inserted in batches and committed per chunk. Existing candles
+    of the bonds are replaced, so run it while matching is stopped.
+    """
+    delete = db.query(Candle)
+    trades = db.query(Trade.bond_id, Trade.executed_at, Trade.price, Trade.quantity, Trade.id)
+    if bond_ids is not None:
+        delete = delete.filter(Candle.bond_id.in_(bond_ids))
+        trades = trades.filter(Trade.bond_id.in_(bond_ids))
+    delete.delete(synchronize_session=False)
+    db.commit()
+
+    written = 0
+    rows: List[dict] = []
+    bond_id: Optional[uuid.UUID] = None
+    carry: Dict[int, Optional[Bar]] = {}
+
+    def emit(width: int, bars: List[Bar]):
+        rows.extend(
+            dict(bond_id=bond_id, resolution=width, bucket_start=_bucket_start(bar.start), **bar.values())
+            for bar in bars
+        )
+
+    def roll(bars: List[Bar], final: bool):
+        for width in WIDTHS:
+            completed, carry[width] = aggregate(bars, width, carry.get(width))
+            if final and carry[width] is not None:
+                completed.append(carry[width])
+                carry[width] = None
+            emit(width, completed)
+            bars = completed
+
+    def write():
+        nonlocal written
+        if rows:
+            db.execute(insert(Candle), rows)
+            written += len(rows)
+            rows.clear()
+        db.commit()
+
+    # Keyset chunks rather than one server-side cursor, which would not
+    # survive the per-chunk commits
+    last_key = None
+    while True:
+        chunk = trades
+        if last_key is not None:
+            chunk = chunk.filter(tuple_(Trade.bond_id, Trade.executed_at, Trade.id) > last_key)
+        chunk = chunk.order_by(Trade.bond_id, Trade.executed_at, Trade.id).limit(chunk_size).all()
+        if not chunk:
+            break
+        pending: List[Bar] = []
+        for trade_bond_id, executed_at, price, quantity, _ in chunk:
+            if trade_bond_id != bond_id:
+                if bond_id is not None:
+                    roll(pending, final=True)
+                    pending = []
+                bond_id = trade_bond_id
+            pending.append(Bar.from_trade(executed_at, price, quantity))
+        roll(pending, final=False)
+        write()
+        last_bond_id, last_executed_at, _, _, last_id = chunk[-1]
+        last_key = tuple_(
+            literal(last_bond_id, Trade.bond_id.type),
+            literal(last_executed_at, Trade.executed_at.type),
+            literal(last_id, Trade.id.type)
+        )
+        logger.info(f"Backfilled candles up to trade {last_id}")
+    if bond_id is not None:
+        roll([], final=True)
+    write()
+    return written
@@ -0,0 +1,33 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Set in sequencer threads to the event loop that owns them
+_thread = threading.local()
+
+
+def sequencer_executor(name: str) -> ThreadPoolExecutor:
+    """
+    Single-thread executor for one bond's matching batches. Its thread hands
+    event loop work back to the running loop through call_soon.
+    """
+    loop = asyncio.get_running_loop()
+
+    def bind():
+        _thread.loop = loop
+
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix=name, initializer=bind)
+
+
+def call_soon(callback: Callable[..., Any], *args):
+    """
+    Run a callback that touches event loop state, such as tasks and timers.
+    From a sequencer thread it is queued on the loop, in call order;
+    anywhere else it runs right away.
+    """
+    loop = getattr(_thread, "loop", None)
+    if loop is None:
+        callback(*args)
+    else:
+        loop.call_soon_threadsafe(callback, *args)
@@ -0,0 +1,206 @@
+import asyncio
+import math
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from app.models.models import Order
+from app.services.event_loop import call_soon
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel of keys with a deadline.
+
+    Level 0 has one slot per tick, and each level above covers `slots`
+    times the span of the one below. A key is filed in the lowest level
+    whose span covers its deadline, and is moved down a level when the
+    clock reaches the start of its slot. Adding, discarding and expiring a
+    key are O(1), and a tick with nothing due is O(1) too. Deadlines past
+    the top level wait in its furthest slot and are re-filed from there.
+    """
+
+    def __init__(self, resolution: float = 1.0, slots: int = 64, levels: int = 4, now: Optional[float] = None):
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self._tick = self._to_tick(time.time() if now is None else now, math.floor)
+        # Per level and slot: key -> deadline tick
+        self._wheels: List[List[Dict[Hashable, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def _to_tick(self, timestamp: float, rounding) -> int:
+        return int(rounding(timestamp / self.resolution))
+
+    def add(self, key: Hashable, deadline: float):
+        """Schedule a key for a Unix timestamp, replacing any earlier schedule of it"""
+        self.discard(key)
+        # Never before the next tick, and never early
+        self._file(key, max(self._to_tick(deadline, math.ceil), self._tick + 1))
+
+    def _file(self, key: Hashable, deadline: int):
+        delta = deadline - self._tick
+        for level in range(self.levels):
+            span = self.slots ** (level + 1)
+            if delta < span or level == self.levels - 1:
+                tick = min(deadline, self._tick + span - 1)
+                slot = (tick // self.slots ** level) % self.slots
+                self._wheels[level][slot][key] = deadline
+                self._where[key] = (level, slot)
+                return
+
+    def discard(self, key: Hashable):
+        where = self._where.pop(key, None)
+        if where is not None:
+            level, slot = where
+            del self._wheels[level][slot][key]
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Move the clock to a Unix timestamp, returning the keys that became due"""
+        target = self._to_tick(now, math.floor)
+        if not self._where:
+            self._tick = max(self._tick, target)
+            return []
+
+        expired = []
+        while self._tick < target:
+            self._tick += 1
+            # Move down every upper slot that starts at this tick
+            for level in range(1, self.levels):
+                span = self.slots ** level
+                if self._tick % span:
+                    break
+                bucket = self._wheels[level][(self._tick // span) % self.slots]
+                entries = list(bucket.items())
+                bucket.clear()
+                for key, deadline in entries:
+                    self._file(key, deadline)
+
+            bucket = self._wheels[0][self._tick % self.slots]
+            if bucket:
+                expired.extend(bucket)
+                for key in bucket:
+                    del self._where[key]
+                bucket.clear()
+        return expired
+
+    def clear(self):
+        for wheel in self._wheels:
+            for bucket in wheel:
+                bucket.clear()
+        self._where.clear()
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+
+class OrderExpiryScheduler:
+    """
+    Expires good-till-date orders on their bond's sequencer.
+
+    Resting GTD orders and pending GTD stops are filed in a timing wheel
+    when they arrive, or when their book is loaded after a restart, so
+    expiry never scans the orders table. Each tick the due orders are
+    grouped by bond and expired as one unit of work per bond, which
+    publishes the same book deltas as a cancel. Orders filled or cancelled
+    first are skipped when they fire. The wheel belongs to the event loop,
+    so changes made from a sequencer thread are queued onto it in order.
+    """
+
+    def __init__(self, resolution: float = 1.0):
+        self.resolution = resolution
+        self._wheel = TimingWheel(resolution)
+        self._bonds: Dict[uuid.UUID, uuid.UUID] = {}  # Order id -> bond id
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, bond_id: uuid.UUID, order_id: uuid.UUID, expires_at: datetime):
+        call_soon(self._schedule, bond_id, order_id, expires_at)
+
+    def _schedule(self, bond_id: uuid.UUID, order_id: uuid.UUID, expires_at: datetime):
+        self._wheel.add(order_id, expires_at.timestamp())
+        self._bonds[order_id] = bond_id
+        self._ensure()
+
+    def discard(self, order_id: uuid.UUID):
+        call_soon(self._discard, order_id)
+
+    def _discard(self, order_id: uuid.UUID):
+        self._wheel.discard(order_id)
+        self._bonds.pop(order_id, None)
+
+    def load(self, db: Session, bond_id: uuid.UUID):
+        """Schedule the resting and pending GTD orders of a bond whose book was just loaded"""
+        resting = db.query(Order.id, Order.expires_at).filter(
+            and_(
+                Order.bond_id == bond_id,
+                Order.status.in_(["open", "partial", "pending"]),
+                Order.expires_at.isnot(None)
+            )
+        ).all()
+        for order_id, expires_at in resting:
+            self.schedule(bond_id, order_id, expires_at)
+
+    def forget(self, bond_id: uuid.UUID):
+        """Drop a bond's orders once it is matched by another process"""
+        call_soon(self._forget, bond_id)
+
+    def _forget(self, bond_id: uuid.UUID):
+        for order_id in [order_id for order_id, owner in self._bonds.items() if owner == bond_id]:
+            self._discard(order_id)
+
+    def clear(self):
+        self._wheel.clear()
+        self._bonds.clear()
+
+    def _ensure(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Started by the next order scheduled inside the event loop
+        self._task = asyncio.create_task(self._run(), name="order-expiry")
+
+    def _due(self, now: float) -> Dict[uuid.UUID, List[uuid.UUID]]:
+        due: Dict[uuid.UUID, List[uuid.UUID]] = {}
+        for order_id in self._wheel.advance(now):
+            bond_id = self._bonds.pop(order_id, None)
+            if bond_id is not None:
+                due.setdefault(bond_id, []).append(order_id)
+        return due
+
+    async def _run(self):
+        from app.services.sequencer import EngineCall, matching_sequencer
+
+        while True:
+            await asyncio.sleep(self.resolution)
+            for bond_id, order_ids in self._due(time.time()).items():
+                try:
+                    expired = await matching_sequencer.submit(bond_id, EngineCall("expire_orders", bond_id, order_ids))
+                    if expired:
+                        logger.info(f"Expired {len(expired)} orders for bond {bond_id}")
+                except Exception as e:
+                    logger.error(f"Expiring orders for bond {bond_id} failed: {e}")
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global order expiry scheduler instance
+order_expiry = OrderExpiryScheduler()
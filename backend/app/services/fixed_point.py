@@ -0,0 +1,18 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+
+# Prices and quantities are Numeric(20, 2) columns, so the matching core
+# works on integer hundredths: prices in ticks and quantities in lots.
+# Decimals only appear at the persistence and API boundary.
+DECIMALS = 2
+SCALE = 10 ** DECIMALS
+
+
+def to_units(value: Union[Decimal, int, str]) -> int:
+    """Scale a price or quantity to integer hundredths, rounding like the database column"""
+    return int(Decimal(value).scaleb(DECIMALS).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_units(units: int) -> Decimal:
+    """Turn integer hundredths back into a scale 2 Decimal"""
+    return Decimal(int(units)).scaleb(-DECIMALS)
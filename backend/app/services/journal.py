@@ -0,0 +1,297 @@
+import json
+import os
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Order, Trade
+from app.services.fixed_point import from_units, to_units
+from app.services.order_book import OrderBook, RestingOrder
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _resting_to_dict(resting: RestingOrder) -> dict:
+    return {
+        "order_id": str(resting.order_id),
+        "user_id": str(resting.user_id),
+        "side": resting.side,
+        "price": str(from_units(resting.price)) if resting.price is not None else None,
+        "remaining": str(from_units(resting.remaining)),
+        "created_at": resting.created_at.isoformat() if resting.created_at else None
+    }
+
+
+def _resting_from_dict(data: dict) -> RestingOrder:
+    return RestingOrder(
+        order_id=uuid.UUID(data["order_id"]),
+        user_id=uuid.UUID(data["user_id"]),
+        side=data["side"],
+        price=to_units(data["price"]) if data["price"] is not None else None,
+        remaining=to_units(data["remaining"]),
+        created_at=datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
+    )
+
+
+class OrderJournal:
+    """
+    Append-only event journal and snapshot store for resident order books.
+
+    Each bond has its own journal file with one JSON line per unit of work,
+    tagged with a monotonic per-bond sequence number counting events, plus
+    a snapshot of the book taken every `snapshot_interval` events. A book is
+    recovered by loading the latest snapshot and replaying only the journal
+    lines after it, instead of re-querying the orders table.
+
+    A unit of work's events are appended just before its transaction
+    commits, together with the state its orders are expected to have in the
+    database: resting price and remaining quantity, or not resting. A crash
+    between the two leaves at most the final line describing work that was
+    never committed, so on load that line is replayed only if the database
+    agrees with it. A failed commit invalidates the book, which is then
+    reloaded from the database and re-snapshotted over the journal.
+
+    Events:
+      accept - an order entered the book with its resting remainder
+      fill   - a resting order was reduced by a fill
+      cancel - a resting order was removed
+      resize - a resting order's quantity was reduced in place
+    """
+
+    def __init__(self, directory: str, snapshot_interval: int = 1000, fsync: bool = False):
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self._seqs: Dict[uuid.UUID, int] = {}
+        self._since_snapshot: Dict[uuid.UUID, int] = {}
+        if self.enabled:
+            os.makedirs(os.path.join(directory, "snapshots"), exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _journal_path(self, bond_id: uuid.UUID) -> str:
+        return os.path.join(self.directory, f"{bond_id}.journal")
+
+    def _snapshot_path(self, bond_id: uuid.UUID) -> str:
+        return os.path.join(self.directory, "snapshots", f"{bond_id}.json")
+
+    def _read_snapshot(self, bond_id: uuid.UUID) -> Optional[dict]:
+        try:
+            with open(self._snapshot_path(bond_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def read_entries(self, bond_id: uuid.UUID, after_seq: int = 0) -> Iterator[dict]:
+        """Yield a bond's journal lines, one per unit of work, whose sequence number is above `after_seq`"""
+        try:
+            with open(self._journal_path(bond_id)) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final write from a crash; it was never committed
+                        logger.warning(f"Ignoring truncated journal entry for bond {bond_id}")
+                        break
+                    if entry["seq"] > after_seq:
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    def _last_seq(self, bond_id: uuid.UUID) -> int:
+        seq = self._seqs.get(bond_id)
+        if seq is None:
+            snapshot = self._read_snapshot(bond_id)
+            seq = snapshot["seq"] if snapshot else 0
+            for entry in self.read_entries(bond_id, seq):
+                seq = entry["seq"]
+            self._seqs[bond_id] = seq
+        return seq
+
+    def forget(self, bond_id: uuid.UUID):
+        """Drop cached sequence state for a bond whose journal is now written by another process"""
+        self._seqs.pop(bond_id, None)
+        self._since_snapshot.pop(bond_id, None)
+
+    def _append(self, book: OrderBook, events: List[dict]):
+        bond_id = book.bond_id
+        seq = self._last_seq(bond_id) + len(events)
+        # The outcome the database must show for this line to have been committed
+        expect = {}
+        for event in events:
+            order_id = event["order"]["order_id"] if event["type"] == "accept" else event["order_id"]
+            resting = book.get(uuid.UUID(order_id))
+            expect[order_id] = [resting.price, resting.remaining] if resting is not None else None
+        with open(self._journal_path(bond_id), "a") as f:
+            f.write(json.dumps({"seq": seq, "events": events, "expect": expect}) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._seqs[bond_id] = seq
+        self._since_snapshot[bond_id] = self._since_snapshot.get(bond_id, 0) + len(events)
+
+    def order_events(self, book: OrderBook, order: Order, trades: List[Trade],
+                     requeued: bool = False) -> List[dict]:
+        """
+        Build the fill and accept events for a just-matched order. They must be
+        captured before later orders touch the book, and appended once the
+        unit of work is done, before it commits. An order that was taken out
+        of the book to be matched again, as an amend does, is cancelled first
+        so replay does not leave its old entry behind.
+        """
+        if not self.enabled:
+            return []
+        events = []
+        if requeued:
+            events.append({"type": "cancel", "order_id": str(order.id)})
+        for trade in trades:
+            maker_id = trade.sell_order_id if trade.buy_order_id == order.id else trade.buy_order_id
+            events.append({"type": "fill", "order_id": str(maker_id), "quantity": str(trade.quantity)})
+
+        resting = book.get(order.id)
+        events.append({
+            "type": "accept",
+            "order": _resting_to_dict(resting or RestingOrder.from_order(order)),
+            "rests": resting is not None
+        })
+        return events
+
+    def append(self, book: OrderBook, events: List[dict]):
+        """Append a unit of work's events for a book, once the book holds its outcome and before it commits"""
+        if not self.enabled or not events:
+            return
+        self._append(book, events)
+        self._maybe_snapshot(book)
+
+    def record_trades(self, book: OrderBook, trades: List[Trade]):
+        """Journal fills on both resting sides, as produced by an auction uncross"""
+        events = []
+        for trade in trades:
+            events.append({"type": "fill", "order_id": str(trade.buy_order_id), "quantity": str(trade.quantity)})
+            events.append({"type": "fill", "order_id": str(trade.sell_order_id), "quantity": str(trade.quantity)})
+        self.append(book, events)
+
+    def record_resize(self, book: OrderBook, order_id: uuid.UUID, remaining: Decimal):
+        """Journal an in-place quantity reduction of a resting order"""
+        self.append(book, [{"type": "resize", "order_id": str(order_id), "remaining": str(remaining)}])
+
+    def record_cancels(self, book: OrderBook, order_ids: List[uuid.UUID]):
+        """Journal the removal of resting orders"""
+        self.append(book, [{"type": "cancel", "order_id": str(order_id)} for order_id in order_ids])
+
+    def _maybe_snapshot(self, book: OrderBook):
+        if self._since_snapshot.get(book.bond_id, 0) >= self.snapshot_interval:
+            self.write_snapshot(book)
+
+    def write_snapshot(self, book: OrderBook):
+        """Persist the book at the current sequence and truncate the journal behind it"""
+        if not self.enabled:
+            return
+        seq = self._last_seq(book.bond_id)
+        snapshot = {
+            "bond_id": str(book.bond_id),
+            "seq": seq,
+            "taken_at": datetime.utcnow().isoformat(),
+            "bids": [_resting_to_dict(r) for r in book.orders("buy")],
+            "asks": [_resting_to_dict(r) for r in book.orders("sell")]
+        }
+        path = self._snapshot_path(book.bond_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        # Events up to `seq` are now covered by the snapshot. A crash before
+        # the truncate is harmless since replay skips them by sequence.
+        open(self._journal_path(book.bond_id), "w").close()
+        self._since_snapshot[book.bond_id] = 0
+
+    def load_book(self, db: Session, bond_id: uuid.UUID, repair: bool = True) -> Optional[OrderBook]:
+        """
+        Rebuild a book from its latest snapshot plus the journal tail. A final
+        line the database does not agree with was never committed and is
+        skipped; with `repair` the journal is re-snapshotted past it.
+        """
+        if not self.enabled:
+            return None
+        snapshot = self._read_snapshot(bond_id)
+        if snapshot is None:
+            return None
+
+        book = OrderBook(bond_id)
+        for data in snapshot["bids"] + snapshot["asks"]:
+            book.add(_resting_from_dict(data))
+
+        seq = snapshot["seq"]
+        replayed = 0
+        dropped = False
+        entries = self.read_entries(bond_id, seq)
+        entry = next(entries, None)
+        while entry is not None:
+            following = next(entries, None)
+            if following is None and not committed(db, entry):
+                logger.warning(f"Skipping uncommitted journal entry {entry['seq']} for bond {bond_id}")
+                dropped = True
+                break
+            for event in entry["events"]:
+                apply_event(book, event)
+            seq = entry["seq"]
+            replayed += len(entry["events"])
+            entry = following
+
+        if repair:
+            self._seqs[bond_id] = seq
+            self._since_snapshot[bond_id] = replayed
+            if dropped:
+                self.write_snapshot(book)
+        logger.info(f"Recovered order book for bond {bond_id} from snapshot and {replayed} journal events")
+        return book
+
+
+def committed(db: Session, entry: dict) -> bool:
+    """Whether the database shows the outcome a journal line expects for its orders"""
+    expect = entry["expect"]
+    if not expect:
+        return True
+    actual = dict.fromkeys(expect)
+    rows = db.query(Order.id, Order.price, Order.quantity, Order.filled_quantity, Order.status).filter(
+        Order.id.in_([uuid.UUID(order_id) for order_id in expect])
+    ).all()
+    for row in rows:
+        if row.status in ("open", "partial") and row.price is not None:
+            actual[str(row.id)] = [to_units(row.price), to_units(row.quantity - row.filled_quantity)]
+    return actual == expect
+
+
+def apply_event(book: OrderBook, event: dict):
+    """Apply a single journal event to a book"""
+    event_type = event["type"]
+    if event_type == "fill":
+        book.fill(uuid.UUID(event["order_id"]), to_units(event["quantity"]))
+    elif event_type == "accept":
+        if event.get("rests"):
+            book.add(_resting_from_dict(event["order"]))
+    elif event_type == "cancel":
+        book.remove(uuid.UUID(event["order_id"]))
+    elif event_type == "resize":
+        book.resize(uuid.UUID(event["order_id"]), to_units(event["remaining"]))
+    else:
+        logger.warning(f"Unknown journal event type: {event_type}")
+
+
+# Global order journal instance
+order_journal = OrderJournal(
+    settings.ORDER_JOURNAL_DIR,
+    snapshot_interval=settings.ORDER_SNAPSHOT_INTERVAL,
+    fsync=settings.ORDER_JOURNAL_FSYNC
+)
@@ -0,0 +1,171 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc, func, select, update
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.models import Bond, BondMarketSummary, Holding, Trade
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Trailing window of the 24h statistics
+SUMMARY_WINDOW = timedelta(hours=24)
+
+
+def refresh_window(db: Session, summary: BondMarketSummary):
+    """Recompute a summary's trade statistics from the trades table"""
+    bond_id = summary.bond_id
+    window_start = datetime.utcnow() - SUMMARY_WINDOW
+
+    stats = db.query(
+        func.sum(Trade.quantity * Trade.price).label("volume"),
+        func.max(Trade.price).label("high"),
+        func.min(Trade.price).label("low"),
+        func.count(Trade.id).label("trades_count"),
+        func.min(Trade.executed_at).label("oldest")
+    ).filter(
+        and_(Trade.bond_id == bond_id, Trade.executed_at >= window_start)
+    ).one()
+    last_trade = db.query(Trade.price, Trade.executed_at).filter(
+        Trade.bond_id == bond_id
+    ).order_by(desc(Trade.executed_at)).first()
+    reference = db.query(Trade.price).filter(
+        and_(Trade.bond_id == bond_id, Trade.executed_at < window_start)
+    ).order_by(desc(Trade.executed_at)).first()
+
+    summary.last_price = last_trade.price if last_trade else None
+    summary.last_trade_at = last_trade.executed_at if last_trade else None
+    summary.reference_price = reference[0] if reference else None
+    summary.volume_24h = stats.volume or Decimal('0')
+    summary.high_24h = stats.high
+    summary.low_24h = stats.low
+    summary.trades_count_24h = stats.trades_count or 0
+    summary.rolls_at = stats.oldest + SUMMARY_WINDOW if stats.oldest else None
+
+
+def create_summary(db: Session, bond_id: uuid.UUID) -> BondMarketSummary:
+    """Build a bond's summary from its trades and holdings and add it to the session"""
+    summary = BondMarketSummary(
+        bond_id=bond_id,
+        outstanding_quantity=db.query(func.sum(Holding.quantity)).filter(
+            Holding.bond_id == bond_id
+        ).scalar() or Decimal('0')
+    )
+    refresh_window(db, summary)
+    db.add(summary)
+    return summary
+
+
+def ensure_summaries(db: Session, bond_ids: Optional[Iterable[uuid.UUID]] = None) -> int:
+    """Create the missing summaries of some or all bonds, returning how many were created"""
+    query = db.query(Bond.id).outerjoin(BondMarketSummary, BondMarketSummary.bond_id == Bond.id).filter(
+        BondMarketSummary.bond_id.is_(None)
+    )
+    if bond_ids is not None:
+        query = query.filter(Bond.id.in_(list(bond_ids)))
+    missing = [row.id for row in query.all()]
+    for bond_id in missing:
+        create_summary(db, bond_id)
+    return len(missing)
+
+
+def apply_trades(db: Session, bond_id: uuid.UUID, trades: List[Trade]):
+    """
+    Fold a unit of work's trades into the bond's summary, in the same
+    transaction. Must run on the bond's sequencer, its only writer.
+    """
+    if not trades:
+        return
+    summary = db.get(BondMarketSummary, bond_id)
+    if summary is None:
+        # Flush the new trades and holdings so the aggregates read include them
+        db.flush()
+        create_summary(db, bond_id)
+        return
+
+    prices = [trade.price for trade in trades]
+    if summary.high_24h is not None:
+        prices.append(summary.high_24h)
+    if summary.low_24h is not None:
+        prices.append(summary.low_24h)
+    summary.last_price = trades[-1].price
+    summary.last_trade_at = trades[-1].executed_at
+    summary.volume_24h = (summary.volume_24h or Decimal('0')) + sum(trade.quantity * trade.price for trade in trades)
+    summary.high_24h = max(prices)
+    summary.low_24h = min(prices)
+    summary.trades_count_24h = (summary.trades_count_24h or 0) + len(trades)
+    if summary.rolls_at is None:
+        summary.rolls_at = trades[0].executed_at + SUMMARY_WINDOW
+
+
+def refresh_outstanding(db: Session, bond_ids: Iterable[uuid.UUID]):
+    """Recompute the outstanding quantity of bonds after holdings change outside matching"""
+    bond_ids = list(bond_ids)
+    if not bond_ids:
+        return
+    db.execute(
+        update(BondMarketSummary)
+        .where(BondMarketSummary.bond_id.in_(bond_ids))
+        .values(outstanding_quantity=select(
+            func.coalesce(func.sum(Holding.quantity), 0)
+        ).where(Holding.bond_id == BondMarketSummary.bond_id).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+
+class MarketSummaryRoller:
+    """
+    Drops trades that left the 24h window from bond summaries.
+
+    Trades only ever add to a summary, so a bond is re-aggregated once its
+    oldest in-window trade is more than a day old (`rolls_at`), found with
+    an indexed lookup. The re-aggregation runs on the bond's sequencer so it
+    is ordered with the trades folded in by the matching engine.
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="market-summary-roller")
+
+    def due(self) -> List[uuid.UUID]:
+        with SessionLocal() as db:
+            return [row.bond_id for row in db.query(BondMarketSummary.bond_id).filter(
+                BondMarketSummary.rolls_at <= datetime.utcnow()
+            ).all()]
+
+    async def _run(self):
+        from app.services.sequencer import EngineCall, matching_sequencer
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                bond_ids = self.due()
+            except Exception as e:
+                logger.error(f"Finding market summaries to roll failed: {e}")
+                continue
+            for bond_id in bond_ids:
+                try:
+                    await matching_sequencer.submit(bond_id, EngineCall("roll_market_summary", bond_id))
+                except Exception as e:
+                    logger.error(f"Rolling market summary for bond {bond_id} failed: {e}")
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global market summary roller instance
+market_summary_roller = MarketSummaryRoller(settings.MARKET_SUMMARY_ROLL_SECONDS)
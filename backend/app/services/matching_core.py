@@ -0,0 +1,118 @@
+import uuid
+from typing import List, NamedTuple, Optional, Set, Tuple
+from app.services.order_book import OrderBook, RestingOrder
+
+
+class Fill(NamedTuple):
+    """One execution between an incoming order and a resting maker, at the maker's price, in ticks and lots"""
+    maker_order_id: uuid.UUID
+    taker_order_id: uuid.UUID
+    buy_order_id: uuid.UUID
+    sell_order_id: uuid.UUID
+    buyer_id: uuid.UUID
+    seller_id: uuid.UUID
+    price: int
+    quantity: int
+
+
+class LevelDelta(NamedTuple):
+    """New aggregate size of a price level; zero means the level is gone"""
+    side: str
+    price: int
+    quantity: int
+
+
+class MatchResult(NamedTuple):
+    fills: List[Fill]
+    remaining: int  # Unfilled quantity of the incoming order
+    rested: bool  # Whether the remainder was added to the book
+    deltas: List[LevelDelta]
+
+
+def _level_deltas(book: OrderBook, touched: Set[Tuple[str, int]]) -> List[LevelDelta]:
+    return [LevelDelta(side, price, book.level_quantity(side, price)) for side, price in touched]
+
+
+def match_order(book: OrderBook, taker: RestingOrder, rest: bool = True) -> MatchResult:
+    """
+    Match an incoming order against the opposite side of a book in
+    price-time priority.
+
+    Buys match asks priced at or below their limit and sells match bids
+    priced at or above it, always at the resting order's price. A taker
+    without a price matches at any price. Resting orders of the same user
+    are skipped. The book is updated in place and the unfilled remainder
+    rests when `rest` is set. `taker.remaining` is the quantity to match
+    and is reduced by the fills. Prices and quantities are integer ticks
+    and lots throughout; callers convert to Decimal when persisting.
+    """
+    opposite_side = "sell" if taker.side == "buy" else "buy"
+    fills = []
+    touched: Set[Tuple[str, int]] = set()
+
+    for resting in book.iter_crossing(opposite_side, taker.price):
+        if taker.remaining <= 0:
+            break
+
+        if resting.user_id == taker.user_id:
+            continue  # Can't trade with yourself
+
+        quantity = min(taker.remaining, resting.remaining)
+        if taker.side == "buy":
+            buy, sell = taker, resting
+        else:
+            buy, sell = resting, taker
+        fills.append(Fill(
+            maker_order_id=resting.order_id,
+            taker_order_id=taker.order_id,
+            buy_order_id=buy.order_id,
+            sell_order_id=sell.order_id,
+            buyer_id=buy.user_id,
+            seller_id=sell.user_id,
+            price=resting.price,
+            quantity=quantity
+        ))
+        book.fill_resting(resting, quantity)
+        taker.remaining -= quantity
+        touched.add((opposite_side, resting.price))
+
+    rested = rest and taker.remaining > 0
+    if rested:
+        book.add(taker)
+        touched.add((taker.side, taker.price))
+
+    return MatchResult(fills, taker.remaining, rested, _level_deltas(book, touched))
+
+
+def can_fill(book: OrderBook, taker: RestingOrder) -> bool:
+    """
+    Whether an incoming order would be filled in full by the book as it
+    stands, as fill-or-kill requires, without changing the book. Stops at
+    the first level that completes it.
+    """
+    opposite_side = "sell" if taker.side == "buy" else "buy"
+    needed = taker.remaining
+    for resting in book.iter_crossing(opposite_side, taker.price):
+        if resting.user_id != taker.user_id:
+            needed -= resting.remaining
+            if needed <= 0:
+                return True
+    return needed <= 0
+
+
+def cancel_order(book: OrderBook, order_id: uuid.UUID) -> Optional[LevelDelta]:
+    """Remove a resting order, returning the change to its level if it was in the book"""
+    resting = book.remove(order_id)
+    if resting is None:
+        return None
+    return LevelDelta(resting.side, resting.price, book.level_quantity(resting.side, resting.price))
+
+
+def resize_order(book: OrderBook, order_id: uuid.UUID, remaining: int) -> Optional[LevelDelta]:
+    """Change a resting order's remaining quantity in place, returning the change to its level"""
+    resting = book.get(order_id)
+    if resting is None:
+        return None
+    book.resize(order_id, remaining)
+    return LevelDelta(resting.side, resting.price, book.level_quantity(resting.side, resting.price))
+
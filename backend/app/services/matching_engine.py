@@ -1,145 +1,353 @@
 import uuid
-from typing import List, Optional, Tuple
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.models.models import Order, Trade, Holding, User, Bond
+from sqlalchemy import and_, or_, func, update
+from app.models.models import Order, Trade, Holding, User, Bond, BondMarketSummary
 from app.core.websocket import ConnectionManager
-from datetime import datetime
+from app.services.order_book import OrderBook, RestingOrder, order_books
+from app.services import matching_core
+from app.services.book_cache import book_cache
+from app.services.book_feed import BookPage, book_feed
+from app.services.event_loop import call_soon
+from app.services.expiry import order_expiry
+from app.services.fixed_point import from_units, to_units
+from app.services.journal import order_journal
+from app.services import candles, market_summary
+from app.services.auction import auction_scheduler, get_auction_interval, uncross
+from app.services.reservations import InsufficientHoldingsError, holding_ledger
+from app.services.stop_book import STOP_ORDER_TYPES, StopBook, stop_books
+from app.services.trade_stats import trade_stats
+from app.services.yield_curve import yield_curve
+from datetime import datetime, timezone
 import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Time in force of orders whose unfilled remainder rests in the book
+RESTING_TIME_IN_FORCE = ("GTC", "GTD")
+# Order types that match at any price and never rest
+MARKET_ORDER_TYPES = ("market", "stop")
+
 class MatchingEngine:
     def __init__(self, db: Session, ws_manager: ConnectionManager):
         self.db = db
         self.ws_manager = ws_manager
+        # State of the current unit of work, persisted on commit
+        self._pending_orders: Dict[uuid.UUID, Order] = {}  # Added, not yet flushed
+        self._holding_deltas: Dict[uuid.UUID, Decimal] = {}  # Net holding change per user
+        self._locked_deltas: Dict[uuid.UUID, Decimal] = {}  # Net reservation change per user
+        # Price levels (side, ticks) changed since the last book update was published
+        self._touched: Set[Tuple[str, int]] = set()
     
     def process_order(self, order: Order) -> List[Trade]:
         """
         Process an order through the matching engine
         Returns list of trades created
-        """
-        trades = []
-        
-        if order.side == "buy":
-            trades = self._match_buy_order(order)
-        else:
-            trades = self._match_sell_order(order)
         
-        # Update order status
-        self._update_order_status(order)
+        The order insert (if it is new), trades, fill quantities, status
+        changes and holding deltas are committed as a single transaction.
+        Raises InsufficientHoldingsError if a sell exceeds available holdings.
+        """
+        trades = self.process_orders([order])[0]
+        if order.status == "rejected":
+            raise InsufficientHoldingsError("Insufficient holdings for sell order")
+        return trades
+    
+    def process_orders(self, orders: List[Order]) -> List[List[Trade]]:
+        """
+        Process orders for one bond in sequence within a single transaction
+        Returns the trades created for each order
+        
+        Sells that exceed the seller's available holdings are not persisted
+        and are left with status "rejected". Market, IOC and FOK orders never
+        rest: their unfilled remainder is cancelled, and a FOK order that the
+        book cannot fill in full is cancelled without trading. Call-auction
+        bonds only match at their uncross, so such orders are cancelled
+        unfilled there; the API rejects them before they get here.
+        
+        Stop orders arrive with status "pending" and wait in the bond's stop
+        book until the last price reaches their stop price. The stops
+        crossed by an order's trades are processed right after it, in
+        trigger order, within the same transaction.
+        """
+        if not orders:
+            return []
+        bond_id = orders[0].bond_id
+        book = order_books.get(self.db, bond_id)
+        stops = stop_books.get(self.db, bond_id)
+        auction_interval = get_auction_interval(self.db.get(Bond, bond_id))
+        
+        input_ids = {order.id for order in orders}
+        queue = deque(orders)
+        results = []
+        all_trades = []
+        journal_events = []
+        try:
+            while queue:
+                order = queue.popleft()
+                if order.filled_quantity is None:
+                    order.filled_quantity = Decimal('0')
+                if order.status is None:
+                    order.status = "open"
+                
+                # Lock the sell quantity up front so resting sells can never
+                # oversell. Triggered stops were locked when they arrived.
+                triggered = order.type in STOP_ORDER_TYPES and order.status != "pending"
+                if order.side == "sell" and not triggered:
+                    try:
+                        self._reserve(order.user_id, bond_id, order.quantity - order.filled_quantity)
+                    except InsufficientHoldingsError:
+                        order.status = "rejected"
+                        results.append([])
+                        continue
+                
+                self.db.add(order)
+                self._pending_orders[order.id] = order
+                
+                # Hold stops back until the last price reaches their stop price
+                if order.status == "pending":
+                    stop_price = to_units(order.stop_price)
+                    if not stops.crossed(order.side, stop_price):
+                        stops.add(order.id, order.side, stop_price)
+                        if order.expires_at is not None:
+                            order_expiry.schedule(bond_id, order.id, order.expires_at)
+                        results.append([])
+                        continue
+                    order.status = "open"
+                
+                # The incoming order may already be persisted as open; it must
+                # not rest in the book until it has been matched
+                self._touch(book.remove(order.id))
+                
+                rests = order.type not in MARKET_ORDER_TYPES and (order.time_in_force or "GTC") in RESTING_TIME_IN_FORCE
+                if auction_interval:
+                    # Call-auction bonds only collect orders until the next uncross
+                    trades = []
+                    if rests:
+                        auction_scheduler.ensure(bond_id, auction_interval)
+                elif order.time_in_force == "FOK" and not matching_core.can_fill(book, RestingOrder.from_order(order)):
+                    trades = []
+                else:
+                    trades = self._match_order(order, book)
+                
+                # Update order status
+                self._update_order_status(order)
+                
+                # Rest any unfilled remainder, or cancel it
+                if order.status in ["open", "partial"]:
+                    if rests:
+                        self._rest(book, order)
+                    else:
+                        order.status = "cancelled"
+                        if order.side == "sell":
+                            self._release(order.user_id, bond_id, order.quantity - order.filled_quantity)
+                
+                journal_events.extend(order_journal.order_events(book, order, trades))
+                all_trades.extend(trades)
+                if order.id in input_ids:
+                    results.append(trades)
+                
+                # Stops crossed by the last trade go next
+                if trades:
+                    queue.extendleft(reversed(self._trigger_stops(stops, trades[-1].price)))
+            
+            # Persist every match as one unit of work, journaled ahead of the commit
+            self.db.add_all(all_trades)
+            self._update_holdings(bond_id)
+            market_summary.apply_trades(self.db, bond_id, all_trades)
+            candles.apply_trades(self.db, bond_id, all_trades)
+            order_journal.append(book, journal_events)
+            self.db.commit()
+        except Exception:
+            self._rollback(bond_id)
+            raise
+        finally:
+            self._reset()
+        
+        for trade in all_trades:
+            logger.info(f"Trade created: {trade.id} - {trade.quantity} @ {trade.price} - TX: {trade.tx_hash}")
         
         # Broadcast updates via WebSocket
-        self._broadcast_updates(order, trades)
+        self._broadcast_updates(bond_id, all_trades)
         
-        return trades
+        return results
     
-    def _match_buy_order(self, buy_order: Order) -> List[Trade]:
-        """Match a buy order with existing sell orders"""
-        trades = []
-        
-        # Find matching sell orders (price <= buy_order.price)
-        # Ordered by price (ascending) then created_at (ascending) for price-time priority
-        matching_orders = self.db.query(Order).filter(
-            and_(
-                Order.bond_id == buy_order.bond_id,
-                Order.side == "sell",
-                Order.status.in_(["open", "partial"]),
-                Order.price <= buy_order.price,
-                Order.user_id != buy_order.user_id  # Can't trade with yourself
-            )
-        ).order_by(Order.price.asc(), Order.created_at.asc()).all()
+    def _rollback(self, bond_id: uuid.UUID):
+        """Abort the unit of work; the database is the source of truth, so cached state is rebuilt from it"""
+        self.db.rollback()
+        order_books.invalidate(bond_id)
+        stop_books.invalidate(bond_id)
+        holding_ledger.invalidate(bond_id=bond_id)
+        # Clients resync from a snapshot of the rebuilt book
+        self._touched.clear()
+        book_feed.invalidate(bond_id)
+    
+    def _reset(self):
+        self._pending_orders.clear()
+        self._holding_deltas.clear()
+        self._locked_deltas.clear()
+    
+    def _touch(self, level):
+        """Record the price level of a LevelDelta or RestingOrder as changed"""
+        if level is not None:
+            self._touched.add((level.side, level.price))
+    
+    def _rest(self, book: OrderBook, order: Order):
+        """Rest an order's unfilled remainder in the book, scheduling its expiry if it has one"""
+        resting = RestingOrder.from_order(order)
+        book.add(resting)
+        self._touched.add((resting.side, resting.price))
+        if order.expires_at is not None:
+            order_expiry.schedule(order.bond_id, order.id, order.expires_at)
+    
+    def _trigger_stops(self, stops: StopBook, price: Decimal) -> List[Order]:
+        """Pop the stops crossed by a trade price and load them as open orders, in trigger order"""
+        order_ids = stops.trigger(to_units(price))
+        if not order_ids:
+            return []
+        
+        orders = dict(self._pending_orders)
+        missing = set(order_ids) - orders.keys()
+        if missing:
+            orders.update({
+                order.id: order
+                for order in self.db.query(Order).filter(Order.id.in_(list(missing))).all()
+            })
         
-        remaining_quantity = buy_order.quantity - buy_order.filled_quantity
+        triggered = []
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if order is not None and order.status == "pending":
+                order.status = "open"
+                triggered.append(order)
+        return triggered
+    
+    def _process_triggered_stops(self, bond_id: uuid.UUID, trades: List[Trade]):
+        """Process the stops crossed by trades committed outside process_orders, as a follow-on unit of work"""
+        if not trades:
+            return
+        triggered = self._trigger_stops(stop_books.get(self.db, bond_id), trades[-1].price)
+        if triggered:
+            self.process_orders(triggered)
+    
+    def _reserve(self, user_id: uuid.UUID, bond_id: uuid.UUID, quantity: Decimal):
+        """Lock holdings for a sell in the ledger and in this unit of work"""
+        holding_ledger.reserve(self.db, user_id, bond_id, quantity)
+        self._locked_deltas[user_id] = self._locked_deltas.get(user_id, Decimal('0')) + quantity
+    
+    def _release(self, user_id: uuid.UUID, bond_id: uuid.UUID, quantity: Decimal):
+        """Unlock holdings of a cancelled or reduced sell"""
+        holding_ledger.release(user_id, bond_id, quantity)
+        self._locked_deltas[user_id] = self._locked_deltas.get(user_id, Decimal('0')) - quantity
+    
+    def _match_order(self, taker: Order, book: OrderBook) -> List[Trade]:
+        """Match an incoming order with the matching core and persist the resulting fills"""
+        result = matching_core.match_order(book, RestingOrder.from_order(taker), rest=False)
+        for delta in result.deltas:
+            self._touch(delta)
+        if not result.fills:
+            return []
+        
+        # Load every maker not already in this unit of work in one query
+        maker_ids = {fill.maker_order_id for fill in result.fills} - self._pending_orders.keys()
+        makers = dict(self._pending_orders)
+        if maker_ids:
+            makers.update({
+                order.id: order
+                for order in self.db.query(Order).filter(Order.id.in_(list(maker_ids))).all()
+            })
         
-        for sell_order in matching_orders:
-            if remaining_quantity <= 0:
-                break
-            
-            available_quantity = sell_order.quantity - sell_order.filled_quantity
-            if available_quantity <= 0:
-                continue
-            
-            # Determine trade quantity
-            trade_quantity = min(remaining_quantity, available_quantity)
-            trade_price = sell_order.price  # Taker pays maker's price
-            
-            # Create trade
-            trade = self._create_trade(buy_order, sell_order, trade_quantity, trade_price)
-            trades.append(trade)
-            
-            # Update order filled quantities
-            buy_order.filled_quantity += trade_quantity
-            sell_order.filled_quantity += trade_quantity
-            
-            # Update holdings
-            self._update_holdings(buy_order.user_id, sell_order.user_id, 
-                                buy_order.bond_id, trade_quantity)
+        trades = []
+        for fill in result.fills:
+            maker = makers.get(fill.maker_order_id)
+            if maker is None or maker.status not in ["open", "partial"]:
+                # The unit of work is rolled back and the book rebuilt from the database
+                raise RuntimeError(f"Order book for bond {book.bond_id} is out of sync at order {fill.maker_order_id}")
             
-            remaining_quantity -= trade_quantity
+            buy_order, sell_order = (taker, maker) if taker.side == "buy" else (maker, taker)
+            trades.append(self._fill(buy_order, sell_order, from_units(fill.quantity), from_units(fill.price)))
             
-            # Update sell order status
-            self._update_order_status(sell_order)
+            # Update maker order status
+            self._update_order_status(maker)
         
         return trades
     
-    def _match_sell_order(self, sell_order: Order) -> List[Trade]:
-        """Match a sell order with existing buy orders"""
-        trades = []
+    def _fill(self, buy_order: Order, sell_order: Order, quantity: Decimal, price: Decimal) -> Trade:
+        """Create a trade between two orders and record its fill quantities and holding changes"""
+        trade = self._create_trade(buy_order, sell_order, quantity, price)
+        
+        # Update order filled quantities
+        buy_order.filled_quantity += quantity
+        sell_order.filled_quantity += quantity
+        
+        # Accumulate holding changes, applied once per unit of work. The
+        # seller's filled quantity leaves their reservation with the holding.
+        deltas = self._holding_deltas
+        deltas[buy_order.user_id] = deltas.get(buy_order.user_id, Decimal('0')) + quantity
+        deltas[sell_order.user_id] = deltas.get(sell_order.user_id, Decimal('0')) - quantity
+        self._locked_deltas[sell_order.user_id] = self._locked_deltas.get(sell_order.user_id, Decimal('0')) - quantity
+        holding_ledger.apply_fill(buy_order.user_id, sell_order.user_id, buy_order.bond_id, quantity)
         
-        # Find matching buy orders (price >= sell_order.price)
-        # Ordered by price (descending) then created_at (ascending) for price-time priority
-        matching_orders = self.db.query(Order).filter(
-            and_(
-                Order.bond_id == sell_order.bond_id,
-                Order.side == "buy",
-                Order.status.in_(["open", "partial"]),
-                Order.price >= sell_order.price,
-                Order.user_id != sell_order.user_id  # Can't trade with yourself
-            )
-        ).order_by(Order.price.desc(), Order.created_at.asc()).all()
+        return trade
+    
+    def run_auction(self, bond_id: uuid.UUID) -> List[Trade]:
+        """
+        Uncross a call-auction bond's book at a single price
+        All fills are settled in one transaction and returned as trades
+        """
+        book = order_books.get(self.db, bond_id)
+        result = uncross(list(book.orders("buy")), list(book.orders("sell")))
+        if result is None:
+            return []
         
-        remaining_quantity = sell_order.quantity - sell_order.filled_quantity
+        order_ids = {fill.buy.order_id for fill in result.fills} | {fill.sell.order_id for fill in result.fills}
+        orders = {order.id: order for order in self.db.query(Order).filter(Order.id.in_(list(order_ids))).all()}
         
-        for buy_order in matching_orders:
-            if remaining_quantity <= 0:
-                break
-            
-            available_quantity = buy_order.quantity - buy_order.filled_quantity
-            if available_quantity <= 0:
-                continue
-            
-            # Determine trade quantity
-            trade_quantity = min(remaining_quantity, available_quantity)
-            trade_price = buy_order.price  # Taker gets maker's price
-            
-            # Create trade
-            trade = self._create_trade(buy_order, sell_order, trade_quantity, trade_price)
-            trades.append(trade)
-            
-            # Update order filled quantities
-            buy_order.filled_quantity += trade_quantity
-            sell_order.filled_quantity += trade_quantity
-            
-            # Update holdings
-            self._update_holdings(buy_order.user_id, sell_order.user_id,
-                                sell_order.bond_id, trade_quantity)
+        price = from_units(result.price)
+        trades = []
+        try:
+            for fill in result.fills:
+                trades.append(self._fill(orders[fill.buy.order_id], orders[fill.sell.order_id],
+                                         from_units(fill.quantity), price))
+                book.fill(fill.buy.order_id, fill.quantity)
+                book.fill(fill.sell.order_id, fill.quantity)
+                self._touch(fill.buy)
+                self._touch(fill.sell)
             
-            remaining_quantity -= trade_quantity
+            for order in orders.values():
+                self._update_order_status(order)
             
-            # Update buy order status
-            self._update_order_status(buy_order)
+            self.db.add_all(trades)
+            self._update_holdings(bond_id)
+            market_summary.apply_trades(self.db, bond_id, trades)
+            candles.apply_trades(self.db, bond_id, trades)
+            order_journal.record_trades(book, trades)
+            self.db.commit()
+        except Exception:
+            self._rollback(bond_id)
+            raise
+        finally:
+            self._reset()
+        
+        logger.info(f"Auction uncrossed bond {bond_id}: {from_units(result.volume)} @ {price} in {len(trades)} trades")
+        
+        # Broadcast the book and trades once for the whole auction
+        if trades:
+            self._broadcast_updates(bond_id, trades)
+        
+        self._process_triggered_stops(bond_id, trades)
         
         return trades
     
     def _create_trade(self, buy_order: Order, sell_order: Order, 
                      quantity: Decimal, price: Decimal) -> Trade:
-        """Create a trade record"""
+        """Create a trade record (persisted with the rest of the match)"""
         from app.api.api_v1.endpoints.orders import generate_mock_tx_hash
         
-        trade = Trade(
+        return Trade(
             id=uuid.uuid4(),
             buy_order_id=buy_order.id,
             sell_order_id=sell_order.id,
@@ -149,45 +357,43 @@ class MatchingEngine:
             executed_at=datetime.utcnow(),
             tx_hash=generate_mock_tx_hash()  # Add transaction hash
         )
-        
-        self.db.add(trade)
-        self.db.commit()
-        
-        logger.info(f"Trade created: {trade.id} - {quantity} @ {price} - TX: {trade.tx_hash}")
-        
-        return trade
     
-    def _update_holdings(self, buyer_id: uuid.UUID, seller_id: uuid.UUID, 
-                        bond_id: uuid.UUID, quantity: Decimal):
-        """Update user holdings after a trade"""
-        
-        # Update buyer's holdings (increase)
-        buyer_holding = self.db.query(Holding).filter(
-            and_(Holding.user_id == buyer_id, Holding.bond_id == bond_id)
-        ).first()
-        
-        if buyer_holding:
-            buyer_holding.quantity += quantity
-        else:
-            buyer_holding = Holding(
-                user_id=buyer_id,
-                bond_id=bond_id,
-                quantity=quantity
-            )
-            self.db.add(buyer_holding)
-        
-        # Update seller's holdings (decrease)
-        seller_holding = self.db.query(Holding).filter(
-            and_(Holding.user_id == seller_id, Holding.bond_id == bond_id)
-        ).first()
-        
-        if seller_holding:
-            seller_holding.quantity -= quantity
-            # Remove holding if quantity becomes zero
-            if seller_holding.quantity <= 0:
-                self.db.delete(seller_holding)
+    def _update_holdings(self, bond_id: uuid.UUID):
+        """
+        Apply the unit of work's net holding and reservation changes,
+        loading all affected holdings in one query
+        """
+        deltas = {user_id: delta for user_id, delta in self._holding_deltas.items() if delta != 0}
+        locked = {user_id: delta for user_id, delta in self._locked_deltas.items() if delta != 0}
+        user_ids = set(deltas) | set(locked)
+        if not user_ids:
+            return
+        
+        holdings = {
+            holding.user_id: holding
+            for holding in self.db.query(Holding).filter(
+                and_(Holding.bond_id == bond_id, Holding.user_id.in_(list(user_ids)))
+            ).all()
+        }
         
-        self.db.commit()
+        for user_id in user_ids:
+            delta = deltas.get(user_id, Decimal('0'))
+            holding = holdings.get(user_id)
+            if holding:
+                holding.quantity += delta
+                holding.locked_quantity = max(
+                    (holding.locked_quantity or Decimal('0')) + locked.get(user_id, Decimal('0')), Decimal('0')
+                )
+                # Remove holding if quantity becomes zero
+                if holding.quantity <= 0:
+                    self.db.delete(holding)
+            elif delta > 0:
+                self.db.add(Holding(
+                    user_id=user_id,
+                    bond_id=bond_id,
+                    quantity=delta,
+                    locked_quantity=Decimal('0')
+                ))
     
     def _update_order_status(self, order: Order):
         """Update order status based on filled quantity"""
@@ -195,30 +401,52 @@ class MatchingEngine:
             order.status = "filled"
         elif order.filled_quantity > 0:
             order.status = "partial"
-        
-        self.db.commit()
     
-    def _broadcast_updates(self, order: Order, trades: List[Trade]):
+    def _broadcast_updates(self, bond_id: uuid.UUID, trades: List[Trade]):
         """Broadcast updates via WebSocket"""
         try:
-            # Run async broadcast in event loop
-            asyncio.create_task(self._async_broadcast_updates(order, trades))
+            # Sequence the changed levels now, before later work moves the book
+            book = order_books.get(self.db, bond_id)
+            book_update = book_feed.publish(book, self._touched)
+            if book_update is not None:
+                book_cache.publish(book)
+            self._touched.clear()
+            trade_stats.record(bond_id, trades)
+            if trades:
+                yield_curve.record(bond_id, trades[-1].price)
+            
+            # Look up the traders here, as the session belongs to this thread
+            user_ids = set()
+            for trade in trades:
+                buy_order = self.db.get(Order, trade.buy_order_id)
+                sell_order = self.db.get(Order, trade.sell_order_id)
+                if buy_order and sell_order:
+                    user_ids.update((buy_order.user_id, sell_order.user_id))
+            
+            # Run async broadcast in event loop, which may belong to another thread
+            call_soon(self._send_updates, bond_id, trades, book_update, user_ids)
+        except Exception as e:
+            logger.error(f"Error broadcasting updates: {e}")
+    
+    def _send_updates(self, bond_id: uuid.UUID, trades: List[Trade], book_update: Optional[dict],
+                      user_ids: Set[uuid.UUID]):
+        try:
+            asyncio.create_task(self._async_broadcast_updates(bond_id, trades, book_update, user_ids))
         except Exception as e:
             logger.error(f"Error broadcasting updates: {e}")
     
-    async def _async_broadcast_updates(self, order: Order, trades: List[Trade]):
+    async def _async_broadcast_updates(self, bond_id: uuid.UUID, trades: List[Trade],
+                                      book_update: Optional[dict] = None,
+                                      user_ids: Optional[Set[uuid.UUID]] = None):
         """Async implementation of broadcast updates"""
         try:
-            # Broadcast orderbook update
-            orderbook = self.get_orderbook(order.bond_id)
-            await self.ws_manager.broadcast_to_room(f"bond_{order.bond_id}", {
-                "type": "orderbook_update",
-                "data": orderbook
-            })
+            # Broadcast the changed price levels, or a periodic snapshot
+            if book_update is not None:
+                await self.ws_manager.broadcast_to_room(f"bond_{bond_id}", book_update)
             
             # Broadcast trade updates
             for trade in trades:
-                await self.ws_manager.broadcast_to_room(f"bond_{order.bond_id}", {
+                await self.ws_manager.broadcast_to_room(f"bond_{bond_id}", {
                     "type": "trade",
                     "data": {
                         "id": str(trade.id),
@@ -229,16 +457,7 @@ class MatchingEngine:
                 })
             
             # Broadcast portfolio updates to affected users
-            affected_users = set()
-            if trades:
-                for trade in trades:
-                    buy_order = self.db.query(Order).filter(Order.id == trade.buy_order_id).first()
-                    sell_order = self.db.query(Order).filter(Order.id == trade.sell_order_id).first()
-                    if buy_order and sell_order:
-                        affected_users.add(buy_order.user_id)
-                        affected_users.add(sell_order.user_id)
-                
-                for user_id in affected_users:
+            for user_id in user_ids or ():
                     await self.ws_manager.broadcast_to_user(str(user_id), {
                         "type": "portfolio_update",
                         "message": "Your portfolio has been updated"
@@ -247,8 +466,37 @@ class MatchingEngine:
         except Exception as e:
             logger.error(f"Error in async broadcast updates: {e}")
     
+    def load_book(self, bond_id: uuid.UUID) -> int:
+        """Load a bond's resident book, starting its expiry and auction clocks; returns its order count"""
+        return len(order_books.get(self.db, bond_id))
+    
+    def book_snapshot(self, bond_id: uuid.UUID) -> dict:
+        """Full-depth L2 snapshot of the resident book at its current feed sequence number"""
+        return book_feed.snapshot(order_books.get(self.db, bond_id))
+    
+    def book_page(self, bond_id: uuid.UUID, side: str, after: Optional[Decimal] = None,
+                  limit: int = 1000) -> BookPage:
+        """One page of full-depth, per-order book data for a side of the resident book"""
+        return book_feed.page(order_books.get(self.db, bond_id), side, after, limit)
+    
+    def roll_market_summary(self, bond_id: uuid.UUID):
+        """Re-aggregate a bond's market summary once trades have left its 24h window"""
+        summary = self.db.get(BondMarketSummary, bond_id)
+        if summary is None:
+            return
+        try:
+            market_summary.refresh_window(self.db, summary)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+    
+    def publish_book_levels(self, bond_id: uuid.UUID):
+        """Push the top of the resident book to the REST orderbook cache"""
+        book_cache.publish(order_books.get(self.db, bond_id))
+    
     def get_orderbook(self, bond_id: uuid.UUID) -> dict:
-        """Get current orderbook for a bond"""
+        """Get current orderbook for a bond from the database, one entry per order"""
         
         # Get buy orders (bids) - highest price first
         buy_orders = self.db.query(Order).filter(
@@ -257,7 +505,7 @@ class MatchingEngine:
                 Order.side == "buy",
                 Order.status.in_(["open", "partial"])
             )
-        ).order_by(Order.price.desc()).limit(10).all()
+        ).order_by(Order.price.desc(), Order.created_at.asc()).limit(10).all()
         
         # Get sell orders (asks) - lowest price first
         sell_orders = self.db.query(Order).filter(
@@ -266,7 +514,7 @@ class MatchingEngine:
                 Order.side == "sell",
                 Order.status.in_(["open", "partial"])
             )
-        ).order_by(Order.price.asc()).limit(10).all()
+        ).order_by(Order.price.asc(), Order.created_at.asc()).limit(10).all()
         
         bids = [
             {
@@ -298,13 +546,193 @@ class MatchingEngine:
             and_(Order.id == order_id, Order.user_id == user_id)
         ).first()
         
-        if not order or order.status not in ["open", "partial"]:
+        if not order or order.status not in ["open", "partial", "pending"]:
             return False
         
+        book = order_books.get(self.db, order.bond_id)
         order.status = "cancelled"
-        self.db.commit()
+        try:
+            if order.side == "sell":
+                self._release(order.user_id, order.bond_id, order.quantity - order.filled_quantity)
+                self._update_holdings(order.bond_id)
+            delta = matching_core.cancel_order(book, order.id)
+            if delta is not None:
+                self._touch(delta)
+                order_journal.record_cancels(book, [order.id])
+            self.db.commit()
+        except Exception:
+            self._rollback(order.bond_id)
+            raise
+        finally:
+            self._reset()
+        
+        order_expiry.discard(order.id)
+        stop_books.get(self.db, order.bond_id).remove(order.id)
         
         # Broadcast orderbook update
-        self._broadcast_updates(order, [])
+        self._broadcast_updates(order.bond_id, [])
         
         return True
+    
+    def amend_order(self, order_id: uuid.UUID, user_id: uuid.UUID, price: Optional[Decimal] = None,
+                    quantity: Optional[Decimal] = None) -> Optional[Order]:
+        """
+        Amend the price and/or total quantity of an open order atomically
+        
+        Reducing quantity keeps the order's queue position. Increasing it
+        sends the order to the back of its level, and a new price reprices
+        it and matches it against the book like an incoming order.
+        Returns the amended order, or None if it cannot be amended.
+        """
+        order = self.db.query(Order).filter(
+            and_(Order.id == order_id, Order.user_id == user_id)
+        ).first()
+        
+        if not order or order.status not in ["open", "partial"]:
+            return None
+        
+        if quantity is not None and quantity <= order.filled_quantity:
+            raise ValueError("Quantity must exceed the filled quantity")
+        
+        if order.side == "sell" and quantity is not None and quantity != order.quantity:
+            # Lock or unlock the change in remaining quantity
+            try:
+                if quantity > order.quantity:
+                    self._reserve(user_id, order.bond_id, quantity - order.quantity)
+                else:
+                    self._release(user_id, order.bond_id, order.quantity - quantity)
+            except InsufficientHoldingsError as e:
+                self._reset()
+                raise ValueError(str(e))
+        
+        reprice = price is not None and price != order.price
+        requeue = reprice or (quantity is not None and quantity > order.quantity)
+        if price is not None:
+            order.price = price
+        if quantity is not None:
+            order.quantity = quantity
+        
+        book = order_books.get(self.db, order.bond_id)
+        auction_interval = get_auction_interval(self.db.get(Bond, order.bond_id))
+        
+        trades = []
+        try:
+            if requeue:
+                removed = book.remove(order.id)
+                self._touch(removed)
+                if reprice and not auction_interval:
+                    trades = self._match_order(order, book)
+                self._update_order_status(order)
+                if order.status in ["open", "partial"]:
+                    self._rest(book, order)
+                journal_events = order_journal.order_events(book, order, trades, requeued=removed is not None)
+            else:
+                self._touch(matching_core.resize_order(book, order.id, to_units(order.quantity - order.filled_quantity)))
+            
+            self.db.add_all(trades)
+            self._update_holdings(order.bond_id)
+            market_summary.apply_trades(self.db, order.bond_id, trades)
+            candles.apply_trades(self.db, order.bond_id, trades)
+            if requeue:
+                order_journal.append(book, journal_events)
+            else:
+                order_journal.record_resize(book, order.id, order.quantity - order.filled_quantity)
+            self.db.commit()
+        except Exception:
+            self._rollback(order.bond_id)
+            raise
+        finally:
+            self._reset()
+        
+        # A single book update for the whole amend
+        self._broadcast_updates(order.bond_id, trades)
+        
+        self._process_triggered_stops(order.bond_id, trades)
+        
+        return order
+    
+    def cancel_orders(self, user_id: uuid.UUID, bond_id: uuid.UUID, side: Optional[str] = None,
+                      min_price: Optional[Decimal] = None, max_price: Optional[Decimal] = None) -> List[uuid.UUID]:
+        """
+        Cancel all of a user's open and pending orders on a bond, optionally
+        narrowed by side and price range, with one set-based update
+        Returns the ids of the cancelled orders, releasing the holdings
+        reserved by cancelled sells
+        """
+        conditions = [
+            Order.user_id == user_id,
+            Order.bond_id == bond_id,
+            Order.status.in_(["open", "partial", "pending"])
+        ]
+        if side:
+            conditions.append(Order.side == side)
+        if min_price is not None:
+            conditions.append(Order.price >= min_price)
+        if max_price is not None:
+            conditions.append(Order.price <= max_price)
+        
+        return self._cancel_where(bond_id, conditions, "cancelled")
+    
+    def expire_orders(self, bond_id: uuid.UUID, order_ids: List[uuid.UUID]) -> List[uuid.UUID]:
+        """
+        Expire good-till-date orders of a bond that are past their expiry,
+        like a cancel with status "expired". Orders already filled or
+        cancelled are left alone.
+        Returns the ids of the expired orders
+        """
+        return self._cancel_where(bond_id, [
+            Order.id.in_(order_ids),
+            Order.bond_id == bond_id,
+            Order.status.in_(["open", "partial", "pending"]),
+            Order.expires_at <= datetime.now(timezone.utc)
+        ], "expired")
+    
+    def _cancel_where(self, bond_id: uuid.UUID, conditions: list, status: str) -> List[uuid.UUID]:
+        """
+        Close a bond's orders matching `conditions` with one set-based update,
+        releasing the holdings reserved by sells, and remove them from the
+        book or stop book
+        """
+        try:
+            # Loaded before the update, which a book read from the database must not see
+            book = order_books.get(self.db, bond_id)
+            cancelled = self.db.execute(
+                update(Order)
+                .where(and_(*conditions))
+                .values(status=status, updated_at=func.now())
+                .returning(Order.id, Order.user_id, Order.side, Order.quantity, Order.filled_quantity)
+                .execution_options(synchronize_session=False)
+            ).all()
+            for row in cancelled:
+                if row.side == "sell":
+                    self._release(row.user_id, bond_id, row.quantity - row.filled_quantity)
+            self._update_holdings(bond_id)
+            
+            removed = []
+            for row in cancelled:
+                delta = matching_core.cancel_order(book, row.id)
+                if delta is not None:
+                    self._touch(delta)
+                    removed.append(row.id)
+            order_journal.record_cancels(book, removed)
+            self.db.commit()
+        except Exception:
+            self._rollback(bond_id)
+            raise
+        finally:
+            self._reset()
+        
+        cancelled_ids = [row.id for row in cancelled]
+        
+        if not cancelled_ids:
+            return []
+        
+        stops = stop_books.get(self.db, bond_id)
+        for order_id in cancelled_ids:
+            order_expiry.discard(order_id)
+            stops.remove(order_id)
+        
+        # One orderbook broadcast for the whole cancel
+        self._broadcast_updates(bond_id, [])
+        
+        return cancelled_ids
@@ -0,0 +1,295 @@
+import uuid
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from app.models.models import Order
+from app.services.fixed_point import to_units
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RestingOrder:
+    """
+    Lightweight record of an order resting in the book. Price and remaining
+    quantity are integer hundredths (ticks and lots), see fixed_point. An
+    incoming market order without a price limit has no price.
+    """
+    __slots__ = ("order_id", "user_id", "side", "price", "remaining", "created_at")
+
+    def __init__(self, order_id: uuid.UUID, user_id: uuid.UUID, side: str,
+                 price: Optional[int], remaining: int, created_at: Optional[datetime] = None):
+        self.order_id = order_id
+        self.user_id = user_id
+        self.side = side
+        self.price = price
+        self.remaining = remaining
+        self.created_at = created_at
+
+    @classmethod
+    def from_order(cls, order: Order) -> "RestingOrder":
+        return cls(
+            order_id=order.id,
+            user_id=order.user_id,
+            side=order.side,
+            price=to_units(order.price) if order.price is not None else None,
+            remaining=to_units(order.quantity - (order.filled_quantity or 0)),
+            created_at=order.created_at
+        )
+
+
+class PriceLevel:
+    """FIFO queue of resting orders at a single price, with their aggregate remaining quantity"""
+    __slots__ = ("price", "orders", "quantity")
+
+    def __init__(self, price: int):
+        self.price = price
+        self.orders: "OrderedDict[uuid.UUID, RestingOrder]" = OrderedDict()
+        self.quantity = 0
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+
+class _BookSide:
+    """
+    One side of the book.
+
+    Price levels are kept in a sorted list of keys where the best price is
+    always the last element, so the best level is O(1) and inserting or
+    removing a level is a binary search. Bids use the price as key, asks use
+    the negated price.
+    """
+
+    def __init__(self, side: str):
+        self.side = side
+        self._sign = 1 if side == "buy" else -1
+        self._keys: List[int] = []
+        self._levels: Dict[int, PriceLevel] = {}
+
+    def _key(self, price: int) -> int:
+        return price if self._sign > 0 else -price
+
+    def add(self, resting: RestingOrder):
+        level = self._levels.get(resting.price)
+        if level is None:
+            level = PriceLevel(resting.price)
+            self._levels[resting.price] = level
+            insort(self._keys, self._key(resting.price))
+        level.orders[resting.order_id] = resting
+        level.quantity += resting.remaining
+
+    def reduce(self, resting: RestingOrder, quantity: int):
+        """Reduce a resting order in place, keeping its queue position"""
+        resting.remaining -= quantity
+        self._levels[resting.price].quantity -= quantity
+
+    def remove(self, resting: RestingOrder):
+        level = self._levels.get(resting.price)
+        if level is None or level.orders.pop(resting.order_id, None) is None:
+            return
+        level.quantity -= resting.remaining
+        if not level.orders:
+            del self._levels[resting.price]
+            key = self._key(resting.price)
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+
+    def best(self) -> Optional[PriceLevel]:
+        if not self._keys:
+            return None
+        return self._levels[self._sign * self._keys[-1]]
+
+    def level(self, price: int) -> Optional[PriceLevel]:
+        return self._levels.get(price)
+
+    def crosses(self, price: int, limit: int) -> bool:
+        """Whether a resting price on this side is marketable against a limit"""
+        return price >= limit if self._sign > 0 else price <= limit
+
+    def levels(self, after: Optional[int] = None) -> Iterator[PriceLevel]:
+        """
+        Iterate levels from best to worst, optionally starting below the
+        level at `after`. Levels emptied by the caller while iterating are
+        skipped over by searching for the next key below.
+        """
+        if after is None:
+            index = len(self._keys) - 1
+        else:
+            index = bisect_left(self._keys, self._key(after)) - 1
+        while index >= 0:
+            key = self._keys[index]
+            yield self._levels[self._sign * key]
+            index = bisect_left(self._keys, key) - 1
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class OrderBook:
+    """Resident price-time priority order book for a single bond"""
+
+    def __init__(self, bond_id: uuid.UUID):
+        self.bond_id = bond_id
+        self.bids = _BookSide("buy")
+        self.asks = _BookSide("sell")
+        self._orders: Dict[uuid.UUID, RestingOrder] = {}
+
+    def _side(self, side: str) -> _BookSide:
+        return self.bids if side == "buy" else self.asks
+
+    def add(self, resting: RestingOrder):
+        """Add an order at the back of its price level"""
+        if resting.remaining <= 0:
+            return
+        if resting.order_id in self._orders:
+            self.remove(resting.order_id)
+        self._orders[resting.order_id] = resting
+        self._side(resting.side).add(resting)
+
+    def remove(self, order_id: uuid.UUID) -> Optional[RestingOrder]:
+        """Remove an order from the book, returning it if it was resting"""
+        resting = self._orders.pop(order_id, None)
+        if resting is not None:
+            self._side(resting.side).remove(resting)
+        return resting
+
+    def fill(self, order_id: uuid.UUID, quantity: int):
+        """Reduce a resting order by a filled quantity, removing it when exhausted"""
+        resting = self._orders.get(order_id)
+        if resting is None:
+            return
+        self._side(resting.side).reduce(resting, quantity)
+        if resting.remaining <= 0:
+            self.remove(order_id)
+
+    def fill_resting(self, resting: RestingOrder, quantity: int):
+        """fill() for a resting order already in hand, as matching has, without looking it up by id"""
+        book_side = self._side(resting.side)
+        book_side.reduce(resting, quantity)
+        if resting.remaining <= 0:
+            del self._orders[resting.order_id]
+            book_side.remove(resting)
+
+    def resize(self, order_id: uuid.UUID, remaining: int):
+        """Set a resting order's remaining quantity in place, keeping its queue position"""
+        resting = self._orders.get(order_id)
+        if resting is None:
+            return
+        self._side(resting.side).reduce(resting, resting.remaining - remaining)
+        if resting.remaining <= 0:
+            self.remove(order_id)
+
+    def get(self, order_id: uuid.UUID) -> Optional[RestingOrder]:
+        return self._orders.get(order_id)
+
+    def best_bid(self) -> Optional[PriceLevel]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[PriceLevel]:
+        return self.asks.best()
+
+    def level_quantity(self, side: str, price: int) -> int:
+        """Aggregate resting quantity at a price, zero if there is no level"""
+        level = self._side(side).level(price)
+        return level.quantity if level is not None else 0
+
+    def iter_crossing(self, side: str, limit: Optional[int]) -> Iterator[RestingOrder]:
+        """
+        Yield resting orders on `side` that are marketable against `limit`,
+        or every resting order if there is no limit, in price-time priority.
+        Safe against fills and removals made by the caller while iterating.
+        """
+        book_side = self._side(side)
+        for level in book_side.levels():
+            if limit is not None and not book_side.crosses(level.price, limit):
+                break
+            for resting in list(level.orders.values()):
+                if resting.order_id in self._orders:
+                    yield resting
+
+    def levels(self, side: str, after: Optional[int] = None) -> Iterator[PriceLevel]:
+        """Iterate a side's price levels from best to worst, starting below `after` if given"""
+        return self._side(side).levels(after)
+
+    def orders(self, side: str) -> Iterator[RestingOrder]:
+        """Yield every resting order on a side in price-time priority"""
+        for level in self._side(side).levels():
+            yield from list(level.orders.values())
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id: uuid.UUID) -> bool:
+        return order_id in self._orders
+
+
+class OrderBookRegistry:
+    """Process-wide cache of resident order books, loaded lazily from the database"""
+
+    def __init__(self):
+        self._books: Dict[uuid.UUID, OrderBook] = {}
+        # Books whose journal can no longer be trusted and must come from the database
+        self._stale: Set[uuid.UUID] = set()
+
+    def get(self, db: Session, bond_id: uuid.UUID) -> OrderBook:
+        book = self._books.get(bond_id)
+        if book is None:
+            book = self._load(db, bond_id)
+            self._books[bond_id] = book
+        return book
+
+    def invalidate(self, bond_id: uuid.UUID):
+        """Drop a book so the next access reloads it from the database"""
+        self._books.pop(bond_id, None)
+        self._stale.add(bond_id)
+
+    def release(self, bond_id: uuid.UUID):
+        """Drop a book that is now owned elsewhere; its journal stays valid"""
+        self._books.pop(bond_id, None)
+
+    def clear(self):
+        self._books.clear()
+
+    def _load(self, db: Session, bond_id: uuid.UUID) -> OrderBook:
+        from app.services.auction import auction_scheduler
+        from app.services.expiry import order_expiry
+        from app.services.journal import order_journal
+
+        book = None
+        if bond_id not in self._stale:
+            book = order_journal.load_book(db, bond_id)
+        if book is None:
+            book = self.load_from_db(db, bond_id)
+            # Re-base the journal on the state just read from the database
+            order_journal.write_snapshot(book)
+            self._stale.discard(bond_id)
+        # Good-till-date orders of a freshly loaded book are not in the expiry wheel yet
+        order_expiry.load(db, bond_id)
+        auction_scheduler.load(db, bond_id)
+        return book
+
+    @staticmethod
+    def load_from_db(db: Session, bond_id: uuid.UUID) -> OrderBook:
+        """Build a book from the open and partially filled orders in the database"""
+        book = OrderBook(bond_id)
+        resting_orders = db.query(Order).filter(
+            and_(
+                Order.bond_id == bond_id,
+                Order.status.in_(["open", "partial"])
+            )
+        ).order_by(Order.created_at.asc(), Order.id.asc()).all()
+
+        for order in resting_orders:
+            book.add(RestingOrder.from_order(order))
+
+        logger.info(f"Loaded order book for bond {bond_id}: {len(book)} resting orders")
+        return book
+
+
+# Global order book registry
+order_books = OrderBookRegistry()
@@ -1,9 +1,10 @@
 from typing import List, Optional, Dict
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy import and_, func, desc, or_
 from decimal import Decimal
 from datetime import datetime, timedelta
 
+from app.core.pagination import paginate
 from app.models.models import User, Bond, Holding, Trade, Order
 
 
@@ -104,8 +105,9 @@ class PortfolioService:
             "holdings_count": len(portfolio)
         }
     
-    def get_user_trade_history(self, wallet_address: str, limit: int = 100) -> List[Dict]:
-        """Get trade history for a user"""
+    def get_user_trade_history(self, wallet_address: str, limit: int = 100,
+                               cursor: Optional[str] = None) -> List[Dict]:
+        """Get a page of a user's trade history, newest first, starting after a cursor"""
         
         user = self.db.query(User).filter(User.wallet_address == wallet_address).first()
         if not user:
@@ -114,24 +116,25 @@ class PortfolioService:
         # Get all user orders
         user_orders = self.db.query(Order.id).filter(Order.user_id == user.id).subquery()
         
-        # Get trades where user was buyer or seller
-        trades = self.db.query(Trade, Bond).join(
+        # Get trades where user was buyer or seller, with the buyer to tell the sides apart
+        buy_order = aliased(Order)
+        query = self.db.query(Trade, Bond, buy_order.user_id).join(
             Bond, Trade.bond_id == Bond.id
+        ).join(
+            buy_order, Trade.buy_order_id == buy_order.id
         ).filter(
             or_(
                 Trade.buy_order_id.in_(user_orders),
                 Trade.sell_order_id.in_(user_orders)
             )
-        ).order_by(desc(Trade.executed_at)).limit(limit).all()
+        )
+        trades = paginate(query, Trade.executed_at, Trade.id, cursor, limit).all()
         
         trade_history = []
         
-        for trade, bond in trades:
+        for trade, bond, buyer_id in trades:
             # Determine if user was buyer or seller
-            buy_order = self.db.query(Order).filter(Order.id == trade.buy_order_id).first()
-            sell_order = self.db.query(Order).filter(Order.id == trade.sell_order_id).first()
-            
-            user_side = "buy" if buy_order.user_id == user.id else "sell"
+            user_side = "buy" if buyer_id == user.id else "sell"
             
             trade_history.append({
                 "trade_id": str(trade.id),
@@ -0,0 +1,96 @@
+import uuid
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from app.models.models import Holding
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientHoldingsError(Exception):
+    """Raised when a sell would exceed the seller's unreserved holdings"""
+    pass
+
+
+class LedgerEntry:
+    """Held and reserved quantity of one bond for one user"""
+    __slots__ = ("quantity", "locked")
+
+    def __init__(self, quantity: Decimal, locked: Decimal):
+        self.quantity = quantity
+        self.locked = locked
+
+    @property
+    def available(self) -> Decimal:
+        return self.quantity - self.locked
+
+
+class HoldingLedger:
+    """
+    In-memory reservation ledger for pre-trade checks.
+
+    Tracks held versus locked quantity per (user, bond). Resting sell orders
+    lock their unfilled quantity, so a user cannot post sells that together
+    exceed their position. Entries are loaded lazily from `holdings` and the
+    locked amount is persisted to `holdings.locked_quantity` by the matching
+    engine in the same transaction as the order. Each bond's entries are only
+    mutated from that bond's sequencer.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[uuid.UUID, uuid.UUID], LedgerEntry] = {}
+
+    def get(self, db: Session, user_id: uuid.UUID, bond_id: uuid.UUID) -> LedgerEntry:
+        key = (user_id, bond_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            holding = db.query(Holding).filter(
+                and_(Holding.user_id == user_id, Holding.bond_id == bond_id)
+            ).first()
+            if holding:
+                entry = LedgerEntry(holding.quantity, holding.locked_quantity or Decimal('0'))
+            else:
+                entry = LedgerEntry(Decimal('0'), Decimal('0'))
+            self._entries[key] = entry
+        return entry
+
+    def available(self, db: Session, user_id: uuid.UUID, bond_id: uuid.UUID) -> Decimal:
+        return self.get(db, user_id, bond_id).available
+
+    def reserve(self, db: Session, user_id: uuid.UUID, bond_id: uuid.UUID, quantity: Decimal):
+        """Lock quantity for a sell order, failing if it exceeds what is available"""
+        entry = self.get(db, user_id, bond_id)
+        if entry.available < quantity:
+            raise InsufficientHoldingsError("Insufficient holdings for sell order")
+        entry.locked += quantity
+
+    def release(self, user_id: uuid.UUID, bond_id: uuid.UUID, quantity: Decimal):
+        """Unlock quantity from a cancelled or reduced sell order"""
+        entry = self._entries.get((user_id, bond_id))
+        if entry is not None:
+            entry.locked = max(entry.locked - quantity, Decimal('0'))
+
+    def apply_fill(self, buyer_id: uuid.UUID, seller_id: uuid.UUID, bond_id: uuid.UUID, quantity: Decimal):
+        """Move filled quantity from seller to buyer, consuming the seller's reservation"""
+        buyer = self._entries.get((buyer_id, bond_id))
+        if buyer is not None:
+            buyer.quantity += quantity
+        seller = self._entries.get((seller_id, bond_id))
+        if seller is not None:
+            seller.quantity -= quantity
+            seller.locked = max(seller.locked - quantity, Decimal('0'))
+
+    def invalidate(self, user_id: Optional[uuid.UUID] = None, bond_id: Optional[uuid.UUID] = None):
+        """Drop cached entries for a user and/or bond so they reload from the database"""
+        for key in list(self._entries.keys()):
+            if (user_id is None or key[0] == user_id) and (bond_id is None or key[1] == bond_id):
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Global holding reservation ledger
+holding_ledger = HoldingLedger()
@@ -0,0 +1,196 @@
+import asyncio
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.websocket import ConnectionManager, manager
+from app.db.database import SessionLocal
+from app.services.analytics import bond_analytics
+from app.services.book_cache import book_cache
+from app.services.book_feed import book_feed
+from app.services.event_loop import sequencer_executor
+from app.services.expiry import order_expiry
+from app.services.matching_engine import MatchingEngine
+from app.services.order_book import order_books
+from app.services.reservations import holding_ledger
+from app.services.stop_book import stop_books
+from app.services.trade_stats import trade_stats
+from app.services.yield_curve import yield_curve
+import logging
+
+logger = logging.getLogger(__name__)
+
+# An action runs against the bond's matching engine inside the actor
+MatchingAction = Callable[[MatchingEngine], Any]
+
+
+class EngineCall:
+    """
+    A MatchingAction that calls an engine method by name. Unlike a lambda it
+    can be pickled, so it also runs when matching is sharded across worker
+    processes.
+    """
+    __slots__ = ("method", "args", "kwargs")
+
+    def __init__(self, method: str, *args, **kwargs):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self, engine: MatchingEngine) -> Any:
+        return getattr(engine, self.method)(*self.args, **self.kwargs)
+
+
+class BondSequencer:
+    """
+    Single-writer actor for one bond.
+
+    Owns the bond's order book: every order, cancel or other book mutation
+    for the bond is queued here and applied strictly in arrival order, so
+    price-time priority is deterministic without database row locks.
+    Queued actions are drained in batches that share one database session.
+    Batches run on the bond's own thread, so a busy bond blocks neither
+    other bonds nor the event loop, and there is still one writer per bond.
+    """
+
+    def __init__(self, bond_id: uuid.UUID, session_factory: sessionmaker,
+                 maxsize: int, batch_size: int, ws_manager: ConnectionManager):
+        self.bond_id = bond_id
+        self._session_factory = session_factory
+        self._ws_manager = ws_manager
+        self._batch_size = batch_size
+        self._queue: "asyncio.Queue[Tuple[MatchingAction, asyncio.Future]]" = asyncio.Queue(maxsize=maxsize)
+        self._executor = sequencer_executor(f"sequencer-{bond_id}")
+        self._task = asyncio.create_task(self._run(), name=f"sequencer-{bond_id}")
+
+    async def submit(self, action: MatchingAction) -> Any:
+        """Queue an action and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        # Blocks when the queue is full, pushing back on callers
+        await self._queue.put((action, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                pending = [(action, future) for action, future in batch if not future.cancelled()]
+                outcomes = await loop.run_in_executor(
+                    self._executor, self._process_batch, [action for action, _ in pending]
+                )
+                # Futures belong to the loop, so they are resolved here rather than in the batch thread
+                for (_, future), (ok, result) in zip(pending, outcomes):
+                    if future.done():
+                        continue
+                    if ok:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(result)
+            except Exception as e:
+                logger.error(f"Sequencer for bond {self.bond_id} failed a batch: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _process_batch(self, actions: List[MatchingAction]) -> List[Tuple[bool, Any]]:
+        """Run a batch on the bond's thread, returning (succeeded, result or exception) per action"""
+        outcomes = []
+        db = self._session_factory(expire_on_commit=False)
+        try:
+            engine = MatchingEngine(db, self._ws_manager)
+            for action in actions:
+                try:
+                    outcomes.append((True, action(engine)))
+                except Exception as e:
+                    db.rollback()
+                    outcomes.append((False, e))
+        finally:
+            db.close()
+        return outcomes
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # Let a batch already running finish before the thread goes away
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+
+class MatchingSequencer:
+    """
+    Routes matching actions to a per-bond sequencer, starting them on demand.
+
+    When a shard router is attached, actions are forwarded to the worker
+    process that owns the bond instead and must be picklable (EngineCall).
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal,
+                 maxsize: Optional[int] = None, batch_size: Optional[int] = None,
+                 ws_manager: ConnectionManager = manager):
+        self._session_factory = session_factory
+        self._maxsize = maxsize or settings.MATCHING_QUEUE_SIZE
+        self._batch_size = batch_size or settings.MATCHING_BATCH_SIZE
+        self.ws_manager = ws_manager
+        self.router = None  # ShardRouter when matching runs in worker processes
+        self._sequencers: Dict[uuid.UUID, BondSequencer] = {}
+
+    def _get(self, bond_id: uuid.UUID) -> BondSequencer:
+        sequencer = self._sequencers.get(bond_id)
+        if sequencer is None:
+            sequencer = BondSequencer(bond_id, self._session_factory, self._maxsize,
+                                      self._batch_size, self.ws_manager)
+            self._sequencers[bond_id] = sequencer
+        return sequencer
+
+    async def submit(self, bond_id: uuid.UUID, action: MatchingAction) -> Any:
+        """Run an action on the bond's sequencer and return its result"""
+        if self.router is not None:
+            return await self.router.submit(bond_id, action)
+        return await self._get(bond_id).submit(action)
+
+    async def release(self, bond_id: uuid.UUID):
+        """Stop a bond's sequencer once it is idle, e.g. after handing the bond to another worker"""
+        sequencer = self._sequencers.pop(bond_id, None)
+        if sequencer is not None:
+            await sequencer.stop()
+
+    def invalidate_holdings(self, user_id: Optional[uuid.UUID] = None):
+        """Drop cached holding reservations after holdings change outside matching"""
+        holding_ledger.invalidate(user_id=user_id)
+        if self.router is not None:
+            self.router.broadcast_control("invalidate_holdings", user_id)
+
+    def reset_state(self):
+        """Drop every cached book and reservation, e.g. after the tables are cleared"""
+        order_books.clear()
+        stop_books.clear()
+        holding_ledger.clear()
+        book_feed.clear()
+        book_cache.clear()
+        order_expiry.clear()
+        trade_stats.clear()
+        bond_analytics.clear()
+        yield_curve.clear()
+        if self.router is not None:
+            self.router.broadcast_control("reset_state")
+
+    async def shutdown(self):
+        if self.router is not None:
+            await self.router.shutdown()
+            self.router = None
+        for sequencer in list(self._sequencers.values()):
+            await sequencer.stop()
+        self._sequencers.clear()
+
+
+# Global matching sequencer instance
+matching_sequencer = MatchingSequencer()
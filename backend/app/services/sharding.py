@@ -0,0 +1,364 @@
+import asyncio
+import hashlib
+import itertools
+import multiprocessing
+import pickle
+import threading
+import uuid
+from bisect import bisect
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.websocket import manager
+from app.services.book_cache import book_cache
+from app.services.trade_stats import trade_stats
+from app.services.yield_curve import yield_curve
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Virtual nodes per worker on the hash ring, to spread bonds evenly
+RING_REPLICAS = 64
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash of bond ids onto worker indices"""
+
+    def __init__(self, workers: int, replicas: int = RING_REPLICAS):
+        self.workers = workers
+        points = sorted(
+            (_hash(f"worker-{worker}-{replica}"), worker)
+            for worker in range(workers) for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def lookup(self, bond_id: uuid.UUID) -> int:
+        index = bisect(self._hashes, _hash(str(bond_id))) % len(self._hashes)
+        return self._workers[index]
+
+
+def _portable_exception(error: Exception) -> Exception:
+    """Return the exception itself if it survives pickling, otherwise a plain RuntimeError"""
+    try:
+        pickle.loads(pickle.dumps(error))
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+class RelayConnectionManager:
+    """
+    Stand-in for the WebSocket manager inside a worker process. WebSocket
+    connections live in the API process, so broadcasts are sent back over
+    the worker's pipe and delivered there.
+    """
+
+    def __init__(self, send: Callable[[tuple], None]):
+        self._send = send
+
+    async def broadcast_to_room(self, room_name: str, message: dict):
+        self._send(("broadcast", "broadcast_to_room", (room_name, message)))
+
+    async def broadcast_to_user(self, user_id: str, message: dict):
+        self._send(("broadcast", "broadcast_to_user", (user_id, message)))
+
+
+def _release_bond(bond_id: uuid.UUID) -> Callable[[Any], bool]:
+    """
+    Action that drops this process's cached state for a bond moving to
+    another worker. It runs on the bond's own sequencer, after everything
+    already queued for the bond.
+    """
+    def release(engine) -> bool:
+        from app.services.book_feed import book_feed
+        from app.services.expiry import order_expiry
+        from app.services.journal import order_journal
+        from app.services.order_book import order_books
+        from app.services.reservations import holding_ledger
+        from app.services.stop_book import stop_books
+
+        order_books.release(bond_id)
+        stop_books.invalidate(bond_id)
+        order_journal.forget(bond_id)
+        book_feed.forget(bond_id)
+        order_expiry.forget(bond_id)
+        holding_ledger.invalidate(bond_id=bond_id)
+        return True
+
+    return release
+
+
+def run_worker(index: int, conn: Connection):
+    """Entry point of a matching worker process"""
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve(index, conn))
+
+
+async def _serve(index: int, conn: Connection):
+    from app.services.auction import auction_scheduler
+    from app.services.expiry import order_expiry
+    from app.services.sequencer import matching_sequencer
+
+    loop = asyncio.get_running_loop()
+    send_lock = threading.Lock()
+    stopped = asyncio.Event()
+    tasks = set()
+
+    def send(message: tuple):
+        with send_lock:
+            conn.send(message)
+
+    def reply(request_id: int, ok: bool, payload: Any):
+        try:
+            send(("result", request_id, ok, payload))
+        except Exception as e:
+            # The result could not be pickled
+            send(("result", request_id, False, RuntimeError(f"Unsendable matching result: {e}")))
+
+    async def call(request_id: int, bond_id: uuid.UUID, action):
+        try:
+            result = await matching_sequencer.submit(bond_id, action)
+        except Exception as e:
+            reply(request_id, False, _portable_exception(e))
+        else:
+            reply(request_id, True, result)
+
+    async def release(request_id: int, bond_id: uuid.UUID):
+        try:
+            await matching_sequencer.submit(bond_id, _release_bond(bond_id))
+            await matching_sequencer.release(bond_id)
+            await auction_scheduler.stop(bond_id)
+        except Exception as e:
+            reply(request_id, False, _portable_exception(e))
+        else:
+            logger.info(f"Matching worker {index} released bond {bond_id}")
+            reply(request_id, True, None)
+
+    def handle(message: tuple):
+        kind = message[0]
+        if kind == "call":
+            task = asyncio.create_task(call(*message[1:]))
+        elif kind == "release":
+            task = asyncio.create_task(release(*message[1:]))
+        elif kind == "invalidate_holdings":
+            from app.services.reservations import holding_ledger
+            holding_ledger.invalidate(user_id=message[1])
+            return
+        elif kind == "reset_state":
+            from app.services.book_feed import book_feed
+            from app.services.order_book import order_books
+            from app.services.reservations import holding_ledger
+            from app.services.stop_book import stop_books
+            order_books.clear()
+            stop_books.clear()
+            holding_ledger.clear()
+            book_feed.clear()
+            order_expiry.clear()
+            return
+        elif kind == "stop":
+            stopped.set()
+            return
+        else:
+            logger.warning(f"Matching worker {index} ignoring unknown message: {kind}")
+            return
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def receive():
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = ("stop",)
+            loop.call_soon_threadsafe(handle, message)
+            if message[0] == "stop":
+                return
+
+    matching_sequencer.ws_manager = RelayConnectionManager(send)
+    book_cache.set_relay(send)
+    trade_stats.set_relay(send)
+    yield_curve.set_relay(send)
+    threading.Thread(target=receive, name=f"matching-worker-{index}-receiver", daemon=True).start()
+    logger.info(f"Matching worker {index} started")
+
+    await stopped.wait()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await auction_scheduler.shutdown()
+    await order_expiry.shutdown()
+    await matching_sequencer.shutdown()
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, index: int, process: multiprocessing.Process, conn: Connection):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+
+    def send(self, message: tuple):
+        with self.send_lock:
+            self.conn.send(message)
+
+
+class ShardRouter:
+    """
+    Forwards matching actions from the API process to N matching worker
+    processes.
+
+    Each bond is owned by exactly one worker, chosen by consistent hash of
+    its id, and that worker holds the bond's book, reservations and
+    sequencer. Requests and acknowledgements travel over multiprocessing
+    pipes. A hot bond only occupies its own worker's core, so bonds on
+    other workers keep their latency.
+
+    A bond can be moved to another worker while the system is running.
+    New actions for the bond wait briefly while the current owner drains
+    what is already queued and drops its state, then go to the new owner.
+    Assignment overrides live in memory, so only one API process may front
+    a set of workers.
+    """
+
+    def __init__(self, workers: int, replicas: int = RING_REPLICAS):
+        self.ring = HashRing(workers, replicas)
+        self._workers: List[_Worker] = []
+        self._overrides: Dict[uuid.UUID, int] = {}
+        self._migrations: Dict[uuid.UUID, asyncio.Event] = {}
+        self._pending: Dict[int, Tuple[int, asyncio.Future]] = {}
+        self._request_ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        for index in range(self.ring.workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=run_worker, args=(index, child_conn),
+                                      name=f"matching-worker-{index}", daemon=True)
+            process.start()
+            child_conn.close()
+            worker = _Worker(index, process, parent_conn)
+            self._workers.append(worker)
+            threading.Thread(target=self._receive, args=(worker,),
+                             name=f"matching-router-{index}", daemon=True).start()
+        logger.info(f"Started {len(self._workers)} matching worker processes")
+
+    def owner(self, bond_id: uuid.UUID) -> int:
+        """Index of the worker that owns a bond"""
+        override = self._overrides.get(bond_id)
+        return override if override is not None else self.ring.lookup(bond_id)
+
+    async def _request(self, worker: _Worker, kind: str, *args) -> Any:
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = (worker.index, future)
+        try:
+            worker.send((kind, request_id, *args))
+        except Exception:
+            self._pending.pop(request_id, None)
+            raise
+        return await future
+
+    async def submit(self, bond_id: uuid.UUID, action) -> Any:
+        """Run an action on the worker that owns the bond and wait for its acknowledgement"""
+        while bond_id in self._migrations:
+            await self._migrations[bond_id].wait()
+        return await self._request(self._workers[self.owner(bond_id)], "call", bond_id, action)
+
+    async def rebalance(self, bond_id: uuid.UUID, worker_index: int):
+        """Move a bond to another worker without stopping other bonds"""
+        if not 0 <= worker_index < len(self._workers):
+            raise ValueError(f"No matching worker {worker_index}")
+        while bond_id in self._migrations:
+            await self._migrations[bond_id].wait()
+
+        current = self.owner(bond_id)
+        if current == worker_index:
+            return
+
+        gate = asyncio.Event()
+        self._migrations[bond_id] = gate
+        try:
+            await self._request(self._workers[current], "release", bond_id)
+            if worker_index == self.ring.lookup(bond_id):
+                self._overrides.pop(bond_id, None)
+            else:
+                self._overrides[bond_id] = worker_index
+            logger.info(f"Moved bond {bond_id} from matching worker {current} to {worker_index}")
+        finally:
+            del self._migrations[bond_id]
+            gate.set()
+
+    def broadcast_control(self, kind: str, *args):
+        """Send a fire-and-forget control message to every worker"""
+        for worker in self._workers:
+            try:
+                worker.send((kind, *args))
+            except Exception as e:
+                logger.error(f"Failed to send {kind} to matching worker {worker.index}: {e}")
+
+    def status(self) -> dict:
+        return {
+            "workers": [
+                {"index": worker.index, "pid": worker.process.pid, "alive": worker.process.is_alive()}
+                for worker in self._workers
+            ],
+            "overrides": {str(bond_id): index for bond_id, index in self._overrides.items()},
+            "migrating": [str(bond_id) for bond_id in self._migrations]
+        }
+
+    def _receive(self, worker: _Worker):
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                self._loop.call_soon_threadsafe(self._worker_exited, worker)
+                return
+            except Exception as e:
+                logger.error(f"Unreadable message from matching worker {worker.index}: {e}")
+                continue
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: tuple):
+        kind = message[0]
+        if kind == "result":
+            _, request_id, ok, payload = message
+            pending = self._pending.pop(request_id, None)
+            if pending is None or pending[1].done():
+                return
+            if ok:
+                pending[1].set_result(payload)
+            else:
+                pending[1].set_exception(payload)
+        elif kind == "broadcast":
+            _, method, args = message
+            asyncio.create_task(getattr(manager, method)(*args))
+        elif kind == "book_levels":
+            book_cache.update(*message[1:])
+        elif kind == "trade_stats":
+            trade_stats.add(*message[1:])
+        elif kind == "yield_curve":
+            yield_curve.price_changed(*message[1:])
+
+    def _worker_exited(self, worker: _Worker):
+        failed = [request_id for request_id, (index, _) in self._pending.items() if index == worker.index]
+        if failed:
+            logger.error(f"Matching worker {worker.index} exited with {len(failed)} requests in flight")
+        for request_id in failed:
+            _, future = self._pending.pop(request_id)
+            if not future.done():
+                future.set_exception(RuntimeError(f"Matching worker {worker.index} exited"))
+
+    async def shutdown(self):
+        self.broadcast_control("stop")
+        for worker in self._workers:
+            await asyncio.get_running_loop().run_in_executor(None, worker.process.join, 10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+        self._workers.clear()
@@ -0,0 +1,126 @@
+import heapq
+import uuid
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc
+from app.models.models import Order, Trade
+from app.services.fixed_point import to_units
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Order types held back until the last price crosses their stop price
+STOP_ORDER_TYPES = ("stop", "stop_limit")
+
+
+class StopBook:
+    """
+    Untriggered stop and stop-limit orders of one bond, indexed by stop price.
+
+    Buy stops trigger once the last price rises to their stop price and sell
+    stops once it falls to it. Each side is a heap ordered by how soon its
+    stops trigger, then by arrival, so the stops crossed by a trade are
+    popped in O(k log n) without looking at the others. Removed stops are
+    dropped lazily when they reach the top of their heap. Stop prices and
+    the last price are integer ticks.
+    """
+
+    def __init__(self, bond_id: uuid.UUID, last_price: Optional[int] = None):
+        self.bond_id = bond_id
+        self.last_price = last_price
+        self._buys: List[Tuple[int, int, uuid.UUID]] = []  # (stop price, seq, order id)
+        self._sells: List[Tuple[int, int, uuid.UUID]] = []  # (-stop price, seq, order id)
+        self._live: Dict[uuid.UUID, str] = {}  # Order id -> side
+        self._seq = count()
+
+    def crossed(self, side: str, stop_price: int) -> bool:
+        """Whether the last price has already reached a stop price"""
+        if self.last_price is None:
+            return False
+        return self.last_price >= stop_price if side == "buy" else self.last_price <= stop_price
+
+    def add(self, order_id: uuid.UUID, side: str, stop_price: int):
+        if order_id in self._live:
+            return
+        self._live[order_id] = side
+        if side == "buy":
+            heapq.heappush(self._buys, (stop_price, next(self._seq), order_id))
+        else:
+            heapq.heappush(self._sells, (-stop_price, next(self._seq), order_id))
+
+    def remove(self, order_id: uuid.UUID) -> bool:
+        """Forget a stop, e.g. when it is cancelled, returning whether it was pending"""
+        if self._live.pop(order_id, None) is None:
+            return False
+        # Rebuild the heaps once removed stops outnumber pending ones
+        if len(self._buys) + len(self._sells) > 2 * len(self._live) + 64:
+            self._buys = [entry for entry in self._buys if entry[2] in self._live]
+            self._sells = [entry for entry in self._sells if entry[2] in self._live]
+            heapq.heapify(self._buys)
+            heapq.heapify(self._sells)
+        return True
+
+    def trigger(self, last_price: int) -> List[uuid.UUID]:
+        """
+        Record a trade at `last_price` and pop every stop it crosses: buys
+        from the lowest stop price, then sells from the highest, each in
+        arrival order within a price
+        """
+        self.last_price = last_price
+        triggered = []
+        for heap, limit in ((self._buys, last_price), (self._sells, -last_price)):
+            while heap and heap[0][0] <= limit:
+                order_id = heapq.heappop(heap)[2]
+                if self._live.pop(order_id, None) is not None:
+                    triggered.append(order_id)
+        return triggered
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, order_id: uuid.UUID) -> bool:
+        return order_id in self._live
+
+
+class StopBookRegistry:
+    """Process-wide cache of stop books, loaded lazily from the database"""
+
+    def __init__(self):
+        self._books: Dict[uuid.UUID, StopBook] = {}
+
+    def get(self, db: Session, bond_id: uuid.UUID) -> StopBook:
+        book = self._books.get(bond_id)
+        if book is None:
+            book = self.load_from_db(db, bond_id)
+            self._books[bond_id] = book
+        return book
+
+    def invalidate(self, bond_id: uuid.UUID):
+        """Drop a stop book so the next access reloads it from the database"""
+        self._books.pop(bond_id, None)
+
+    def clear(self):
+        self._books.clear()
+
+    @staticmethod
+    def load_from_db(db: Session, bond_id: uuid.UUID) -> StopBook:
+        """Build a stop book from the pending stops and the last trade price in the database"""
+        last_price = db.query(Trade.price).filter(Trade.bond_id == bond_id).order_by(desc(Trade.executed_at)).first()
+        book = StopBook(bond_id, to_units(last_price[0]) if last_price else None)
+        pending = db.query(Order.id, Order.side, Order.stop_price).filter(
+            and_(
+                Order.bond_id == bond_id,
+                Order.status == "pending"
+            )
+        ).order_by(Order.created_at.asc(), Order.id.asc()).all()
+
+        for order_id, side, stop_price in pending:
+            book.add(order_id, side, to_units(stop_price))
+
+        logger.info(f"Loaded stop book for bond {bond_id}: {len(book)} pending stops")
+        return book
+
+
+# Global stop book registry
+stop_books = StopBookRegistry()
@@ -0,0 +1,247 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc
+from app.models.models import Trade
+from app.services.event_loop import call_soon
+from app.services.fixed_point import DECIMALS, from_units, to_units
+
+# (executed_at as a Unix timestamp, price in ticks, quantity in lots)
+TradeTick = Tuple[float, int, int]
+
+MINUTE_BUCKETS = 1440  # One day of one-minute buckets
+HOUR_BUCKETS = 168  # One week of one-hour buckets
+
+# Window name -> (ring, number of buckets)
+WINDOWS = {
+    "1h": ("minutes", 60),
+    "24h": ("minutes", MINUTE_BUCKETS),
+    "7d": ("hours", HOUR_BUCKETS),
+}
+
+
+def _timestamp(executed_at: datetime) -> float:
+    """Unix timestamp of a trade time; naive times are UTC, as written by the matching engine"""
+    if executed_at.tzinfo is None:
+        executed_at = executed_at.replace(tzinfo=timezone.utc)
+    return executed_at.timestamp()
+
+
+class WindowStats(NamedTuple):
+    window: str
+    open: Optional[Decimal]  # First trade price in the window
+    close: Optional[Decimal]  # Last trade price in the window
+    high: Optional[Decimal]
+    low: Optional[Decimal]
+    volume: Decimal  # Quantity traded
+    notional: Decimal  # Sum of price * quantity
+    trades_count: int
+    reference: Optional[Decimal]  # Last trade price before the window
+
+
+class _Bucket:
+    __slots__ = ("index", "volume", "notional", "high", "low", "count", "open", "close")
+
+    def __init__(self, index: int):
+        self.index = index  # Bucket number since the epoch
+        self.volume = 0
+        self.notional = 0
+        self.high = 0
+        self.low = 0
+        self.count = 0
+        self.open = 0
+        self.close = 0
+
+
+class _Ring:
+    """
+    Fixed number of time buckets reused round-robin. A slot whose bucket
+    number is not the current one for its time holds an older bucket, which
+    is replaced the next time a trade lands in it. Prices are ticks,
+    volumes lots and notionals ticks * lots.
+    """
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self._slots: List[Optional[_Bucket]] = [None] * size
+        # Close of the newest bucket that was overwritten, and its number
+        self._dropped_close: Optional[int] = None
+        self._dropped_index = -1
+
+    def add(self, timestamp: float, price: int, quantity: int):
+        index = int(timestamp // self.width)
+        slot = index % self.size
+        bucket = self._slots[slot]
+        if bucket is None or bucket.index != index:
+            if bucket is not None and bucket.index > index:
+                return  # Older than everything the ring still covers
+            if bucket is not None and bucket.count and bucket.index > self._dropped_index:
+                self._dropped_close = bucket.close
+                self._dropped_index = bucket.index
+            bucket = self._slots[slot] = _Bucket(index)
+        if bucket.count:
+            bucket.high = max(bucket.high, price)
+            bucket.low = min(bucket.low, price)
+        else:
+            bucket.open = bucket.high = bucket.low = price
+        bucket.close = price
+        bucket.volume += quantity
+        bucket.notional += price * quantity
+        bucket.count += 1
+
+    def seed_reference(self, timestamp: float, price: int):
+        """Use a trade older than the ring as the reference price, unless a later one was dropped"""
+        index = int(timestamp // self.width)
+        if index > self._dropped_index:
+            self._dropped_close = price
+            self._dropped_index = index
+
+    def window(self, name: str, buckets: int, now: float) -> WindowStats:
+        """Aggregate the last `buckets` buckets up to and including the current one"""
+        current = int(now // self.width)
+        first = current - buckets + 1
+        in_window = []
+        reference, reference_index = self._dropped_close, self._dropped_index
+        for bucket in self._slots:
+            if bucket is None or not bucket.count:
+                continue
+            if first <= bucket.index <= current:
+                in_window.append(bucket)
+            elif bucket.index < first and bucket.index > reference_index:
+                reference, reference_index = bucket.close, bucket.index
+        in_window.sort(key=lambda bucket: bucket.index)
+
+        notional_scale = -2 * DECIMALS
+        if not in_window:
+            return WindowStats(name, None, None, None, None, Decimal('0'),
+                               Decimal(0).scaleb(notional_scale), 0,
+                               from_units(reference) if reference is not None else None)
+        return WindowStats(
+            window=name,
+            open=from_units(in_window[0].open),
+            close=from_units(in_window[-1].close),
+            high=from_units(max(bucket.high for bucket in in_window)),
+            low=from_units(min(bucket.low for bucket in in_window)),
+            volume=from_units(sum(bucket.volume for bucket in in_window)),
+            notional=Decimal(sum(bucket.notional for bucket in in_window)).scaleb(notional_scale),
+            trades_count=sum(bucket.count for bucket in in_window),
+            reference=from_units(reference) if reference is not None else None
+        )
+
+
+class BondTradeStats:
+    """Per-minute and per-hour trade rings of one bond"""
+
+    def __init__(self, last_loaded: float = 0.0):
+        self.minutes = _Ring(60, MINUTE_BUCKETS)
+        self.hours = _Ring(3600, HOUR_BUCKETS)
+        # Trades at or before this time were read by the warm start
+        self.last_loaded = last_loaded
+
+    def add(self, timestamp: float, price: int, quantity: int):
+        self.minutes.add(timestamp, price, quantity)
+        self.hours.add(timestamp, price, quantity)
+
+    def window(self, name: str, now: Optional[float] = None) -> WindowStats:
+        ring, buckets = WINDOWS[name]
+        return getattr(self, ring).window(name, buckets, time.time() if now is None else now)
+
+
+class TradeStatsCache:
+    """
+    Rolling 1h, 24h and 7d trade statistics per bond, kept in memory.
+
+    Every committed trade is added to its bond's one-minute and one-hour
+    rings in O(1), and windows are aggregated over the buckets instead of
+    range scanning the trades table. Windows are aligned to bucket
+    boundaries, so they span up to one bucket more than their name.
+
+    A bond's rings are warm-started from the trades table on first use.
+    Inside a matching worker process trades are relayed to the API process,
+    which holds the rings and serves the reads.
+    """
+
+    def __init__(self):
+        self._bonds: Dict[uuid.UUID, BondTradeStats] = {}
+        self._relay: Optional[Callable[[tuple], None]] = None
+
+    def set_relay(self, send: Callable[[tuple], None]):
+        """Forward trades to another process instead of recording them here"""
+        self._relay = send
+
+    def record(self, bond_id: uuid.UUID, trades: List[Trade]):
+        """Add a unit of work's committed trades"""
+        if not trades:
+            return
+        ticks = [(_timestamp(trade.executed_at), to_units(trade.price), to_units(trade.quantity)) for trade in trades]
+        if self._relay is not None:
+            self._relay(("trade_stats", bond_id, ticks))
+        else:
+            # The rings are read and warm-started on the event loop
+            call_soon(self.add, bond_id, ticks)
+
+    def add(self, bond_id: uuid.UUID, ticks: List[TradeTick]):
+        stats = self._bonds.get(bond_id)
+        if stats is None:
+            return  # Picked up by the warm start when the bond is first read
+        for timestamp, price, quantity in ticks:
+            # Trades of a bond are written in time order, so this skips
+            # exactly the trades the warm start already read
+            if timestamp > stats.last_loaded:
+                stats.add(timestamp, price, quantity)
+
+    def get(self, db: Session, bond_id: uuid.UUID, window: str = "24h") -> WindowStats:
+        stats = self._bonds.get(bond_id)
+        if stats is None:
+            self.warm_start(db, [bond_id])
+            stats = self._bonds[bond_id]
+        return stats.window(window)
+
+    def warm_start(self, db: Session, bond_ids: Optional[Iterable[uuid.UUID]] = None):
+        """
+        Rebuild the rings of some or all bonds from the trades table in one
+        pass over the last week of trades, plus the last trade before it
+        """
+        since = datetime.utcnow() - timedelta(hours=HOUR_BUCKETS)
+        filters = [Trade.executed_at >= since]
+        if bond_ids is not None:
+            bond_ids = list(bond_ids)
+            filters.append(Trade.bond_id.in_(bond_ids))
+        rebuilt: Dict[uuid.UUID, BondTradeStats] = {bond_id: BondTradeStats() for bond_id in bond_ids or []}
+
+        rows = db.query(Trade.bond_id, Trade.executed_at, Trade.price, Trade.quantity).filter(
+            and_(*filters)
+        ).order_by(Trade.executed_at.asc()).yield_per(10000)
+        for bond_id, executed_at, price, quantity in rows:
+            stats = rebuilt.get(bond_id)
+            if stats is None:
+                stats = rebuilt[bond_id] = BondTradeStats()
+            timestamp = _timestamp(executed_at)
+            stats.add(timestamp, to_units(price), to_units(quantity))
+            stats.last_loaded = timestamp
+
+        # The price before the oldest bucket, as reference for the 7d window
+        for bond_id, stats in rebuilt.items():
+            before = db.query(Trade.price, Trade.executed_at).filter(
+                and_(Trade.bond_id == bond_id, Trade.executed_at < since)
+            ).order_by(desc(Trade.executed_at)).first()
+            if before is not None:
+                timestamp = _timestamp(before.executed_at)
+                stats.hours.seed_reference(timestamp, to_units(before.price))
+                stats.minutes.seed_reference(timestamp, to_units(before.price))
+                stats.last_loaded = max(stats.last_loaded, timestamp)
+        self._bonds.update(rebuilt)
+
+    def forget(self, bond_id: uuid.UUID):
+        self._bonds.pop(bond_id, None)
+
+    def clear(self):
+        self._bonds.clear()
+
+
+# Global rolling trade statistics
+trade_stats = TradeStatsCache()
@@ -0,0 +1,180 @@
+import asyncio
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.models import Bond, BondMarketSummary
+from app.services.analytics import bond_analytics
+from app.services.event_loop import call_soon
+from app.services.fixed_point import to_units
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Decay times tried by the Nelson-Siegel fit, in years
+TAU_GRID = np.geomspace(0.1, 30.0, 200)
+# Tenors served when none are asked for, in years
+DEFAULT_TENORS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 20.0, 30.0)
+
+
+class CurvePoint(NamedTuple):
+    bond_id: uuid.UUID
+    tenor: float  # Years to maturity
+    ytm: float
+
+
+class FittedCurve(NamedTuple):
+    beta0: float  # Long-term level
+    beta1: float  # Short-term slope
+    beta2: float  # Medium-term hump
+    tau: float  # Decay time of the slope and hump, in years
+    fitted_at: datetime
+    points: List[CurvePoint]
+
+    def yields(self, tenors: np.ndarray) -> np.ndarray:
+        return nelson_siegel(tenors, self.beta0, self.beta1, self.beta2, self.tau)
+
+
+def _loadings(tenors: np.ndarray, tau: np.ndarray) -> np.ndarray:
+    """Nelson-Siegel factor loadings, shaped (taus, tenors, 3)"""
+    x = np.maximum(tenors, 1e-6)[None, :] / np.atleast_1d(tau)[:, None]
+    slope = (1.0 - np.exp(-x)) / x
+    return np.stack([np.ones_like(x), slope, slope - np.exp(-x)], axis=-1)
+
+
+def nelson_siegel(tenors: np.ndarray, beta0: float, beta1: float, beta2: float, tau: float) -> np.ndarray:
+    return _loadings(np.asarray(tenors, dtype=np.float64), np.array([tau]))[0] @ np.array([beta0, beta1, beta2])
+
+
+def fit_nelson_siegel(tenors: np.ndarray, yields: np.ndarray) -> tuple:
+    """
+    Least-squares Nelson-Siegel fit, returning (beta0, beta1, beta2, tau).
+
+    For a fixed tau the curve is linear in the betas, so the betas of every
+    tau on a grid are solved at once from stacked normal equations and the
+    tau with the smallest error wins. With fewer than three points the
+    curve is flat at their mean.
+    """
+    if len(tenors) < 3:
+        return float(np.mean(yields)), 0.0, 0.0, float(TAU_GRID[len(TAU_GRID) // 2])
+    X = _loadings(tenors, TAU_GRID)
+    XtX = np.einsum("gni,gnj->gij", X, X) + 1e-10 * np.eye(3)
+    Xty = np.einsum("gni,n->gi", X, yields)
+    betas = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+    errors = ((np.einsum("gni,gi->gn", X, betas) - yields) ** 2).sum(axis=1)
+    best = int(np.argmin(errors))
+    beta0, beta1, beta2 = betas[best]
+    return float(beta0), float(beta1), float(beta2), float(TAU_GRID[best])
+
+
+class YieldCurveService:
+    """
+    Nelson-Siegel curve through the yields to maturity of traded active bonds.
+
+    The fitted parameters are cached and any tenor is served from them
+    without refitting. Trades report each bond's last price, and a change
+    from the price the curve was fitted on schedules a refit once prices
+    have been quiet for the debounce period, so a burst of trades costs
+    one refit. Matching workers relay the prices to the API process, which
+    holds the curve.
+    """
+
+    def __init__(self, debounce: float):
+        self.debounce = debounce
+        self._curve: Optional[FittedCurve] = None
+        self._prices: Dict[uuid.UUID, int] = {}  # Price ticks the curve was fitted on
+        self._relay: Optional[Callable[[tuple], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._due: Optional[float] = None
+
+    def set_relay(self, send: Callable[[tuple], None]):
+        """Forward price changes to another process instead of refitting here"""
+        self._relay = send
+
+    def record(self, bond_id: uuid.UUID, last_price: Decimal):
+        """Report a bond's last trade price after a unit of work"""
+        price = to_units(last_price)
+        if self._relay is not None:
+            self._relay(("yield_curve", bond_id, price))
+        else:
+            call_soon(self.price_changed, bond_id, price)
+
+    def price_changed(self, bond_id: uuid.UUID, price: int):
+        if self._curve is None or self._prices.get(bond_id) == price:
+            return  # Fitted on first read, or the input is unchanged
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._curve = None  # Refitted on the next read
+            return
+        self._due = loop.time() + self.debounce
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="yield-curve-refit")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._due is not None and loop.time() < self._due:
+            await asyncio.sleep(self._due - loop.time())
+        self._due = None
+        try:
+            with SessionLocal() as db:
+                self.fit(db)
+        except Exception as e:
+            logger.error(f"Refitting yield curve failed: {e}")
+
+    def get(self, db: Session) -> Optional[FittedCurve]:
+        """The cached curve, fitted now if there is none; None without traded bonds"""
+        if self._curve is None:
+            self.fit(db)
+        return self._curve
+
+    def fit(self, db: Session) -> Optional[FittedCurve]:
+        rows = db.query(Bond, BondMarketSummary.last_price).join(
+            BondMarketSummary, BondMarketSummary.bond_id == Bond.id
+        ).filter(
+            Bond.status == "active",
+            BondMarketSummary.last_price.isnot(None)
+        ).all()
+        analytics = bond_analytics.get_many(rows)
+        now = datetime.utcnow()
+
+        points = []
+        for bond, _ in rows:
+            result = analytics[bond.id]
+            if result is not None:
+                tenor = (bond.maturity_date - now).total_seconds() / (365.25 * 86400)
+                points.append(CurvePoint(bond.id, tenor, result.ytm))
+        self._prices = {bond.id: to_units(price) for bond, price in rows}
+
+        if not points:
+            self._curve = None
+            return None
+        points.sort(key=lambda point: point.tenor)
+        params = fit_nelson_siegel(
+            np.array([point.tenor for point in points]),
+            np.array([point.ytm for point in points])
+        )
+        self._curve = FittedCurve(*params, fitted_at=now, points=points)
+        logger.info(f"Fitted yield curve to {len(points)} bonds")
+        return self._curve
+
+    def clear(self):
+        self._curve = None
+        self._prices.clear()
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global yield curve instance
+yield_curve = YieldCurveService(settings.YIELD_CURVE_DEBOUNCE_SECONDS)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Candle backfill tool for FractionFi
+
+Rebuilds the 1m, 5m, 1h and 1d candles of historical trades. Run it once
+after creating the candles table, with matching stopped, since it replaces
+the candles of the bonds it covers.
+"""
+import argparse
+import os
+import sys
+import uuid
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.db.database import SessionLocal, engine
+from app.models.models import Candle
+from app.services import candles
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild candles from the trades table")
+    parser.add_argument("bond_ids", nargs="*", help="Bonds to backfill (default: every bond)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Trades read per chunk")
+    args = parser.parse_args()
+
+    Candle.__table__.create(bind=engine, checkfirst=True)
+    bond_ids = [uuid.UUID(b) for b in args.bond_ids] or None
+
+    db = SessionLocal()
+    try:
+        written = candles.backfill(db, bond_ids, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    logger.info(f"Backfill complete: {written} candles written")
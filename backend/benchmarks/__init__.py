@@ -0,0 +1,6 @@
+"""
+Matching engine benchmarks for FractionFi
+
+Run from the backend directory:
+    python -m benchmarks --orders 5000 --bonds 20 --seed 42 --output results.json
+"""
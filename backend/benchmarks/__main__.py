@@ -0,0 +1,114 @@
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from typing import Optional
+import sqlalchemy
+from benchmarks.orderflow import OrderFlowGenerator
+from benchmarks.runner import BACKENDS, CORE_ENGINES, ENGINES, run_benchmark
+import logging
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# Metrics compared against a baseline, and whether higher is better
+COMPARED_METRICS = {
+    "orders_per_second": True,
+    "commits_per_order": False,
+    "peak_memory_bytes": False
+}
+
+
+def _latency(result: dict, key: str) -> Optional[float]:
+    return result["match_latency_ms"][key]
+
+
+def print_results(results: list):
+    print(f"{'engine':<16} {'backend':<8} {'orders/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'commits/order':>14} {'peak MB':>9}")
+    for result in results:
+        peak = result["peak_memory_bytes"]
+        print(
+            f"{result['engine']:<16} {result['backend']:<8} {result['orders_per_second']:>10} "
+            f"{_latency(result, 'p50'):>9} {_latency(result, 'p99'):>9} {result['commits_per_order']:>14} "
+            f"{(round(peak / 1024 / 1024, 1) if peak is not None else '-'):>9}"
+        )
+
+
+def compare(results: list, baseline_path: str):
+    """Print the change of each run against the matching run of a previous results file"""
+    with open(baseline_path) as f:
+        baseline = {(r["engine"], r["backend"]): r for r in json.load(f)["results"]}
+
+    print(f"\nChange against {baseline_path}:")
+    for result in results:
+        previous = baseline.get((result["engine"], result["backend"]))
+        if previous is None:
+            continue
+        changes = []
+        metrics = [(name, result[name], previous[name]) for name in COMPARED_METRICS]
+        metrics += [(f"{q}_latency", _latency(result, q), _latency(previous, q)) for q in ("p50", "p99")]
+        for name, current, before in metrics:
+            if current is None or not before:
+                continue
+            changes.append(f"{name} {(current - before) / before * 100:+.1f}%")
+        print(f"  {result['engine']}/{result['backend']}: {', '.join(changes)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the matching engines with synthetic order flow")
+    parser.add_argument("--orders", type=int, default=2000, help="Number of order flow events")
+    parser.add_argument("--bonds", type=int, default=10)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cancel-ratio", type=float, default=0.15)
+    parser.add_argument("--aggressive-ratio", type=float, default=0.3)
+    parser.add_argument("--volatility", type=float, default=2.0, help="Std-dev of the mid price walk, in ticks")
+    parser.add_argument("--engines", default=",".join([*CORE_ENGINES, *ENGINES]), help="Comma-separated engines to run")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated database backends")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak memory run")
+    parser.add_argument("--label", default="", help="Free-form label stored with the results, e.g. a git revision")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    generator = OrderFlowGenerator(
+        seed=args.seed,
+        bonds=args.bonds,
+        users=args.users,
+        cancel_ratio=args.cancel_ratio,
+        aggressive_ratio=args.aggressive_ratio,
+        volatility=args.volatility
+    )
+
+    engines = [name for name in args.engines.split(",") if name]
+    backends = [name for name in args.backends.split(",") if name]
+    unknown = [name for name in engines if name not in ENGINES and name not in CORE_ENGINES]
+    unknown += [name for name in backends if name not in BACKENDS]
+    if unknown:
+        logger.error(f"Unknown engine or backend: {', '.join(unknown)}")
+        sys.exit(1)
+
+    results = []
+    for engine_name in engines:
+        for backend in (backends if engine_name in ENGINES else ["none"]):
+            print(f"Running {engine_name} on {backend}...", file=sys.stderr)
+            results.append(run_benchmark(engine_name, backend, generator, args.orders, not args.no_memory))
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "label": args.label,
+                "created_at": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "sqlalchemy": sqlalchemy.__version__,
+                "events": args.orders,
+                "flow": generator.config(),
+                "results": results
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
@@ -0,0 +1,95 @@
+import random
+import uuid
+from decimal import Decimal
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+# Prices are quoted to two decimals
+TICK = Decimal('0.01')
+
+
+class OrderFlowEvent(NamedTuple):
+    action: str  # "submit" or "cancel"
+    bond: int  # Index into the generator's bonds
+    user: int  # Index into the generator's users
+    order_id: uuid.UUID
+    side: Optional[str] = None
+    price: Optional[Decimal] = None
+    quantity: Optional[Decimal] = None
+    aggressive: bool = False
+
+
+class OrderFlowGenerator:
+    """
+    Seedable synthetic order flow across many bonds.
+
+    Each bond's mid price follows a random walk in ticks. Passive orders
+    rest a few ticks away from the mid on their own side, aggressive
+    orders are priced through the mid so they cross whatever rests on the
+    other side. Activity is skewed towards a few hot bonds, and a share of
+    events cancel an order submitted earlier on the same bond. The same
+    seed always produces the same flow, including order ids.
+    """
+
+    def __init__(self, seed: int = 42, bonds: int = 10, users: int = 50,
+                 cancel_ratio: float = 0.15, aggressive_ratio: float = 0.3,
+                 volatility: float = 2.0, depth: int = 10, max_quantity: int = 20):
+        self.seed = seed
+        self.bonds = bonds
+        self.users = users
+        self.cancel_ratio = cancel_ratio
+        self.aggressive_ratio = aggressive_ratio
+        self.volatility = volatility
+        self.depth = depth
+        self.max_quantity = max_quantity
+
+    def config(self) -> dict:
+        return {
+            "seed": self.seed,
+            "bonds": self.bonds,
+            "users": self.users,
+            "cancel_ratio": self.cancel_ratio,
+            "aggressive_ratio": self.aggressive_ratio,
+            "volatility": self.volatility,
+            "depth": self.depth,
+            "max_quantity": self.max_quantity
+        }
+
+    def events(self, count: int) -> Iterator[OrderFlowEvent]:
+        """Yield `count` events"""
+        rng = random.Random(self.seed)
+        # Mid prices in ticks, around 100.00
+        mids = [rng.randint(9500, 10500) for _ in range(self.bonds)]
+        # Zipf-like activity, so a few bonds carry most of the flow
+        weights = [1 / (i + 1) for i in range(self.bonds)]
+        submitted: Dict[int, List[OrderFlowEvent]] = {}
+
+        for _ in range(count):
+            bond = rng.choices(range(self.bonds), weights)[0]
+            previous = submitted.get(bond)
+
+            if previous and rng.random() < self.cancel_ratio:
+                # Cancel a random earlier order; it may have filled already
+                target = previous.pop(rng.randrange(len(previous)))
+                yield OrderFlowEvent(action="cancel", bond=bond, user=target.user, order_id=target.order_id)
+                continue
+
+            mids[bond] = max(mids[bond] + round(rng.gauss(0, self.volatility)), self.depth + 1)
+            side = "buy" if rng.random() < 0.5 else "sell"
+            aggressive = rng.random() < self.aggressive_ratio
+            # Passive orders rest behind the mid, aggressive ones cross it
+            offset = min(int(rng.expovariate(0.5)) + 1, self.depth)
+            direction = 1 if side == "buy" else -1
+            ticks = mids[bond] + direction * offset if aggressive else mids[bond] - direction * offset
+
+            event = OrderFlowEvent(
+                action="submit",
+                bond=bond,
+                user=rng.randrange(self.users),
+                order_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+                side=side,
+                price=Decimal(ticks) * TICK,
+                quantity=Decimal(rng.randint(1, self.max_quantity)),
+                aggressive=aggressive
+            )
+            submitted.setdefault(bond, []).append(event)
+            yield event
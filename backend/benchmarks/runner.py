@@ -0,0 +1,337 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.websocket import ConnectionManager
+from app.models.models import Base, User, Bond, Holding, Order, Trade
+from app.services.matching_engine import MatchingEngine
+from app.services import matching_core
+from app.services.fixed_point import to_units
+from app.services.order_book import OrderBook, RestingOrder, order_books
+from app.services.order_matching import OrderMatchingEngine
+from app.services.reservations import InsufficientHoldingsError, holding_ledger
+from benchmarks.orderflow import OrderFlowEvent, OrderFlowGenerator
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ["sqlite", "memory"]
+
+
+# The models use PostgreSQL column types; store them as plain text and JSON
+# so the same schema can be created on SQLite
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+def create_backend(backend: str, directory: str):
+    """Create a database engine with the schema for a named backend"""
+    if backend == "sqlite":
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'benchmark.db')}")
+    elif backend == "memory":
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+class _BenchmarkMatchingEngine(MatchingEngine):
+    """MatchingEngine without WebSocket fan-out, which is not part of matching cost"""
+
+    def _broadcast_updates(self, bond_id: uuid.UUID, trades: List[Trade]):
+        pass
+
+
+class EngineAdapter:
+    """Drives one matching engine implementation with the request-level unit of work it runs under"""
+    name = ""
+    session_options: dict = {}
+
+    def reset(self):
+        """Drop process-wide state left by a previous run"""
+        pass
+
+    def submit(self, db: Session, order: Order) -> int:
+        """Insert and match an order, returning the number of trades"""
+        raise NotImplementedError
+
+    def cancel(self, db: Session, order_id: uuid.UUID, user_id: uuid.UUID):
+        raise NotImplementedError
+
+
+class MatchingEngineAdapter(EngineAdapter):
+    """services/matching_engine.py, as run by the bond sequencer"""
+    name = "matching_engine"
+    session_options = {"expire_on_commit": False}
+
+    def __init__(self):
+        self.ws_manager = ConnectionManager()
+
+    def reset(self):
+        order_books.clear()
+        holding_ledger.clear()
+
+    def submit(self, db: Session, order: Order) -> int:
+        try:
+            return len(_BenchmarkMatchingEngine(db, self.ws_manager).process_order(order))
+        except InsufficientHoldingsError:
+            return 0
+
+    def cancel(self, db: Session, order_id: uuid.UUID, user_id: uuid.UUID):
+        _BenchmarkMatchingEngine(db, self.ws_manager).cancel_order(order_id, user_id)
+
+
+class OrderMatchingEngineAdapter(MatchingEngineAdapter):
+    """services/order_matching.py, which matches an order after it has been inserted"""
+    name = "order_matching"
+    session_options = {}
+
+    def submit(self, db: Session, order: Order) -> int:
+        db.add(order)
+        db.commit()
+        matcher = OrderMatchingEngine(db)
+        matcher.engine = _BenchmarkMatchingEngine(db, self.ws_manager)
+        try:
+            return len(matcher.match_order(order.id))
+        except InsufficientHoldingsError:
+            return 0
+
+
+ENGINES: Dict[str, Callable[[], EngineAdapter]] = {
+    MatchingEngineAdapter.name: MatchingEngineAdapter,
+    OrderMatchingEngineAdapter.name: OrderMatchingEngineAdapter
+}
+
+# The matching core runs on plain books with no database behind it. "core"
+# feeds it the integer ticks and lots the live engine uses, "core_decimal"
+# the Decimal prices and quantities it used before, as a baseline.
+CORE_ENGINE = "core"
+CORE_DECIMAL_ENGINE = "core_decimal"
+CORE_ENGINES: Dict[str, Callable[[Decimal], Any]] = {
+    CORE_ENGINE: to_units,
+    CORE_DECIMAL_ENGINE: Decimal
+}
+
+
+def seed_market(db: Session, generator: OrderFlowGenerator) -> Dict[str, list]:
+    """Create the generator's users and bonds, with every user holding enough of each bond to sell"""
+    users = [
+        User(id=uuid.uuid4(), email=f"bench{i}@fractionfi.com", hashed_password="benchmark",
+             name=f"Benchmark User {i}", kyc_status="verified", wallet_address=f"0xbench{i:036x}")
+        for i in range(generator.users)
+    ]
+    db.add_all(users)
+    bonds = [
+        Bond(id=uuid.uuid4(), issuer_id=users[0].id, isin=f"INBENCH{i:05d}", name=f"Benchmark Bond {i}",
+             coupon_rate=7.5, maturity_date=datetime(2035, 1, 1), face_value=Decimal('1000'),
+             min_unit=Decimal('1'), status="active")
+        for i in range(generator.bonds)
+    ]
+    db.add_all(bonds)
+    db.add_all([
+        Holding(id=uuid.uuid4(), user_id=user.id, bond_id=bond.id, quantity=Decimal('1000000'))
+        for user in users for bond in bonds
+    ])
+    db.commit()
+    return {"users": [user.id for user in users], "bonds": [bond.id for bond in bonds]}
+
+
+def _percentile_ms(samples: List[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    return round(float(np.percentile(samples, q)) * 1000, 4)
+
+
+def _replay(adapter: EngineAdapter, factory: sessionmaker, ids: Dict[str, list],
+            events: List[OrderFlowEvent]) -> dict:
+    """Feed the flow through an engine, one session per event like one request per order"""
+    submit_latencies = []
+    cancel_latencies = []
+    commits = {"submit": 0, "cancel": 0}
+    trades = 0
+
+    def count_commit(session):
+        commits[flow_event.action] += 1
+
+    event.listen(factory, "after_commit", count_commit)
+    started = time.perf_counter()
+    for flow_event in events:
+        user_id = ids["users"][flow_event.user]
+        if flow_event.action == "submit":
+            order = Order(
+                id=flow_event.order_id,
+                user_id=user_id,
+                bond_id=ids["bonds"][flow_event.bond],
+                side=flow_event.side,
+                type="limit",
+                price=flow_event.price,
+                quantity=flow_event.quantity,
+                status="open"
+            )
+            t0 = time.perf_counter()
+            with factory() as db:
+                trades += adapter.submit(db, order)
+            submit_latencies.append(time.perf_counter() - t0)
+        else:
+            t0 = time.perf_counter()
+            with factory() as db:
+                adapter.cancel(db, flow_event.order_id, user_id)
+            cancel_latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    event.remove(factory, "after_commit", count_commit)
+    return {
+        "elapsed": elapsed,
+        "trades": trades,
+        "commits": commits,
+        "submit_latencies": submit_latencies,
+        "cancel_latencies": cancel_latencies
+    }
+
+
+def _prepare(engine_name: str, backend: str, generator: OrderFlowGenerator, directory: str):
+    adapter = ENGINES[engine_name]()
+    adapter.reset()
+    db_engine = create_backend(backend, directory)
+    factory = sessionmaker(bind=db_engine, autocommit=False, autoflush=False, **adapter.session_options)
+    with factory() as db:
+        ids = seed_market(db, generator)
+    return adapter, db_engine, factory, ids
+
+
+def _replay_core(generator: OrderFlowGenerator, events: List[OrderFlowEvent],
+                 number: Callable[[Decimal], Any] = to_units) -> dict:
+    """
+    Feed the flow straight into the matching core with one resident book per
+    bond, with prices and quantities converted by `number` outside the timing
+    """
+    users = [uuid.UUID(int=i + 1) for i in range(generator.users)]
+    books = [OrderBook(uuid.UUID(int=i + 1)) for i in range(generator.bonds)]
+    takers = [
+        RestingOrder(flow_event.order_id, users[flow_event.user], flow_event.side,
+                     number(flow_event.price), number(flow_event.quantity))
+        if flow_event.action == "submit" else None
+        for flow_event in events
+    ]
+    submit_latencies = []
+    cancel_latencies = []
+    trades = 0
+    started = time.perf_counter()
+    for flow_event, taker in zip(events, takers):
+        book = books[flow_event.bond]
+        if taker is not None:
+            t0 = time.perf_counter()
+            trades += len(matching_core.match_order(book, taker).fills)
+            submit_latencies.append(time.perf_counter() - t0)
+        else:
+            t0 = time.perf_counter()
+            matching_core.cancel_order(book, flow_event.order_id)
+            cancel_latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed": elapsed,
+        "trades": trades,
+        "commits": {"submit": 0, "cancel": 0},
+        "submit_latencies": submit_latencies,
+        "cancel_latencies": cancel_latencies
+    }
+
+
+def _measure_core(generator: OrderFlowGenerator, events: List[OrderFlowEvent], measure_memory: bool,
+                  number: Callable[[Decimal], Any] = to_units):
+    timings = _replay_core(generator, events, number)
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            _replay_core(generator, events, number)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return timings, peak_memory
+
+
+def _measure_database(engine_name: str, backend: str, generator: OrderFlowGenerator,
+                      events: List[OrderFlowEvent], measure_memory: bool):
+    with tempfile.TemporaryDirectory(prefix="fractionfi-bench-") as directory:
+        adapter, db_engine, factory, ids = _prepare(engine_name, backend, generator, directory)
+        timings = _replay(adapter, factory, ids, events)
+        db_engine.dispose()
+
+    peak_memory = None
+    if measure_memory:
+        with tempfile.TemporaryDirectory(prefix="fractionfi-bench-") as directory:
+            adapter, db_engine, factory, ids = _prepare(engine_name, backend, generator, directory)
+            tracemalloc.start()
+            try:
+                _replay(adapter, factory, ids, events)
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            db_engine.dispose()
+
+    adapter.reset()
+    return timings, peak_memory
+
+
+def run_benchmark(engine_name: str, backend: str, generator: OrderFlowGenerator, count: int,
+                  measure_memory: bool = True) -> dict:
+    """
+    Run one engine on one backend and collect its metrics. The core engines
+    have no backend and run entirely in memory.
+
+    Peak memory is taken from a second, identical run under tracemalloc so
+    that tracing overhead does not distort the timings.
+    """
+    events = list(generator.events(count))
+    orders = sum(1 for e in events if e.action == "submit")
+    cancels = len(events) - orders
+
+    if engine_name in CORE_ENGINES:
+        backend = "none"
+        timings, peak_memory = _measure_core(generator, events, measure_memory, CORE_ENGINES[engine_name])
+    else:
+        timings, peak_memory = _measure_database(engine_name, backend, generator, events, measure_memory)
+
+    elapsed = timings["elapsed"]
+    commits = timings["commits"]
+    return {
+        "engine": engine_name,
+        "backend": backend,
+        "events": len(events),
+        "orders": orders,
+        "cancels": cancels,
+        "trades": timings["trades"],
+        "elapsed_seconds": round(elapsed, 4),
+        "orders_per_second": round(orders / elapsed, 2) if elapsed else None,
+        "events_per_second": round(len(events) / elapsed, 2) if elapsed else None,
+        "match_latency_ms": {
+            "p50": _percentile_ms(timings["submit_latencies"], 50),
+            "p99": _percentile_ms(timings["submit_latencies"], 99),
+            "max": _percentile_ms(timings["submit_latencies"], 100)
+        },
+        "cancel_latency_ms": {
+            "p50": _percentile_ms(timings["cancel_latencies"], 50),
+            "p99": _percentile_ms(timings["cancel_latencies"], 99)
+        },
+        "commits": commits["submit"] + commits["cancel"],
+        "commits_per_order": round(commits["submit"] / orders, 4) if orders else None,
+        "commits_per_cancel": round(commits["cancel"] / cancels, 4) if cancels else None,
+        "peak_memory_bytes": peak_memory
+    }
@@ -0,0 +1,17 @@
+-- Create the bond_market_summary projection if it doesn't exist.
+-- Rows for existing bonds are built from trades and holdings on API startup.
+CREATE TABLE IF NOT EXISTS bond_market_summary (
+    bond_id UUID PRIMARY KEY REFERENCES bonds(id),
+    last_price NUMERIC(20, 2),
+    last_trade_at TIMESTAMP WITH TIME ZONE,
+    reference_price NUMERIC(20, 2),
+    volume_24h NUMERIC(30, 4) NOT NULL DEFAULT 0,
+    high_24h NUMERIC(20, 2),
+    low_24h NUMERIC(20, 2),
+    trades_count_24h INTEGER NOT NULL DEFAULT 0,
+    outstanding_quantity NUMERIC(20, 2) NOT NULL DEFAULT 0,
+    rolls_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_bond_market_summary_rolls_at ON bond_market_summary (rolls_at);
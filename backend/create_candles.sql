@@ -0,0 +1,16 @@
+-- Create the candles table if it doesn't exist.
+-- Candles for trades written before it existed are built with backfill_candles.py.
+-- The primary key is the index range reads use.
+CREATE TABLE IF NOT EXISTS candles (
+    bond_id UUID NOT NULL REFERENCES bonds(id),
+    resolution INTEGER NOT NULL,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    open NUMERIC(20, 2) NOT NULL,
+    high NUMERIC(20, 2) NOT NULL,
+    low NUMERIC(20, 2) NOT NULL,
+    close NUMERIC(20, 2) NOT NULL,
+    volume NUMERIC(20, 2) NOT NULL,
+    notional NUMERIC(30, 4) NOT NULL,
+    trades_count INTEGER NOT NULL,
+    PRIMARY KEY (bond_id, resolution, bucket_start)
+);
@@ -0,0 +1,176 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, List, Optional, Set
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.api_v1.api import api_router
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.websocket import ConnectionManager
+from app.db.database import get_db
+from app.models.models import Base, Bond, Holding, Order, Trade, User
+from app.services.journal import order_journal
+from app.services.matching_engine import MatchingEngine
+from app.services.auction import auction_scheduler
+from app.services.expiry import order_expiry
+from app.services.sequencer import matching_sequencer
+from app.services.yield_curve import yield_curve
+
+
+# The models use PostgreSQL column types; store them as plain text and JSON
+# so the schema can be created on SQLite
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+_uuid_bind_processor = UUID.bind_processor
+
+
+def _bind_uuid_strings(self, dialect):
+    """Let string ids bind to UUID columns on SQLite too, as PostgreSQL casts them"""
+    process = _uuid_bind_processor(self, dialect)
+    if dialect.name != "sqlite" or process is None:
+        return process
+    return lambda value: process(uuid.UUID(value) if isinstance(value, str) else value)
+
+
+UUID.bind_processor = _bind_uuid_strings
+
+
+class RecordingMatchingEngine(MatchingEngine):
+    """MatchingEngine that keeps its WebSocket broadcasts instead of sending them"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.broadcasts: List[tuple] = []
+
+    def _send_updates(self, bond_id: uuid.UUID, trades: List[Trade], book_update: Optional[dict],
+                      user_ids: Set[uuid.UUID]):
+        self.broadcasts.append((bond_id, trades, book_update, user_ids))
+
+
+def seed_market(db, users: int = 3, bonds: int = 1) -> dict:
+    """Users who each hold plenty of every active bond, so any of them can sell"""
+    user_rows = [
+        User(id=uuid.uuid4(), email=f"test{i}@fractionfi.com", hashed_password="test",
+             name=f"Test User {i}", kyc_status="verified", wallet_address=f"0x{i:040x}")
+        for i in range(users)
+    ]
+    db.add_all(user_rows)
+    bond_rows = [
+        Bond(id=uuid.uuid4(), issuer_id=user_rows[0].id, isin=f"INTEST{i:06d}", name=f"Test Bond {i}",
+             coupon_rate=7.5, maturity_date=datetime(2035, 1, 1), face_value=Decimal('1000'),
+             min_unit=Decimal('1'), status="active")
+        for i in range(bonds)
+    ]
+    db.add_all(bond_rows)
+    db.add_all([
+        Holding(id=uuid.uuid4(), user_id=user.id, bond_id=bond.id, quantity=Decimal('1000000'))
+        for user in user_rows for bond in bond_rows
+    ])
+    db.commit()
+    return {"users": [user.id for user in user_rows], "bonds": [bond.id for bond in bond_rows]}
+
+
+@pytest.fixture
+def db_factory(tmp_path):
+    """
+    Sessions on a fresh SQLite schema, with every process-wide cache dropped.
+    The database is a file so each session gets its own connection, as bond
+    sequencers run their transactions on separate threads.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    matching_sequencer.reset_state()
+    # No autoflush, like SessionLocal
+    yield sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    matching_sequencer.reset_state()
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_factory):
+    with db_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def market(db) -> dict:
+    """Three users holding plenty of one active bond"""
+    return seed_market(db)
+
+
+@pytest.fixture
+def engine(db):
+    return RecordingMatchingEngine(db, ConnectionManager())
+
+
+@pytest.fixture
+def submit(engine, market) -> Callable[..., Order]:
+    """Place an order on the market's bond through the matching engine"""
+    def place(side: str, price, quantity, user: int = 0, **fields) -> Order:
+        order = Order(
+            id=uuid.uuid4(),
+            user_id=market["users"][user],
+            bond_id=market["bonds"][0],
+            side=side,
+            type=fields.pop("type", "limit"),
+            price=Decimal(str(price)) if price is not None else None,
+            quantity=Decimal(str(quantity)),
+            status=fields.pop("status", "open"),
+            **fields
+        )
+        engine.process_order(order)
+        return order
+    return place
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    """Point the global order journal at a temporary directory"""
+    directory = tmp_path / "journal"
+    (directory / "snapshots").mkdir(parents=True)
+    monkeypatch.setattr(order_journal, "directory", str(directory))
+    monkeypatch.setattr(order_journal, "_seqs", {})
+    monkeypatch.setattr(order_journal, "_since_snapshot", {})
+    return order_journal
+
+
+@pytest.fixture
+def client(db_factory, market, monkeypatch):
+    """
+    API client on the test database. Requests keep one event loop, so the
+    bond sequencers they start live across requests.
+    """
+    def get_test_db():
+        with db_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    app.dependency_overrides[get_db] = get_test_db
+    monkeypatch.setattr(matching_sequencer, "_session_factory", db_factory)
+    with TestClient(app) as test_client:
+        yield test_client
+        for service in (matching_sequencer, order_expiry, auction_scheduler, yield_curve):
+            test_client.portal.call(service.shutdown)
+
+
+@pytest.fixture
+def auth(market) -> Callable[[int], dict]:
+    """Authorization headers of a market user"""
+    def headers(user: int = 0) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(market['users'][user])}"}
+    return headers
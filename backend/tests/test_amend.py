@@ -0,0 +1,55 @@
+from decimal import Decimal
+from app.services.order_book import order_books
+
+
+def queue(db, bond_id, side="buy") -> list:
+    return [(r.order_id, r.price, r.remaining) for r in order_books.get(db, bond_id).orders(side)]
+
+
+def last_events(journal, bond_id) -> list:
+    return list(journal.read_entries(bond_id))[-1]["events"]
+
+
+def test_quantity_down_keeps_queue_position(db, engine, market, submit, journal):
+    bond_id = market["bonds"][0]
+    first = submit("buy", "99.00", 10)
+    second = submit("buy", "99.00", 5, user=1)
+
+    engine.amend_order(first.id, first.user_id, quantity=Decimal("6"))
+
+    assert queue(db, bond_id) == [(first.id, 9900, 600), (second.id, 9900, 500)]
+    assert last_events(journal, bond_id) == [{"type": "resize", "order_id": str(first.id), "remaining": "6"}]
+
+    # The reduced order still fills first
+    submit("sell", "99.00", 6, user=2)
+    assert first.status == "filled" and second.status == "open"
+
+
+def test_quantity_up_goes_to_the_back_of_its_level(db, engine, market, submit, journal):
+    bond_id = market["bonds"][0]
+    first = submit("buy", "99.00", 5)
+    second = submit("buy", "99.00", 5, user=1)
+
+    engine.amend_order(first.id, first.user_id, quantity=Decimal("8"))
+
+    assert queue(db, bond_id) == [(second.id, 9900, 500), (first.id, 9900, 800)]
+    events = last_events(journal, bond_id)
+    assert [event["type"] for event in events] == ["cancel", "accept"]
+    assert events[0]["order_id"] == str(first.id)
+    assert events[1]["rests"] and events[1]["order"]["order_id"] == str(first.id)
+
+
+def test_price_change_goes_to_the_back_of_the_new_level(db, engine, market, submit, journal):
+    bond_id = market["bonds"][0]
+    first = submit("buy", "99.00", 5)
+    second = submit("buy", "99.00", 5, user=1)
+    lower = submit("buy", "98.00", 5, user=2)
+
+    engine.amend_order(first.id, first.user_id, price=Decimal("98.00"))
+
+    assert queue(db, bond_id) == [(second.id, 9900, 500), (lower.id, 9800, 500), (first.id, 9800, 500)]
+    assert [event["type"] for event in last_events(journal, bond_id)] == ["cancel", "accept"]
+
+    # Moving back to the old price does not restore the old position
+    engine.amend_order(first.id, first.user_id, price=Decimal("99.00"))
+    assert queue(db, bond_id)[:2] == [(second.id, 9900, 500), (first.id, 9900, 500)]
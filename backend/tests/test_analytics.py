@@ -0,0 +1,64 @@
+from datetime import date
+import numpy as np
+import pytest
+from app.services.analytics import cash_flows, price_from_yield, scenario_prices, solve_ytm
+
+SETTLEMENT = date(2024, 3, 15)
+
+
+def flows_of(coupon_rates, maturities, frequencies):
+    return cash_flows(
+        coupon_rates=np.array(coupon_rates, dtype=np.float64),
+        maturities=np.array(maturities, dtype="datetime64[D]"),
+        frequencies=np.array(frequencies, dtype=np.int64),
+        settlement=SETTLEMENT
+    )
+
+
+def test_ytm_recovers_the_pricing_yield():
+    flows = flows_of([5.0, 0.0, 3.25, 12.0], ["2034-06-30", "2029-01-15", "2024-09-15", "2054-11-30"], [2, 1, 4, 12])
+    yields = np.array([0.045, 0.07, 0.03, 0.18])
+    dirty = price_from_yield(flows, yields)
+
+    solved = solve_ytm(flows, dirty, dirty - flows.accrued)
+
+    np.testing.assert_allclose(solved, yields, atol=1e-9)
+
+
+def test_par_bond_yields_its_coupon():
+    flows = flows_of([6.0], ["2034-03-15"], [2])
+
+    solved = solve_ytm(flows, np.array([100.0]), np.array([100.0]))
+
+    np.testing.assert_allclose(solved, [0.06], atol=1e-9)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_unreachable_price_is_nan():
+    flows = flows_of([5.0, 5.0], ["2030-03-15", "2030-03-15"], [2, 2])
+
+    solved = solve_ytm(flows, np.array([-10.0, 100.0]), np.array([-10.0, 100.0]))
+
+    assert np.isnan(solved[0]) and not np.isnan(solved[1])
+
+
+def test_zero_shock_prices_at_the_base_yields():
+    flows = flows_of([5.0, 0.0, 3.25], ["2034-06-30", "2029-01-15", "2024-09-15"], [2, 1, 4])
+    yields = np.array([0.045, 0.07, 0.03])
+
+    prices = scenario_prices(flows, yields, np.zeros((3, 3)))
+
+    np.testing.assert_allclose(prices, np.tile(price_from_yield(flows, yields) - flows.accrued, (3, 1)), atol=1e-12)
+
+
+def test_scenario_blocks_do_not_change_prices():
+    flows = flows_of([5.0, 0.0, 3.25], ["2034-06-30", "2029-01-15", "2024-09-15"], [2, 1, 4])
+    yields = np.array([0.045, 0.07, 0.03])
+    shifts = np.linspace(-0.02, 0.02, 21)[:, None] * np.array([1.0, 0.5, 2.0])
+
+    prices = scenario_prices(flows, yields, shifts, max_elements=1)
+
+    assert prices.shape == (21, 3)
+    np.testing.assert_allclose(prices, scenario_prices(flows, yields, shifts), atol=1e-12)
+    # Prices fall as yields rise
+    assert (np.diff(prices, axis=0) < 0).all()
@@ -0,0 +1,108 @@
+import asyncio
+import pickle
+import uuid
+from app.api.api_v1.endpoints.orders import auction_order_error
+from app.models.models import Bond
+from app.services.auction import auction_scheduler, uncross
+from app.services.order_book import RestingOrder, order_books
+from app.services.sequencer import EngineCall, matching_sequencer
+
+
+def make_auction_bond(db, bond_id, interval=60):
+    bond = db.get(Bond, bond_id)
+    bond.bond_metadata = {"matching_mode": "auction", "auction_interval_seconds": interval}
+    db.commit()
+    return bond
+
+
+def test_clock_starts_when_book_loads(db, market):
+    bond_id = market["bonds"][0]
+    make_auction_bond(db, bond_id)
+
+    async def load():
+        order_books.get(db, bond_id)
+        running = bond_id in auction_scheduler._tasks and not auction_scheduler._tasks[bond_id].done()
+        await auction_scheduler.shutdown()
+        return running
+
+    assert asyncio.run(load())
+
+
+def test_clock_not_started_for_continuous_bond(db, market):
+    async def load():
+        order_books.get(db, market["bonds"][0])
+        started = bool(auction_scheduler._tasks)
+        await auction_scheduler.shutdown()
+        return started
+
+    assert not asyncio.run(load())
+
+
+def test_clock_submits_picklable_engine_call(market, monkeypatch):
+    bond_id = market["bonds"][0]
+    submitted = []
+
+    async def submit(target, action):
+        submitted.append((target, action))
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(matching_sequencer, "submit", submit)
+
+    async def tick():
+        auction_scheduler.ensure(bond_id, 0)
+        await asyncio.sleep(0.01)
+        await auction_scheduler.shutdown()
+
+    asyncio.run(tick())
+    target, action = submitted[0]
+    assert target == bond_id
+    assert isinstance(action, EngineCall)
+    restored = pickle.loads(pickle.dumps(action))
+    assert (restored.method, restored.args) == ("run_auction", (bond_id,))
+
+
+def test_auction_bonds_refuse_orders_that_cannot_rest(db, market):
+    bond = make_auction_bond(db, market["bonds"][0])
+    for time_in_force in ("IOC", "FOK"):
+        assert auction_order_error(bond, time_in_force)
+    for time_in_force in ("GTC", "GTD"):
+        assert auction_order_error(bond, time_in_force) is None
+
+    bond.bond_metadata = None
+    assert auction_order_error(bond, "IOC") is None
+
+
+def resting(user, side, price, remaining):
+    return RestingOrder(uuid.uuid4(), user, side, price, remaining)
+
+
+def test_uncross_maximises_volume():
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    bids = [resting(alice, "buy", 10100, 300), resting(alice, "buy", 10000, 300)]
+    asks = [resting(bob, "sell", 9900, 200), resting(bob, "sell", 10100, 200)]
+
+    result = uncross(bids, asks)
+
+    # 10100 executes 300, the most of any price
+    assert (result.price, result.volume) == (10100, 300)
+    assert [(fill.buy, fill.sell, fill.quantity) for fill in result.fills] == [
+        (bids[0], asks[0], 200), (bids[0], asks[1], 100)
+    ]
+
+
+def test_uncross_fills_in_priority_order():
+    alice, bob, carol = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    bids = [resting(alice, "buy", 10000, 100), resting(bob, "buy", 10000, 100)]
+    asks = [resting(carol, "sell", 10000, 150)]
+
+    result = uncross(bids, asks)
+
+    assert result.price == 10000
+    assert [(fill.buy, fill.quantity) for fill in result.fills] == [(bids[0], 100), (bids[1], 50)]
+
+
+def test_uncross_skips_self_trades_and_uncrossed_books():
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    assert uncross([resting(alice, "buy", 9900, 100)], [resting(bob, "sell", 10000, 100)]) is None
+    assert uncross([resting(alice, "buy", 10000, 100)], [resting(alice, "sell", 10000, 100)]) is None
+    assert uncross([], [resting(bob, "sell", 10000, 100)]) is None
@@ -0,0 +1,86 @@
+import uuid
+from decimal import Decimal
+import pytest
+from app.models.models import Order
+from app.services.order_book import order_books
+from tests.conftest import seed_market
+
+API = "/api/v1/orders/batch"
+
+
+@pytest.fixture
+def market(db) -> dict:
+    """Three users holding plenty of two active bonds"""
+    return seed_market(db, bonds=2)
+
+
+def order(market, side, price, quantity, bond=0) -> dict:
+    return {"bond_id": str(market["bonds"][bond]), "side": side, "price": price, "quantity": quantity}
+
+
+def test_batch_size_is_capped(client, auth, market):
+    orders = [order(market, "buy", f"{90 + i % 10}", "1") for i in range(1000)]
+
+    response = client.post(API, json={"orders": orders}, headers=auth())
+    assert response.status_code == 200
+    assert len(response.json()) == 1000 and all(result["success"] for result in response.json())
+
+    response = client.post(API, json={"orders": orders + [order(market, "buy", "90", "1")]}, headers=auth())
+    assert response.status_code == 422
+
+
+def test_sells_in_one_batch_cannot_oversell(db, client, auth, market):
+    orders = [
+        order(market, "sell", "101", "600000"),
+        order(market, "sell", "102", "300000"),
+        order(market, "sell", "103", "200000"),
+        order(market, "sell", "104", "100000")
+    ]
+
+    results = client.post(API, json={"orders": orders}, headers=auth()).json()
+
+    assert [result["success"] for result in results] == [True, True, False, True]
+    assert results[2]["error"] == "Insufficient holdings for sell order"
+    resting = order_books.get(db, market["bonds"][0]).orders("sell")
+    assert sum(entry.remaining for entry in resting) == 100000000  # 1,000,000 in lots of 0.01
+
+
+def test_results_come_back_in_submission_order(client, auth, market):
+    orders = [
+        order(market, "buy", "99", "1", bond=1),
+        order(market, "buy", "98", "2"),
+        {**order(market, "buy", "97", "3"), "bond_id": "not-a-uuid"},
+        order(market, "sell", "101", "4", bond=1),
+        {**order(market, "buy", "96", "5"), "bond_id": str(uuid.uuid4())},
+        order(market, "sell", "102", "6")
+    ]
+
+    results = client.post(API, json={"orders": orders}, headers=auth()).json()
+
+    assert [result["index"] for result in results] == list(range(6))
+    assert [result["success"] for result in results] == [True, True, False, True, False, True]
+    assert [results[i]["error"] for i in (2, 4)] == ["Invalid bond id", "Bond not found"]
+    for i in (0, 1, 3, 5):
+        assert results[i]["order"]["bond_id"] == orders[i]["bond_id"]
+        assert Decimal(results[i]["order"]["quantity"]) == Decimal(orders[i]["quantity"])
+
+
+def test_later_orders_match_earlier_unflushed_ones(db, engine, market):
+    bond_id = market["bonds"][0]
+
+    def new_order(side, price, quantity, user) -> Order:
+        return Order(id=uuid.uuid4(), user_id=market["users"][user], bond_id=bond_id, side=side, type="limit",
+                     price=Decimal(price), quantity=Decimal(quantity), status="open")
+
+    bid, ask, lift = new_order("buy", "99", "5", 0), new_order("sell", "99", "8", 1), new_order("buy", "100", "2", 2)
+
+    trades = engine.process_orders([bid, ask, lift])
+
+    assert [len(order_trades) for order_trades in trades] == [0, 1, 1]
+    assert (trades[1][0].buy_order_id, trades[1][0].quantity) == (bid.id, Decimal("5"))
+    assert (trades[2][0].sell_order_id, trades[2][0].price, trades[2][0].quantity) == (
+        ask.id, Decimal("99"), Decimal("2")
+    )
+    assert [(o.status, o.filled_quantity) for o in (bid, ask, lift)] == [
+        ("filled", Decimal("5")), ("partial", Decimal("7")), ("filled", Decimal("2"))
+    ]
@@ -0,0 +1,82 @@
+import uuid
+from app.services.book_cache import OrderBookCache, etag_matches
+from app.services.order_book import OrderBook, RestingOrder
+
+
+def place(client, auth, market, side, price, quantity, user=0):
+    body = {"bond_id": str(market["bonds"][0]), "side": side, "price": price, "quantity": quantity}
+    response = client.post("/api/v1/orders/", json=body, headers=auth(user))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_version_moves_only_when_levels_change():
+    cache = OrderBookCache(depth=2)
+    book = OrderBook(uuid.uuid4())
+    book.add(RestingOrder(uuid.uuid4(), uuid.uuid4(), "buy", 9900, 100))
+
+    cache.publish(book)
+    cache.publish(book)
+    assert cache.get(book.bond_id).version == 1
+
+    book.add(RestingOrder(uuid.uuid4(), uuid.uuid4(), "buy", 9800, 100))
+    cache.publish(book)
+    assert cache.get(book.bond_id).version == 2
+    # Below the cached depth nothing visible changes
+    book.add(RestingOrder(uuid.uuid4(), uuid.uuid4(), "buy", 9700, 100))
+    cache.publish(book)
+    assert cache.get(book.bond_id).version == 2
+
+    book.add(RestingOrder(uuid.uuid4(), uuid.uuid4(), "sell", 10100, 50))
+    cache.publish(book)
+    cached = cache.get(book.bond_id)
+    assert cached.version == 3
+    assert [(level.price, level.quantity, level.orders_count) for level in cached.bids] == [
+        (99, 1, 1), (98, 1, 1)
+    ]
+
+
+def test_etag_matching():
+    assert etag_matches('"a-1"', '"a-1"')
+    assert etag_matches('W/"a-1"', '"a-1"')
+    assert etag_matches('"a-0", "a-1"', '"a-1"')
+    assert etag_matches("*", '"a-1"')
+    assert not etag_matches('"a-0"', '"a-1"')
+    assert not etag_matches(None, '"a-1"')
+
+
+def test_orderbook_etag_revalidation(client, auth, market):
+    url = f"/api/v1/orders/{market['bonds'][0]}/orderbook"
+    place(client, auth, market, "buy", "99.50", "10")
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.json()["bids"][0]["price"] == 99.5
+
+    unchanged = client.get(url, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.headers["ETag"] == etag
+
+    place(client, auth, market, "sell", "100.50", "4", user=1)
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["asks"][0]["price"] == 100.5
+
+
+def test_both_endpoints_serve_one_cache_entry(client, auth, market):
+    bond_id = market["bonds"][0]
+    place(client, auth, market, "buy", "99", "10")
+    place(client, auth, market, "buy", "99", "5", user=2)
+    place(client, auth, market, "sell", "101", "3", user=1)
+
+    orders_view = client.get(f"/api/v1/orders/{bond_id}/orderbook")
+    bonds_view = client.get(f"/api/v1/bonds/{bond_id}/orderbook")
+
+    assert orders_view.headers["ETag"] == bonds_view.headers["ETag"]
+    for side in ("bids", "asks"):
+        assert [(level["price"], level["quantity"], level["orders_count"]) for level in orders_view.json()[side]] == [
+            (float(level["price"]), float(level["quantity"]), level["orders_count"]) for level in bonds_view.json()[side]
+        ]
+    assert orders_view.json()["bids"] == [{"price": 99.0, "quantity": 15.0, "total": 1485.0, "orders_count": 2}]
+    assert bonds_view.json()["spread"] == "2.00"
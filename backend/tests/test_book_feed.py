@@ -0,0 +1,123 @@
+import pytest
+from app.services.book_feed import book_feed
+from app.services.order_book import order_books
+
+
+def updates(engine) -> list:
+    return [book_update for _, _, book_update, _ in engine.broadcasts if book_update is not None]
+
+
+def levels(message: dict) -> dict:
+    data = message["data"]
+    return {
+        **{("buy", level["price"]): level["quantity"] for level in data["bids"]},
+        **{("sell", level["price"]): level["quantity"] for level in data["asks"]}
+    }
+
+
+def apply_delta(book: dict, message: dict):
+    for change in message["data"]["changes"]:
+        key = (change["side"], change["price"])
+        if change["quantity"]:
+            book[key] = change["quantity"]
+        else:
+            book.pop(key, None)
+
+
+def test_deltas_replay_over_snapshot(db, engine, market, submit, monkeypatch):
+    monkeypatch.setattr(book_feed, "snapshot_interval", 1000)
+    bond_id = market["bonds"][0]
+    submit("buy", "99.00", 10)
+    submit("buy", "98.50", 5, user=1)
+    submit("sell", "101.00", 7, user=2)
+
+    book = order_books.get(db, bond_id)
+    snapshot = book_feed.snapshot(book)
+    seq = snapshot["data"]["seq"]
+    replayed = levels(snapshot)
+
+    submit("sell", "99.00", 4, user=1)
+    submit("sell", "98.50", 20, user=2)
+    submit("buy", "101.00", 3)
+    submit("buy", "100.00", 2, user=1)
+
+    deltas = [update for update in updates(engine) if update["data"]["seq"] > seq]
+    assert deltas and all(update["type"] == "book_delta" for update in deltas)
+    for delta in deltas:
+        apply_delta(replayed, delta)
+
+    current = book_feed.snapshot(book)
+    assert current["data"]["seq"] == deltas[-1]["data"]["seq"]
+    assert replayed == levels(current)
+
+
+def test_seq_grows_by_one_per_message(engine, market, submit, monkeypatch):
+    monkeypatch.setattr(book_feed, "snapshot_interval", 3)
+    for i in range(7):
+        submit("buy", f"9{i}.00", 1)
+
+    published = updates(engine)
+    assert [update["data"]["seq"] for update in published] == list(range(1, 8))
+    assert [update["type"] for update in published] == [
+        "book_snapshot", "book_delta", "book_delta",
+        "book_snapshot", "book_delta", "book_delta",
+        "book_snapshot"
+    ]
+
+
+def test_unit_of_work_without_level_changes_publishes_nothing(engine, market, submit):
+    order = submit("buy", "99.00", 1)
+    engine.cancel_order(order.id, order.user_id)
+    count = len(updates(engine))
+
+    # Already cancelled, so no level moves
+    engine.cancel_order(order.id, order.user_id)
+    assert len(updates(engine)) == count
+
+
+def test_rollback_publishes_nothing(db, engine, market, submit, monkeypatch):
+    monkeypatch.setattr(book_feed, "snapshot_interval", 1000)
+    bond_id = market["bonds"][0]
+    submit("buy", "99.00", 10)
+    submit("buy", "98.00", 10)
+    count = len(updates(engine))
+    seq = book_feed.snapshot(order_books.get(db, bond_id))["data"]["seq"]
+
+    def crash():
+        raise RuntimeError("connection lost")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "commit", crash)
+        with pytest.raises(RuntimeError):
+            submit("sell", "99.00", 4, user=1)
+
+    assert len(updates(engine)) == count
+    assert book_feed.snapshot(order_books.get(db, bond_id))["data"]["seq"] == seq
+
+    # The book was rebuilt, so the next message resyncs clients with a snapshot
+    submit("buy", "97.00", 1)
+    update = updates(engine)[-1]
+    assert update["type"] == "book_snapshot"
+    assert update["data"]["seq"] == seq + 1
+
+
+def test_joining_a_bond_room_sends_a_snapshot(client, auth, market):
+    bond_id = str(market["bonds"][0])
+    body = {"bond_id": bond_id, "side": "buy", "price": "99.00", "quantity": "10"}
+    assert client.post("/api/v1/orders/", json=body, headers=auth()).status_code == 200
+
+    with client.websocket_connect("/api/v1/ws/ws") as websocket:
+        assert websocket.receive_json()["type"] == "connected"
+        websocket.send_json({"type": "join_room", "room": f"bond_{bond_id}"})
+        assert websocket.receive_json() == {"type": "room_joined", "room": f"bond_{bond_id}"}
+        snapshot = websocket.receive_json()
+
+        websocket.send_json({"type": "book_snapshot", "bond_id": bond_id})
+        resync = websocket.receive_json()
+
+    assert snapshot["type"] == "book_snapshot"
+    assert snapshot["data"]["bond_id"] == bond_id
+    assert snapshot["data"]["seq"] == 1
+    assert snapshot["data"]["bids"] == [{"price": 99.0, "quantity": 10.0}]
+    assert snapshot["data"]["asks"] == []
+    assert resync == snapshot
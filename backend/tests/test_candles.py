@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import event
+from app.models.models import Candle, Trade
+from app.services.candles import Bar, aggregate, apply_trades
+
+START = datetime(2024, 1, 1)
+
+
+def trade(second, price, quantity="1"):
+    return Bar.from_trade(START + timedelta(seconds=second), Decimal(price), Decimal(quantity))
+
+
+def test_trades_roll_up_into_minutes():
+    trades = [trade(5, "100"), trade(20, "101.5", "2"), trade(59, "99"), trade(61, "100.25")]
+
+    minutes, current = aggregate(trades, 60)
+
+    assert len(minutes) == 1
+    bar = minutes[0].values()
+    assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (
+        Decimal("100.00"), Decimal("101.50"), Decimal("99.00"), Decimal("99.00"))
+    assert bar["volume"] == Decimal("4.00") and bar["trades_count"] == 3
+    assert bar["notional"] == Decimal("402.0000")
+    assert current.start == minutes[0].start + 60 and current.close == 10025
+
+
+def test_minutes_roll_up_like_trades():
+    trades = [trade(second, str(100 + second % 7), "0.5") for second in range(0, 900, 45)]
+
+    direct, direct_open = aggregate(trades, 300)
+    minutes, open_minute = aggregate(trades, 60)
+    rolled, rolled_open = aggregate(minutes + [open_minute], 300)
+
+    assert [bar.values() for bar in rolled + [rolled_open]] == [bar.values() for bar in direct + [direct_open]]
+    assert [bar.start for bar in rolled] == [bar.start for bar in direct]
+
+
+def test_carry_continues_an_open_bar():
+    trades = [trade(0, "100"), trade(30, "102"), trade(70, "101")]
+
+    completed, current = aggregate(trades[:2], 60)
+    assert completed == []
+    completed, current = aggregate(trades[2:], 60, carry=current)
+
+    assert len(completed) == 1 and completed[0].count == 2 and completed[0].high == 10200
+    assert current.count == 1
+
+
+def test_apply_trades_loads_stored_bars_in_one_query(db, market):
+    bond_id = market["bonds"][0]
+
+    def fills(*entries):
+        return [Trade(executed_at=START + timedelta(seconds=second), price=Decimal(price), quantity=Decimal("1"))
+                for second, price in entries]
+
+    apply_trades(db, bond_id, fills((10, "100"), (70, "101")))
+    db.commit()
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        apply_trades(db, bond_id, fills((80, "99"), (400, "102")))
+        db.flush()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len([statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]) == 1
+    bars = {(candle.resolution, candle.bucket_start): candle for candle in db.query(Candle).all()}
+    minute = bars[(60, START + timedelta(minutes=1))]
+    assert (minute.open, minute.low, minute.close, minute.trades_count) == (
+        Decimal("101.00"), Decimal("99.00"), Decimal("99.00"), 2)
+    assert bars[(60, START + timedelta(minutes=6))].trades_count == 1
+    assert [bars[(300, START)].trades_count, bars[(300, START + timedelta(minutes=5))].trades_count] == [3, 1]
+    hour = bars[(3600, START)]
+    assert (hour.open, hour.high, hour.low, hour.close, hour.volume, hour.trades_count) == (
+        Decimal("100.00"), Decimal("102.00"), Decimal("99.00"), Decimal("102.00"), Decimal("4.00"), 4)
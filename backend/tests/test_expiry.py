@@ -0,0 +1,35 @@
+from app.services.expiry import TimingWheel
+
+
+def test_keys_expire_at_their_deadline_across_levels():
+    wheel = TimingWheel(resolution=1.0, slots=4, levels=3, now=0)
+    deadlines = {"soon": 2, "level1": 9, "level2": 37, "beyond": 200}
+    for key, deadline in deadlines.items():
+        wheel.add(key, deadline)
+
+    expired_at = {}
+    for now in range(1, 201):
+        for key in wheel.advance(now):
+            expired_at[key] = now
+
+    assert expired_at == deadlines
+    assert len(wheel) == 0
+
+
+def test_fractional_deadline_is_never_early():
+    wheel = TimingWheel(now=100)
+    wheel.add("key", 101.5)
+    assert wheel.advance(101) == []
+    assert wheel.advance(102) == ["key"]
+
+
+def test_readd_and_discard():
+    wheel = TimingWheel(slots=4, levels=2, now=0)
+    wheel.add("moved", 3)
+    wheel.add("moved", 10)
+    wheel.add("dropped", 5)
+    wheel.discard("dropped")
+
+    assert wheel.advance(9) == []
+    assert "moved" in wheel and "dropped" not in wheel
+    assert wheel.advance(10) == ["moved"]
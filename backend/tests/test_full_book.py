@@ -0,0 +1,68 @@
+import json
+from decimal import Decimal
+from itertools import groupby
+from app.api.api_v1.endpoints import orders
+from app.services.sequencer import matching_sequencer
+
+API = "/api/v1/orders"
+
+
+def test_full_book_streams_every_order_across_pages(client, auth, market, monkeypatch):
+    bond_id = str(market["bonds"][0])
+    bids = [("98", "1"), ("99", "2"), ("97", "3"), ("99", "4"), ("96", "5"), ("98", "6"), ("99", "7"), ("95", "8")]
+    asks = [("102", "1"), ("101", "2"), ("101", "3"), ("103", "4"), ("102", "5")]
+    ids = {}
+    for side, user, entries in (("buy", 0, bids), ("sell", 1, asks)):
+        body = {"orders": [
+            {"bond_id": bond_id, "side": side, "price": price, "quantity": quantity} for price, quantity in entries
+        ]}
+        results = client.post(f"{API}/batch", json=body, headers=auth(user)).json()
+        ids[side] = [result["order"]["id"] for result in results]
+
+    # Three orders a page, so each side takes several pages
+    monkeypatch.setattr(orders, "FULL_BOOK_PAGE_SIZE", 3)
+    pages = []
+    submit = matching_sequencer.submit
+
+    async def counting_submit(bond_uuid, action):
+        if action.method == "book_page":
+            pages.append(action.args[1:])
+        return await submit(bond_uuid, action)
+
+    monkeypatch.setattr(matching_sequencer, "submit", counting_submit)
+
+    response = client.get(f"{API}/{bond_id}/orderbook/full")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(side, after) for side, after, _ in pages] == [
+        ("buy", None), ("buy", Decimal("99")), ("buy", Decimal("97")), ("sell", None), ("sell", Decimal("102"))
+    ]
+
+    for side, entries in (("buy", bids), ("sell", asks)):
+        side_lines = [line for line in lines if line["side"] == side]
+        levels = [line for line in side_lines if line["type"] == "level"]
+        prices = [level["price"] for level in levels]
+        assert prices == sorted(set(prices), reverse=(side == "buy"))
+        assert len(prices) == len({price for price, _ in entries}) and side_lines[0]["type"] == "level"
+
+        # Every level line is followed by its orders in queue order, and no order is repeated or lost
+        for level, group in zip(levels, (
+            list(group) for is_level, group in groupby(side_lines, lambda line: line["type"] == "level")
+            if not is_level
+        )):
+            expected = [
+                (ids[side][i], float(quantity))
+                for i, (price, quantity) in enumerate(entries) if float(price) == level["price"]
+            ]
+            assert [(line["order_id"], line["remaining"]) for line in group] == expected
+            assert [line["queue_position"] for line in group] == list(range(1, len(expected) + 1))
+            assert level["orders_count"] == len(expected)
+            assert level["quantity"] == sum(remaining for _, remaining in expected)
+            assert all(line["price"] == level["price"] for line in group)
+        assert sum(level["orders_count"] for level in levels) == len(entries)
+
+    assert len({line["seq"] for line in lines if line["type"] == "level"}) == 1
+    assert lines[0]["side"] == "buy" and lines[-1]["side"] == "sell"
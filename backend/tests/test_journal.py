@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from app.services.order_book import OrderBook, OrderBookRegistry, order_books
+from replay_journal import resting_orders
+
+
+def book_state(book: OrderBook) -> dict:
+    return {
+        side: [(r.order_id, r.price, r.remaining) for r in book.orders(side)]
+        for side in ("buy", "sell")
+    }
+
+
+def test_replay_after_amend_through_the_spread(db, engine, market, submit, journal):
+    bond_id = market["bonds"][0]
+    bid = submit("buy", "99.00", 10)
+    submit("sell", "101.00", 10, user=1)
+    other_bid = submit("buy", "98.00", 5, user=2)
+
+    # Reprice the bid through the spread so it fills in full and never rests again
+    engine.amend_order(bid.id, bid.user_id, price=Decimal("101.00"))
+    assert bid.status == "filled"
+
+    live = order_books.get(db, bond_id)
+    rebuilt = journal.load_book(db, bond_id)
+    assert book_state(rebuilt) == book_state(live)
+    assert [r.order_id for r in rebuilt.orders("buy")] == [other_bid.id]
+
+
+def test_replay_after_amend_that_rests_its_remainder(db, engine, market, submit, journal):
+    bond_id = market["bonds"][0]
+    bid = submit("buy", "99.00", 10)
+    submit("sell", "101.00", 4, user=1)
+
+    engine.amend_order(bid.id, bid.user_id, price=Decimal("101.00"))
+    assert bid.status == "partial"
+
+    rebuilt = journal.load_book(db, bond_id)
+    assert book_state(rebuilt) == book_state(order_books.get(db, bond_id))
+    assert [(r.price, r.remaining) for r in rebuilt.orders("buy")] == [(10100, 600)]
+
+
+def test_replay_after_quantity_increase_requeues(db, engine, market, submit, journal):
+    bond_id = market["bonds"][0]
+    first = submit("buy", "99.00", 5)
+    second = submit("buy", "99.00", 5, user=1)
+
+    engine.amend_order(first.id, first.user_id, quantity=Decimal("8"))
+
+    rebuilt = journal.load_book(db, bond_id)
+    assert book_state(rebuilt) == book_state(order_books.get(db, bond_id))
+    assert [r.order_id for r in rebuilt.orders("buy")] == [second.id, first.id]
+
+
+def test_uncommitted_tail_is_skipped_and_repaired(db, engine, market, submit, journal, monkeypatch):
+    bond_id = market["bonds"][0]
+    bid = submit("buy", "99.00", 10)
+
+    # The process dies after journaling a match but before its commit
+    def crash():
+        raise RuntimeError("connection lost")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "commit", crash)
+        with pytest.raises(RuntimeError):
+            submit("sell", "99.00", 4, user=1)
+
+    rebuilt = journal.load_book(db, bond_id)
+    assert [(r.order_id, r.remaining) for r in rebuilt.orders("buy")] == [(bid.id, 1000)]
+    assert list(journal.read_entries(bond_id, journal._read_snapshot(bond_id)["seq"])) == []
+
+    # Later units of work journal and replay normally after the repair
+    order_books.clear()
+    submit("sell", "99.00", 4, user=1)
+    rebuilt = journal.load_book(db, bond_id)
+    assert [(r.order_id, r.remaining) for r in rebuilt.orders("buy")] == [(bid.id, 600)]
+
+
+def test_committed_tail_is_replayed(db, market, submit, journal):
+    bond_id = market["bonds"][0]
+    submit("buy", "99.00", 10)
+    submit("sell", "99.00", 4, user=1)
+
+    rebuilt = journal.load_book(db, bond_id)
+    assert book_state(rebuilt) == book_state(order_books.get(db, bond_id))
+
+
+def test_replay_check_ignores_requeue_order(db, engine, market, submit, journal):
+    bond_id = market["bonds"][0]
+    now = datetime.utcnow()
+    first = submit("buy", "99.00", 5, created_at=now - timedelta(minutes=1))
+    submit("buy", "99.00", 5, user=1, created_at=now)
+    engine.amend_order(first.id, first.user_id, quantity=Decimal("8"))
+
+    rebuilt = journal.load_book(db, bond_id, repair=False)
+    stored = OrderBookRegistry.load_from_db(db, bond_id)
+    assert [r.order_id for r in rebuilt.orders("buy")] != [r.order_id for r in stored.orders("buy")]
+    for side in ("buy", "sell"):
+        assert resting_orders(rebuilt, side) == resting_orders(stored, side)
@@ -0,0 +1,31 @@
+from decimal import Decimal
+from app.models.models import BondMarketSummary
+
+
+def test_first_trade_creates_summary_including_it(db, market, submit):
+    bond_id = market["bonds"][0]
+    assert db.get(BondMarketSummary, bond_id) is None
+
+    submit("sell", "101.00", 4, user=1)
+    submit("buy", "101.00", 4)
+
+    summary = db.get(BondMarketSummary, bond_id)
+    assert summary.last_price == Decimal("101.00")
+    assert summary.trades_count_24h == 1
+    assert summary.volume_24h == Decimal("404.00")
+    assert summary.high_24h == summary.low_24h == Decimal("101.00")
+    assert summary.rolls_at is not None
+
+
+def test_later_trades_fold_into_summary(db, market, submit):
+    bond_id = market["bonds"][0]
+    submit("sell", "101.00", 4, user=1)
+    submit("buy", "101.00", 4)
+    submit("sell", "99.50", 2, user=2)
+    submit("buy", "99.50", 2)
+
+    summary = db.get(BondMarketSummary, bond_id)
+    assert summary.last_price == Decimal("99.50")
+    assert summary.trades_count_24h == 2
+    assert summary.volume_24h == Decimal("603.00")
+    assert (summary.low_24h, summary.high_24h) == (Decimal("99.50"), Decimal("101.00"))
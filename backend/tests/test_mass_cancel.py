@@ -0,0 +1,88 @@
+from decimal import Decimal
+import pytest
+from app.models.models import Holding
+from app.services.order_book import order_books
+from app.services.reservations import holding_ledger
+from tests.conftest import seed_market
+
+API = "/api/v1/orders"
+
+
+@pytest.fixture
+def market(db) -> dict:
+    """Three users holding plenty of two active bonds"""
+    return seed_market(db, bonds=2)
+
+
+@pytest.fixture
+def place(client, auth, market):
+    def post(side, price, quantity, user=0, bond=0) -> str:
+        body = {"bond_id": str(market["bonds"][bond]), "side": side, "price": price, "quantity": quantity}
+        response = client.post(f"{API}/", json=body, headers=auth(user))
+        assert response.status_code == 200
+        return response.json()["id"]
+    return post
+
+
+def statuses(client, auth, order_ids, user=0) -> list:
+    return [client.get(f"{API}/{order_id}", headers=auth(user)).json()["status"] for order_id in order_ids]
+
+
+def test_filters_by_bond_side_and_price(client, auth, market, place):
+    low, mid, high = place("buy", "97", "1"), place("buy", "98", "1"), place("buy", "99.50", "1")
+    other_bond = place("buy", "98", "1", bond=1)
+    sell = place("sell", "101", "1")
+
+    response = client.delete(f"{API}/", headers=auth(), params={
+        "bond_id": str(market["bonds"][0]), "side": "buy", "min_price": "98", "max_price": "99"
+    })
+
+    assert response.status_code == 200
+    assert response.json()["cancelled_count"] == 1
+    assert response.json()["order_ids"] == [mid]
+    assert statuses(client, auth, [low, mid, high, other_bond, sell]) == [
+        "open", "cancelled", "open", "open", "open"
+    ]
+
+
+def test_cancels_only_the_callers_live_orders(db, client, auth, market, place):
+    bond_id = market["bonds"][0]
+    partial = place("buy", "96", "10")
+    place("sell", "96", "4", user=2)
+    filled = place("buy", "100", "1")
+    place("sell", "100", "1", user=2)
+    cancelled = place("buy", "95", "1")
+    client.delete(f"{API}/{cancelled}", headers=auth())
+    resting = place("buy", "97", "3")
+    other_bond = place("buy", "98", "1", bond=1)
+    others = place("buy", "97", "2", user=1)
+    assert statuses(client, auth, [partial]) == ["partial"]
+
+    response = client.delete(f"{API}/", headers=auth())
+
+    assert sorted(response.json()["order_ids"]) == sorted([partial, resting, other_bond])
+    assert statuses(client, auth, [partial, filled, cancelled, resting, other_bond]) == [
+        "cancelled", "filled", "cancelled", "cancelled", "cancelled"
+    ]
+    assert statuses(client, auth, [others], user=1) == ["open"]
+    # Only the other user's order is left resident
+    assert [str(entry.order_id) for entry in order_books.get(db, bond_id).orders("buy")] == [others]
+    assert list(order_books.get(db, market["bonds"][1]).orders("buy")) == []
+
+
+def test_releases_sell_reservations(db, client, auth, market, place):
+    user_id, bond_id = market["users"][0], market["bonds"][0]
+    held = holding_ledger.available(db, user_id, bond_id)
+    place("sell", "101", "5")
+    place("sell", "102", "7.50")
+    place("buy", "99", "4")
+    assert holding_ledger.available(db, user_id, bond_id) == held - Decimal("12.50")
+
+    response = client.delete(f"{API}/", headers=auth(), params={"side": "sell"})
+
+    assert response.json()["cancelled_count"] == 2
+    assert holding_ledger.available(db, user_id, bond_id) == held
+    db.expire_all()
+    holding = db.query(Holding).filter(Holding.user_id == user_id, Holding.bond_id == bond_id).one()
+    assert holding.locked_quantity == 0
+    assert list(order_books.get(db, bond_id).orders("sell")) == []
@@ -0,0 +1,74 @@
+import uuid
+from app.services.matching_core import can_fill, match_order
+from app.services.order_book import OrderBook, RestingOrder
+
+ALICE, BOB, CAROL = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+
+def order(user, side, price, remaining):
+    return RestingOrder(uuid.uuid4(), user, side, price, remaining)
+
+
+def make_book(*orders):
+    book = OrderBook(uuid.uuid4())
+    for resting in orders:
+        book.add(resting)
+    return book
+
+
+def test_better_price_fills_first():
+    worse, better = order(ALICE, "sell", 10100, 500), order(BOB, "sell", 10000, 500)
+    book = make_book(worse, better)
+
+    result = match_order(book, order(CAROL, "buy", 10100, 700))
+
+    assert [(fill.maker_order_id, fill.price, fill.quantity) for fill in result.fills] == [
+        (better.order_id, 10000, 500), (worse.order_id, 10100, 200)
+    ]
+    assert result.remaining == 0 and not result.rested
+    assert book.get(worse.order_id).remaining == 300
+    assert better.order_id not in book
+
+
+def test_earlier_order_fills_first_within_a_price():
+    first, second = order(ALICE, "buy", 9900, 300), order(BOB, "buy", 9900, 300)
+    book = make_book(first, second)
+
+    result = match_order(book, order(CAROL, "sell", 9900, 400))
+
+    assert [(fill.maker_order_id, fill.quantity) for fill in result.fills] == [
+        (first.order_id, 300), (second.order_id, 100)
+    ]
+    assert all(fill.buyer_id != CAROL and fill.seller_id == CAROL for fill in result.fills)
+
+
+def test_limit_stops_matching_and_remainder_rests():
+    ask = order(ALICE, "sell", 10000, 200)
+    book = make_book(ask, order(BOB, "sell", 10200, 200))
+    taker = order(CAROL, "buy", 10100, 500)
+
+    result = match_order(book, taker)
+
+    assert [fill.maker_order_id for fill in result.fills] == [ask.order_id]
+    assert result.remaining == 300 and result.rested
+    assert book.best_bid().price == 10100 and book.best_bid().quantity == 300
+    assert (("buy", 10100, 300) in result.deltas) and (("sell", 10000, 0) in result.deltas)
+
+
+def test_own_orders_are_skipped():
+    own, other = order(ALICE, "sell", 10000, 200), order(BOB, "sell", 10000, 200)
+    book = make_book(own, other)
+
+    result = match_order(book, order(ALICE, "buy", 10000, 200), rest=False)
+
+    assert [fill.maker_order_id for fill in result.fills] == [other.order_id]
+    assert book.get(own.order_id).remaining == 200
+
+
+def test_can_fill_leaves_the_book_alone():
+    book = make_book(order(ALICE, "sell", 10000, 200), order(BOB, "sell", 10100, 200))
+
+    assert can_fill(book, order(CAROL, "buy", 10100, 400))
+    assert not can_fill(book, order(CAROL, "buy", 10000, 400))
+    assert not can_fill(book, order(ALICE, "buy", 10100, 400))  # Own order does not count
+    assert len(book) == 2 and book.best_ask().quantity == 200
@@ -0,0 +1,22 @@
+import pytest
+
+API = "/api/v1/orders"
+
+
+@pytest.mark.parametrize("field,value", [("quantity", "0.004"), ("quantity", "1.005"), ("price", "100.001")])
+def test_amounts_finer_than_the_column_are_rejected(client, auth, market, field, value):
+    body = {"bond_id": str(market["bonds"][0]), "side": "buy", "price": "100", "quantity": "1"}
+    body[field] = value
+
+    response = client.post(f"{API}/", json=body, headers=auth())
+
+    assert response.status_code == 422
+
+
+def test_order_at_column_scale_is_accepted(client, auth, market):
+    body = {"bond_id": str(market["bonds"][0]), "side": "buy", "price": "100.25", "quantity": "1.50"}
+
+    response = client.post(f"{API}/", json=body, headers=auth())
+
+    assert response.status_code == 200
+    assert response.json()["quantity"] == "1.50" and response.json()["status"] == "open"
@@ -0,0 +1,21 @@
+import uuid
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    moment, row_id = datetime(2024, 3, 1, 12, 30, 5, 123456), uuid.uuid4()
+
+    cursor = encode_cursor(moment, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (moment, row_id)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "", encode_cursor(datetime(2024, 1, 1), uuid.uuid4())[:-4]])
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,59 @@
+import io
+from datetime import datetime
+import numpy as np
+import pytest
+from app.models.models import Bond
+from tests.conftest import seed_market
+
+API = "/api/v1/bonds/price-scenarios"
+
+
+@pytest.fixture
+def market(db) -> dict:
+    """Two active bonds with different coupons and maturities"""
+    market = seed_market(db, bonds=2)
+    bond = db.get(Bond, market["bonds"][1])
+    bond.coupon_rate, bond.maturity_date = 4.0, datetime(2029, 6, 30)
+    db.commit()
+    return market
+
+
+def test_zero_shock_prices_equal_base_prices(client, market):
+    body = {"bond_ids": [str(bond_id) for bond_id in market["bonds"]], "shocks": [[0.0], [0.0]]}
+
+    result = client.post(API, json=body).json()
+
+    assert result["bond_ids"] == body["bond_ids"]
+    for row in result["prices"]:
+        assert row == pytest.approx(result["base_prices"], abs=1e-9)
+
+
+def test_shock_matrix_shape_round_trips(client, market):
+    shocks = [[-50.0, 0.0, 25.0], [0.0, 0.0, 0.0], [10.0, 20.0, 30.0], [100.0, 100.0, 100.0]]
+    body = {"bond_ids": [str(market["bonds"][1]), str(market["bonds"][0])], "tenors": [1.0, 5.0, 10.0],
+            "shocks": shocks}
+
+    result = client.post(API, json=body).json()
+
+    assert np.array(result["prices"]).shape == (4, 2)
+    assert result["bond_ids"] == body["bond_ids"]
+    assert result["maturities"][0] < result["maturities"][1]
+    assert client.post(API, json={**body, "shocks": [[0.0, 0.0]]}).status_code == 422
+    assert client.post(API, json={**body, "tenors": [5.0, 1.0, 10.0]}).status_code == 422
+
+
+def test_npy_and_json_responses_agree(client, market):
+    body = {
+        "bond_ids": [str(bond_id) for bond_id in market["bonds"]],
+        "shocks": [[-100.0], [-10.0], [0.0], [10.0], [100.0]]
+    }
+
+    result = client.post(API, json=body).json()
+    response = client.post(API, json=body, params={"format": "npy"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-npy"
+    assert response.headers["x-bond-ids"].split(",") == result["bond_ids"]
+    prices = np.load(io.BytesIO(response.content))
+    assert prices.dtype == np.float64 and prices.shape == (5, 2)
+    np.testing.assert_array_equal(prices, np.array(result["prices"]))
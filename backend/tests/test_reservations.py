@@ -0,0 +1,59 @@
+from decimal import Decimal
+import pytest
+from app.models.models import Holding
+from app.services.reservations import HoldingLedger, InsufficientHoldingsError
+
+
+@pytest.fixture
+def position(db, market):
+    """A user, the bond, and the quantity they hold of it"""
+    user_id, bond_id = market["users"][0], market["bonds"][0]
+    holding = db.query(Holding).filter(Holding.user_id == user_id, Holding.bond_id == bond_id).one()
+    return user_id, bond_id, holding.quantity
+
+
+def test_reserve_up_to_holdings(db, position):
+    user_id, bond_id, held = position
+    ledger = HoldingLedger()
+
+    ledger.reserve(db, user_id, bond_id, held - Decimal('1'))
+    ledger.reserve(db, user_id, bond_id, Decimal('1'))
+    with pytest.raises(InsufficientHoldingsError):
+        ledger.reserve(db, user_id, bond_id, Decimal('0.01'))
+    assert ledger.available(db, user_id, bond_id) == 0
+
+
+def test_release_frees_and_never_goes_negative(db, position):
+    user_id, bond_id, held = position
+    ledger = HoldingLedger()
+    ledger.reserve(db, user_id, bond_id, Decimal('10'))
+
+    ledger.release(user_id, bond_id, Decimal('4'))
+    assert ledger.available(db, user_id, bond_id) == held - Decimal('6')
+    ledger.release(user_id, bond_id, Decimal('100'))
+    assert ledger.get(db, user_id, bond_id).locked == 0
+
+
+def test_fill_moves_quantity_and_consumes_reservation(db, market, position):
+    seller_id, bond_id, held = position
+    buyer_id = market["users"][1]
+    ledger = HoldingLedger()
+    bought_before = ledger.get(db, buyer_id, bond_id).quantity
+    ledger.reserve(db, seller_id, bond_id, Decimal('10'))
+
+    ledger.apply_fill(buyer_id, seller_id, bond_id, Decimal('3'))
+
+    seller = ledger.get(db, seller_id, bond_id)
+    assert (seller.quantity, seller.locked) == (held - Decimal('3'), Decimal('7'))
+    assert ledger.get(db, buyer_id, bond_id).quantity == bought_before + Decimal('3')
+
+
+def test_invalidate_reloads_locked_quantity(db, position):
+    user_id, bond_id, held = position
+    ledger = HoldingLedger()
+    ledger.reserve(db, user_id, bond_id, Decimal('10'))
+
+    ledger.invalidate(bond_id=bond_id)
+
+    entry = ledger.get(db, user_id, bond_id)
+    assert (entry.quantity, entry.locked) == (held, Decimal('0'))
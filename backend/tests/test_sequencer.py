@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+import uuid
+from decimal import Decimal
+from app.models.models import Order
+from app.services.sequencer import EngineCall, MatchingSequencer
+from tests.conftest import seed_market
+
+
+def run_sequenced(db_factory, market, submissions):
+    """Submit (bond index, action) pairs concurrently and return their results in order"""
+    async def main():
+        sequencer = MatchingSequencer(session_factory=db_factory, maxsize=100, batch_size=10)
+        try:
+            return await asyncio.gather(*[
+                sequencer.submit(market["bonds"][bond], action) for bond, action in submissions
+            ])
+        finally:
+            await sequencer.shutdown()
+
+    return asyncio.run(main())
+
+
+def test_batches_of_different_bonds_overlap(db_factory, db):
+    market = seed_market(db, bonds=2)
+    # Each action only gets past the barrier while the other bond's runs too
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet(engine):
+        barrier.wait()
+        return threading.current_thread().name
+
+    first, second = run_sequenced(db_factory, market, [(0, meet), (1, meet)])
+
+    assert first != second
+
+
+def test_event_loop_runs_while_a_batch_does(db_factory, market):
+    started = threading.Event()
+
+    def slow(engine):
+        started.set()
+        time.sleep(0.2)
+        return "done"
+
+    async def main():
+        sequencer = MatchingSequencer(session_factory=db_factory)
+        try:
+            matching = asyncio.create_task(sequencer.submit(market["bonds"][0], slow))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            ticks = 0
+            while not matching.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            return ticks, matching.result()
+        finally:
+            await sequencer.shutdown()
+
+    ticks, result = asyncio.run(main())
+    assert result == "done" and ticks > 5
+
+
+def test_actions_of_one_bond_run_in_arrival_order(db_factory, market):
+    seen = []
+
+    def record(index):
+        def action(engine):
+            seen.append(index)
+            return index
+        return action
+
+    results = run_sequenced(db_factory, market, [(0, record(index)) for index in range(50)])
+
+    assert results == list(range(50))
+    assert seen == list(range(50))
+
+
+class RecordingConnectionManager:
+    def __init__(self):
+        self.rooms = []
+        self.users = []
+
+    async def broadcast_to_room(self, room_name, message):
+        self.rooms.append((room_name, message["type"]))
+
+    async def broadcast_to_user(self, user_id, message):
+        self.users.append(user_id)
+
+
+def test_broadcasts_are_handed_back_to_the_loop(db_factory, market):
+    ws_manager = RecordingConnectionManager()
+    bond_id = market["bonds"][0]
+    seller, buyer = market["users"][0], market["users"][1]
+
+    def order(user_id, side):
+        return Order(id=uuid.uuid4(), user_id=user_id, bond_id=bond_id, side=side, type="limit",
+                     price=Decimal("100"), quantity=Decimal("5"), status="open")
+
+    async def main():
+        sequencer = MatchingSequencer(session_factory=db_factory, ws_manager=ws_manager)
+        try:
+            await sequencer.submit(bond_id, EngineCall("process_order", order(seller, "sell")))
+            trades = await sequencer.submit(bond_id, EngineCall("process_order", order(buyer, "buy")))
+            for _ in range(10):
+                await asyncio.sleep(0)
+            return trades
+        finally:
+            await sequencer.shutdown()
+
+    assert len(asyncio.run(main())) == 1
+    assert (f"bond_{bond_id}", "trade") in ws_manager.rooms
+    assert set(ws_manager.users) == {str(seller), str(buyer)}
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import threading
+import uuid
+from collections import Counter
+import pytest
+from app.services.order_book import order_books
+from app.services.reservations import holding_ledger
+from app.services.sharding import HashRing, ShardRouter, _portable_exception, _release_bond, _Worker
+
+
+class FakeConnection:
+    """Worker pipe end that keeps what the router sends"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message)
+
+
+def fake_router(workers: int = 2) -> ShardRouter:
+    router = ShardRouter(workers)
+    router._loop = asyncio.get_running_loop()
+    router._workers = [_Worker(index, None, FakeConnection()) for index in range(workers)]
+    return router
+
+
+def sent(router: ShardRouter, worker: int) -> list:
+    return router._workers[worker].conn.sent
+
+
+def acknowledge(router: ShardRouter, worker: int, payload=None, ok: bool = True):
+    """Answer the last request sent to a worker"""
+    request_id = sent(router, worker)[-1][1]
+    router._dispatch(("result", request_id, ok, payload))
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class WorkerPid:
+    """Picklable action reporting which process ran it"""
+
+    def __call__(self, engine):
+        return os.getpid()
+
+
+def test_ring_is_stable_and_even():
+    bond_ids = [uuid.uuid4() for _ in range(4000)]
+    ring = HashRing(4)
+
+    owners = [ring.lookup(bond_id) for bond_id in bond_ids]
+
+    assert owners == [HashRing(4).lookup(bond_id) for bond_id in bond_ids]
+    counts = Counter(owners)
+    assert set(counts) == {0, 1, 2, 3}
+    assert max(counts.values()) < 1.5 * min(counts.values())
+
+
+def test_rebalance_holds_submits_until_released():
+    async def main():
+        router = fake_router()
+        bond_id = uuid.uuid4()
+        old = router.owner(bond_id)
+        new = 1 - old
+
+        migration = asyncio.create_task(router.rebalance(bond_id, new))
+        await settle()
+        assert sent(router, old)[-1][0] == "release"
+
+        call = asyncio.create_task(router.submit(bond_id, "action"))
+        await settle()
+        assert not call.done()
+        assert sent(router, new) == [] and len(sent(router, old)) == 1
+
+        acknowledge(router, old)
+        await migration
+        await settle()
+        kind, _, called, action = sent(router, new)[-1]
+        assert (kind, called, action) == ("call", bond_id, "action")
+        acknowledge(router, new, "done")
+        assert await call == "done"
+        assert router.owner(bond_id) == new
+
+        back = asyncio.create_task(router.rebalance(bond_id, old))
+        await settle()
+        acknowledge(router, new)
+        await back
+        return router, old, bond_id
+
+    router, old, bond_id = asyncio.run(main())
+    assert router._overrides == {}
+    assert router.owner(bond_id) == old
+
+
+def test_exited_worker_fails_its_requests_only():
+    async def main():
+        router = fake_router()
+        bond_ids = {router.ring.lookup(bond_id): bond_id for bond_id in (uuid.uuid4() for _ in range(50))}
+        lost = asyncio.create_task(router.submit(bond_ids[0], "action"))
+        kept = asyncio.create_task(router.submit(bond_ids[1], "action"))
+        await settle()
+
+        router._worker_exited(router._workers[0])
+        with pytest.raises(RuntimeError, match="worker 0 exited"):
+            await lost
+        assert not kept.done()
+        acknowledge(router, 1, "done")
+        return await kept
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_unpicklable_errors_become_runtime_errors():
+    error = ValueError("bad price")
+    assert _portable_exception(error) is error
+
+    unpicklable = ValueError(threading.Lock())
+    portable = _portable_exception(unpicklable)
+    assert type(portable) is RuntimeError
+    assert str(portable).startswith("ValueError: ")
+
+
+def test_release_drops_the_bond_state(db, market, engine):
+    bond_id, user_id = market["bonds"][0], market["users"][0]
+    order_books.get(db, bond_id)
+    holding_ledger.get(db, user_id, bond_id)
+
+    assert _release_bond(bond_id)(engine)
+
+    assert bond_id not in order_books._books
+    assert (user_id, bond_id) not in holding_ledger._entries
+
+
+def test_worker_processes_run_and_move_bonds():
+    async def main():
+        router = ShardRouter(2)
+        router.start()
+        try:
+            bond_ids = {router.ring.lookup(bond_id): bond_id for bond_id in (uuid.uuid4() for _ in range(50))}
+            pids = [await router.submit(bond_ids[index], WorkerPid()) for index in (0, 1)]
+            await router.rebalance(bond_ids[0], 1)
+            moved = await router.submit(bond_ids[0], WorkerPid())
+            return pids, moved
+        finally:
+            await router.shutdown()
+
+    (first, second), moved = asyncio.run(main())
+    assert first != second and os.getpid() not in (first, second)
+    assert moved == second
@@ -0,0 +1,38 @@
+import uuid
+from app.services.stop_book import StopBook
+
+
+def test_trigger_order_buys_then_sells_by_price_then_arrival():
+    book = StopBook(uuid.uuid4(), last_price=10000)
+    first_buy, buy_low, second_buy, buy_high = (uuid.uuid4() for _ in range(4))
+    sell_high, sell_low = uuid.uuid4(), uuid.uuid4()
+    book.add(first_buy, "buy", 10100)
+    book.add(buy_high, "buy", 10300)
+    book.add(buy_low, "buy", 10050)
+    book.add(second_buy, "buy", 10100)
+    book.add(sell_low, "sell", 9800)
+    book.add(sell_high, "sell", 9900)
+
+    assert book.trigger(10200) == [buy_low, first_buy, second_buy]
+    assert book.trigger(9850) == [sell_high]
+    assert book.trigger(9000) == [sell_low]
+    assert len(book) == 1 and book.last_price == 9000
+
+
+def test_removed_stops_do_not_trigger():
+    book = StopBook(uuid.uuid4())
+    kept, removed = uuid.uuid4(), uuid.uuid4()
+    book.add(removed, "sell", 9900)
+    book.add(kept, "sell", 9900)
+
+    assert book.remove(removed)
+    assert not book.remove(removed)
+    assert book.trigger(9900) == [kept]
+
+
+def test_crossed_uses_last_price():
+    book = StopBook(uuid.uuid4())
+    assert not book.crossed("buy", 10000)
+    book.trigger(10000)
+    assert book.crossed("buy", 10000) and not book.crossed("buy", 10001)
+    assert book.crossed("sell", 10000) and not book.crossed("sell", 9999)
@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.models.models import Trade
+from app.services.trade_stats import _Ring, trade_stats
+
+
+def add_trades(db, bond_id, trades):
+    now = datetime.utcnow()
+    db.add_all([
+        Trade(id=uuid.uuid4(), buy_order_id=uuid.uuid4(), sell_order_id=uuid.uuid4(), bond_id=bond_id,
+              price=Decimal(price), quantity=Decimal("1"), executed_at=now - age)
+        for age, price in trades
+    ])
+    db.commit()
+
+
+def test_warm_start_references_over_several_days(db, market):
+    bond_id = market["bonds"][0]
+    add_trades(db, bond_id, [
+        (timedelta(days=8), "95.00"),
+        (timedelta(days=3), "100.00"),
+        (timedelta(days=2), "101.00"),
+        (timedelta(hours=30), "102.00"),
+        (timedelta(hours=2), "103.00"),
+        (timedelta(minutes=10), "104.00"),
+    ])
+
+    trade_stats.warm_start(db, [bond_id])
+
+    week = trade_stats.get(db, bond_id, "7d")
+    assert week.reference == Decimal("95.00")
+    assert week.trades_count == 5
+    day = trade_stats.get(db, bond_id, "24h")
+    assert day.reference == Decimal("102.00")
+    assert (day.open, day.close, day.trades_count) == (Decimal("103.00"), Decimal("104.00"), 2)
+    hour = trade_stats.get(db, bond_id, "1h")
+    assert hour.reference == Decimal("103.00")
+    assert hour.trades_count == 1
+
+
+def test_warm_start_reference_without_dropped_buckets(db, market):
+    bond_id = market["bonds"][0]
+    add_trades(db, bond_id, [(timedelta(days=9), "97.00"), (timedelta(hours=1, minutes=30), "99.00")])
+
+    trade_stats.warm_start(db, [bond_id])
+
+    assert trade_stats.get(db, bond_id, "7d").reference == Decimal("97.00")
+    assert trade_stats.get(db, bond_id, "24h").reference == Decimal("97.00")
+    assert trade_stats.get(db, bond_id, "1h").reference == Decimal("99.00")
+
+
+def test_ring_keeps_newest_dropped_close():
+    ring = _Ring(60, 3)
+    for minute, price in enumerate([100, 101, 102, 103, 104]):
+        ring.add(minute * 60, price, 1)
+    ring.seed_reference(-3600, 90)
+
+    stats = ring.window("3m", 3, 4 * 60)
+    assert stats.reference == Decimal("1.01")
+    assert (stats.open, stats.close, stats.trades_count) == (Decimal("1.02"), Decimal("1.04"), 3)
@@ -0,0 +1,51 @@
+import asyncio
+import uuid
+from datetime import datetime
+import numpy as np
+import pytest
+from app.services import yield_curve as yield_curve_module
+from app.services.yield_curve import TAU_GRID, FittedCurve, YieldCurveService, fit_nelson_siegel, nelson_siegel
+
+
+@pytest.mark.parametrize("params", [(0.07, -0.02, 0.01), (0.05, 0.015, -0.02), (0.09, -0.03, 0.04)])
+def test_fit_recovers_nelson_siegel_parameters(params):
+    tau = float(TAU_GRID[110])
+    tenors = np.array([0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 15.0, 20.0, 30.0])
+    yields = nelson_siegel(tenors, *params, tau)
+
+    beta0, beta1, beta2, fitted_tau = fit_nelson_siegel(tenors, yields)
+
+    assert fitted_tau == pytest.approx(tau)
+    assert (beta0, beta1, beta2) == pytest.approx(params, abs=1e-8)
+
+
+def test_fit_is_flat_below_three_points():
+    beta0, beta1, beta2, _ = fit_nelson_siegel(np.array([1.0, 5.0]), np.array([0.06, 0.08]))
+    assert (beta0, beta1, beta2) == pytest.approx((0.07, 0.0, 0.0))
+
+
+def test_burst_of_price_changes_refits_once(db_factory, monkeypatch):
+    service = YieldCurveService(debounce=0.05)
+    bond_id = uuid.uuid4()
+    service._curve = FittedCurve(0.07, 0.0, 0.0, 1.0, datetime.utcnow(), [])
+    service._prices = {bond_id: 10000}
+    fits = []
+    monkeypatch.setattr(yield_curve_module, "SessionLocal", db_factory)
+    monkeypatch.setattr(service, "fit", lambda db: fits.append(asyncio.get_running_loop().time()))
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        service.price_changed(bond_id, 10000)  # Unchanged from the fit
+        assert service._task is None
+        for price in range(10001, 10011):
+            await asyncio.sleep(0.01)
+            last = loop.time()
+            service.price_changed(bond_id, price)
+        await service._task
+        return last
+
+    last = asyncio.run(main())
+
+    # One refit, a debounce period after the last change
+    assert len(fits) == 1
+    assert fits[0] >= last + 0.05